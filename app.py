@@ -5,11 +5,15 @@ import plotly.express as px
 import geopandas as gpd
 import folium
 import os
+import atexit
 import json
+import glob
 import time
+import threading
 import matplotlib.pyplot as plt
 import seaborn as sns
 import plotly.graph_objects as go
+import plotly.io as pio
 from folium.plugins import HeatMap
 import streamlit.components.v1 as components
 from datetime import datetime
@@ -17,6 +21,31 @@ import joblib
 import pickle
 from streamlit_folium import st_folium
 
+from src.shared_cache import get_cache, file_fingerprint
+from src.conditional_probability import conditional_fire_table, VARIABLE_LABELS
+from src.moments import load_moments
+from src import climate_archive
+from src.climate_archive import (CLIMATE_VARIABLES, DEFAULT_YEAR_RANGE, read_climate_archive, slice_years,
+                                 year_bounds, period_label)
+from src.climatology import build_climatology
+from src.weather import WeatherService, provider_from_env
+from src.features import BASE_FEATURES, INPUT_COLUMNS, build_model_input, model_lag_columns
+from src.fire_engine import (ForestFireEngine, CompactFireEngine, FIRE_ENGINE_LABELS, DEFAULT_FIRE_ENGINE,
+                             FOREST_MODEL_NAME, COMPACT_MODEL_NAME)
+from src.risk_engine import ClosedFormRiskEngine, ForestRiskEngine, RISK_ENGINE_LABELS, DEFAULT_RISK_ENGINE
+from src.uncertainty import TreeStack, TREE_INTERVAL, supports_tree_spread
+from src.attribution import PathAttributor, formula_attributions, top_drivers
+from src.scenarios import anomaly_correlation, scenario_key, simulate
+from src.sensitivity import REFINEMENT_LEVELS, axis_range, refine_surface, score_points
+from src.forecast import FORECAST_DIR, HORIZONS, forecast, saved_forecast
+from src.spatial import DistrictIndex
+from src.fire_events import (EVENT_GAP_DAYS, EVENT_KM, MODIS_RAW_GLOB, attach_event_aggregates, build_events,
+                             district_file)
+from src.fire_heatmap import (DEFAULT_ZOOM, HEATMAP_DIR, MAP_CENTER, WEIGHTS, heat_points, heatmap_layer,
+                              level_for_zoom, payload_bytes, read_bins, update_bins, visible_bins)
+from src.risk_surface import GRID_RESOLUTION, MASK_KM, image_corners, interpolate_surface, surface_png
+from src.gazetteer import build_gazetteer, render_all_district_maps, MODIS_WITH_DISTRICT_GLOB
+
 import streamlit as st
 
 st.set_page_config(
@@ -100,6 +129,499 @@ def set_background_and_styles():
 )
 
 
+# Data and model locations
+CLIMATE_ARCHIVE_PATH = "data/raw/climate_data_nepal_district_wise_monthly.csv"
+# Values derived from the archive change with the file and with how it is parsed
+CLIMATE_SOURCES = [CLIMATE_ARCHIVE_PATH, climate_archive.__file__]
+COMBINED_DATA_PATH = "data/processed/combined_fire_climate.csv"
+MODEL_DIR = os.path.join("models")
+
+# Partial reruns: a widget inside a fragment only re-executes that fragment
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+def load_dataset(path):
+    # Parsed once per file version and shared by all worker processes
+    df = get_cache().get_or_compute("dataset", lambda: pd.read_csv(path), sources=[path], params=path)
+    return df.copy()
+
+
+def load_climate_archive():
+    # Full 1981-2019 archive, parsed once with only the needed columns
+    return get_cache().get_or_compute(
+        "climate_archive", lambda: read_climate_archive(CLIMATE_ARCHIVE_PATH), sources=CLIMATE_SOURCES
+    )
+
+
+def load_climate_data(year_range):
+    # Per-range slices are materialized on first use and shared by all workers
+    df = get_cache().get_or_compute(
+        "climate_range", lambda: slice_years(load_climate_archive(), *year_range),
+        sources=CLIMATE_SOURCES, params=tuple(year_range)
+    )
+    return df.copy()
+
+
+def get_year_range():
+    return tuple(st.session_state.get("year_range", DEFAULT_YEAR_RANGE))
+
+
+def year_range_selector():
+    first_year, last_year = year_bounds(load_climate_archive())
+    st.sidebar.select_slider(
+        "Climate years",
+        options=list(range(first_year, last_year + 1)),
+        value=DEFAULT_YEAR_RANGE,
+        key="year_range",
+        help="Year range used by the climate maps and charts"
+    )
+
+
+def cached_derived(name, sources, compute, params=None):
+    # Aggregates, pivot tables and risk tables shared across workers
+    return get_cache().get_or_compute(name, compute, sources=sources, params=params)
+
+
+def cached_figure(name, sources, build, params=None):
+    # Plotly figures are stored as JSON so any worker can rebuild them cheaply
+    fig_json = get_cache().get_or_compute(name, lambda: build().to_json(), sources=sources, params=params)
+    return pio.from_json(fig_json)
+
+
+@st.cache_resource
+def _load_model_file(path, fingerprint):
+    # Memory-map the numpy arrays so workers share the same pages
+    return joblib.load(path, mmap_mode='r')
+
+
+def load_model(name):
+    # Loaded once per server process and reloaded when the file content changes
+    path = os.path.join(MODEL_DIR, f"{name}.pkl")
+    return _load_model_file(path, file_fingerprint(path))
+
+
+@st.cache_resource
+def _load_tree_stack(path, fingerprint):
+    # Flattened once per model file so every prediction gets its per-tree spread in one pass
+    model = _load_model_file(path, fingerprint)
+    return TreeStack(model) if supports_tree_spread(model) else None
+
+
+def load_tree_stack(name):
+    path = os.path.join(MODEL_DIR, f"{name}.pkl")
+    return _load_tree_stack(path, file_fingerprint(path))
+
+# The risk and fire models are only loaded when they are selected as engines
+MODEL_NAMES = ['scaler', 'district_encoder']
+RISK_MODEL_NAME = 'risk_model'
+
+
+def get_risk_engine(name, models):
+    if name == ForestRiskEngine.name:
+        return ForestRiskEngine(load_model(RISK_MODEL_NAME), models['scaler'], models['district_encoder'],
+                                load_tree_stack(RISK_MODEL_NAME))
+    return ClosedFormRiskEngine()
+
+
+def get_fire_engine(name, models):
+    if name == CompactFireEngine.name:
+        return CompactFireEngine(load_model(COMPACT_MODEL_NAME))
+    return ForestFireEngine(load_model(FOREST_MODEL_NAME), models['scaler'], models['district_encoder'],
+                            load_tree_stack(FOREST_MODEL_NAME))
+
+
+def model_file_exists(name):
+    return os.path.exists(os.path.join(MODEL_DIR, f"{name}.pkl"))
+
+
+@st.cache_resource
+def _load_path_attributor(path, fingerprint, feature_names):
+    # Per-node split credits, computed once per model file
+    return PathAttributor(_load_model_file(path, fingerprint), list(feature_names),
+                          _load_tree_stack(path, fingerprint))
+
+
+def load_path_attributor(name, models):
+    path = os.path.join(MODEL_DIR, f"{name}.pkl")
+    feature_names = (BASE_FEATURES + model_lag_columns(models['scaler'])
+                     + [f"DISTRICT_{d}" for d in models['district_encoder'].categories_[0]])
+    return _load_path_attributor(path, file_fingerprint(path), tuple(feature_names))
+
+
+def engine_sources(risk_engine_name, fire_engine_name):
+    # Model files the selected engines' outputs depend on, for cache keys
+    names = ['scaler', 'district_encoder']
+    if risk_engine_name == ForestRiskEngine.name:
+        names.append(RISK_MODEL_NAME)
+    names.append(COMPACT_MODEL_NAME if fire_engine_name == CompactFireEngine.name else FOREST_MODEL_NAME)
+    sources = [os.path.join(MODEL_DIR, f"{name}.pkl") for name in names]
+    if model_lag_columns(load_model('scaler')):
+        # Lag features come from the feature store, which is built from the combined table
+        sources.append(COMBINED_DATA_PATH)
+    return sources
+
+
+def compute_attributions(input_df, X_scaled, models, risk_engine_name, fire_engine_name):
+    # (bias, credits per feature group) for each model, or None where the engine has none
+    attributions = {'risk': None, 'fire': None}
+    if risk_engine_name == ForestRiskEngine.name:
+        if supports_tree_spread(load_model(RISK_MODEL_NAME)):
+            attributions['risk'] = load_path_attributor(RISK_MODEL_NAME, models).explain(X_scaled)
+    else:
+        # Relative to the training means, so the bias is the formula's score for an average month
+        attributions['risk'] = formula_attributions(input_df, dict(zip(BASE_FEATURES, models['scaler'].mean_)))
+    if fire_engine_name == ForestFireEngine.name and supports_tree_spread(load_model(FOREST_MODEL_NAME)):
+        bias, credits = load_path_attributor(FOREST_MODEL_NAME, models).explain(X_scaled)
+        # Percentage points, like the fire probability
+        attributions['fire'] = (bias * 100, credits * 100)
+    return attributions
+
+
+def explain_prediction(input_df, X_scaled, models, risk_engine_name, fire_engine_name):
+    # Repeated inputs are answered from the shared cache; the model files are part of the key
+    def compute():
+        attributions = compute_attributions(input_df, X_scaled, models, risk_engine_name, fire_engine_name)
+        return {kind: None if value is None else {'bias': float(value[0]), 'credits': value[1].iloc[0].to_dict()}
+                for kind, value in attributions.items()}
+
+    params = (risk_engine_name, fire_engine_name, tuple(input_df.iloc[0].tolist()))
+    return cached_derived("prediction_attributions", engine_sources(risk_engine_name, fire_engine_name),
+                          compute, params=params)
+
+
+def climatology_frame(month):
+    # Every located district at its climatological inputs for the month
+    gazetteer, _ = load_district_reference()
+    climatology = load_climatology()
+    rows = []
+    for name in gazetteer.located_names():
+        lat, lon = gazetteer.centroid(name)
+        inputs = climatology.defaults(name, month) or FALLBACK_INPUTS
+        rows.append({'DISTRICT': name, 'MONTH': month, 'LAT': lat, 'LON': lon, **inputs})
+    return pd.DataFrame(rows)[INPUT_COLUMNS]
+
+
+def explain_all_districts(month, models, risk_engine_name, fire_engine_name):
+    # Every located district at its climatological inputs for the month, attributed in one batch
+    def compute():
+        frame = climatology_frame(month)
+        X_scaled = build_model_input(frame, models['scaler'], models['district_encoder'])
+        risk_scores = get_risk_engine(risk_engine_name, models).score(frame, X_scaled)
+        fire_probabilities = get_fire_engine(fire_engine_name, models).probability(frame, X_scaled) * 100
+        attributions = compute_attributions(frame, X_scaled, models, risk_engine_name, fire_engine_name)
+
+        table = pd.DataFrame({
+            'District': frame['DISTRICT'].str.title(),
+            'Risk Score': np.round(risk_scores, 1),
+            'Risk Category': [get_risk_category(v) for v in risk_scores],
+            'Risk Drivers': top_drivers(attributions['risk'][1]) if attributions['risk'] else "",
+            'Fire Probability (%)': np.round(fire_probabilities, 1),
+            'Fire Drivers (pts)': top_drivers(attributions['fire'][1]) if attributions['fire'] else "",
+        })
+        return table.sort_values('Risk Score', ascending=False).reset_index(drop=True)
+
+    sources = engine_sources(risk_engine_name, fire_engine_name) + CLIMATE_SOURCES + district_reference_sources()
+    return cached_derived("district_attributions", sources, compute, params=(month, risk_engine_name, fire_engine_name))
+
+
+def run_climate_scenarios(month, spec, models, risk_engine_name, fire_engine_name):
+    # Cached per (month, scenario spec, engines) and the content of the model files
+    gazetteer, _ = load_district_reference()
+    climatology = load_climatology()
+
+    def compute():
+        correlation = cached_derived("anomaly_correlation", CLIMATE_SOURCES,
+                                     lambda: anomaly_correlation(load_climate_archive()))
+        locations = {name: gazetteer.centroid(name) for name in gazetteer.located_names()}
+        return simulate(climatology, locations, month, spec, correlation,
+                        get_risk_engine(risk_engine_name, models), get_fire_engine(fire_engine_name, models),
+                        models['scaler'], models['district_encoder'])
+
+    sources = engine_sources(risk_engine_name, fire_engine_name) + CLIMATE_SOURCES + district_reference_sources()
+    return cached_derived("climate_scenarios", sources, compute,
+                          params=(month, scenario_key(spec), risk_engine_name, fire_engine_name))
+
+
+def sensitivity_surface(base, x_var, y_var, resolution, models, risk_engine_name, fire_engine_name):
+    # One cache entry per refinement level; each level only scores the points the previous one lacks
+    climatology = load_climatology()
+    x_range = axis_range(climatology, base['DISTRICT'], base['MONTH'], x_var)
+    y_range = axis_range(climatology, base['DISTRICT'], base['MONTH'], y_var)
+    level = REFINEMENT_LEVELS.index(resolution)
+
+    def compute():
+        previous = None
+        if level > 0:
+            previous = sensitivity_surface(base, x_var, y_var, REFINEMENT_LEVELS[level - 1], models,
+                                           risk_engine_name, fire_engine_name)
+        return refine_surface(previous, base, x_var, y_var, x_range, y_range, resolution,
+                              get_risk_engine(risk_engine_name, models), get_fire_engine(fire_engine_name, models),
+                              models['scaler'], models['district_encoder'])
+
+    sources = engine_sources(risk_engine_name, fire_engine_name) + CLIMATE_SOURCES
+    params = (tuple(sorted(base.items())), x_var, y_var, resolution, risk_engine_name, fire_engine_name)
+    return cached_derived("sensitivity_surface", sources, compute, params=params)
+
+
+# Fixed colour ranges, so the surface of every month reads on the same scale
+SURFACE_OUTPUTS = {
+    'risk': ("Risk Score", (0, 45)),
+    'fire': ("Fire Probability (%)", (0, 100)),
+}
+
+
+def risk_surface(month, output, models, risk_engine_name, fire_engine_name):
+    # One compact grid per (month, output, engines) and the content of the model files
+    def compute():
+        frame = climatology_frame(month)
+        risk_scores, fire_probabilities = score_points(frame, get_risk_engine(risk_engine_name, models),
+                                                       get_fire_engine(fire_engine_name, models),
+                                                       models['scaler'], models['district_encoder'])
+        values = risk_scores if output == 'risk' else fire_probabilities * 100
+        index = DistrictIndex(frame['DISTRICT'], frame['LAT'], frame['LON'])
+        surface = interpolate_surface(index, values, SURFACE_OUTPUTS[output][1])
+        surface['districts'] = pd.DataFrame({'DISTRICT': frame['DISTRICT'], 'LAT': frame['LAT'],
+                                             'LON': frame['LON'], 'VALUE': values})
+        return surface
+
+    sources = engine_sources(risk_engine_name, fire_engine_name) + CLIMATE_SOURCES + district_reference_sources()
+    return cached_derived("risk_surface", sources, compute,
+                          params=(month, output, risk_engine_name, fire_engine_name, GRID_RESOLUTION, MASK_KM))
+
+
+def build_risk_surface_map(surface, output):
+    # The surface as an image layer under the district markers, which carry the hover and colour bar
+    label, (low, high) = SURFACE_OUTPUTS[output]
+    districts = surface['districts']
+    fig = go.Figure(go.Scattermapbox(
+        lat=districts['LAT'],
+        lon=districts['LON'],
+        mode='markers',
+        marker=dict(size=7, color=districts['VALUE'], colorscale="YlOrRd", cmin=low, cmax=high,
+                    colorbar=dict(title=label)),
+        text=districts['DISTRICT'].str.title(),
+        hovertemplate="<b>%{text}</b><br>" + label + ": %{marker.color:.1f}<extra></extra>",
+    ))
+    lon_min, lat_min, lon_max, lat_max = surface['bounds']
+    fig.update_layout(
+        mapbox=dict(
+            style="open-street-map",
+            center=dict(lat=(lat_min + lat_max) / 2, lon=(lon_min + lon_max) / 2),
+            zoom=5.5,
+            layers=[dict(sourcetype="image", source=surface_png(surface), coordinates=image_corners(surface),
+                         below="traces")],
+        ),
+        margin={"r": 0, "t": 10, "l": 0, "b": 0},
+        height=520,
+    )
+    return fig
+
+
+def load_outlook(compute=False):
+    # The saved outlook is only recomputed when the combined table changes, e.g. a new month lands
+    saved = saved_forecast(COMBINED_DATA_PATH, FORECAST_DIR)
+    if saved is None and compute:
+        table_path, manifest, _ = forecast(COMBINED_DATA_PATH, FORECAST_DIR)
+        saved = table_path, manifest
+    if saved is None:
+        return None
+    table_path, manifest = saved
+    return cached_derived("forecast_table", [table_path], lambda: pd.read_csv(table_path)), manifest
+
+
+def fire_event_sources():
+    raw_paths = sorted(glob.glob(MODIS_RAW_GLOB))
+    return raw_paths + [district_file(p) for p in raw_paths if os.path.exists(district_file(p))]
+
+
+def load_fire_events():
+    # (events, district-month aggregates), clustered once per version of the raw detection files
+    return cached_derived("fire_events", fire_event_sources(), build_events)
+
+
+def add_year_month(df):
+    df['YearMonth'] = df['YEAR'].astype(str) + '-' + df['MONTH'].astype(str).str.zfill(2)
+    return df
+
+
+# Longer ranges animate yearly means: the 468 monthly frames of 1981-2019 make a
+# 1.3 MB figure that takes 10x as long to load as the default six years
+MONTHLY_FRAMES_MAX_YEARS = 10
+
+
+def animation_frames(climate_data, year_range):
+    """(frame data, slider label, title period) for the animated climate maps."""
+    if year_range[1] - year_range[0] + 1 <= MONTHLY_FRAMES_MAX_YEARS:
+        return climate_data, "Month", period_label(year_range)
+    yearly = climate_data.drop(columns=['MONTH', 'YearMonth']).groupby(['YEAR', 'DISTRICT'], as_index=False).mean(
+        numeric_only=True)
+    # Same frame column as the monthly maps, so the figure builders do not change
+    yearly['YearMonth'] = yearly['YEAR'].astype(str)
+    return yearly, "Year", f"{period_label(year_range)}, yearly means"
+
+
+def district_reference_sources():
+    return [COMBINED_DATA_PATH] + sorted(glob.glob(MODIS_WITH_DISTRICT_GLOB))
+
+
+@st.cache_resource
+def _load_district_reference(fingerprints):
+    sources = district_reference_sources()
+    gazetteer = cached_derived(
+        "district_gazetteer", sources,
+        lambda: build_gazetteer(load_dataset(COMBINED_DATA_PATH))
+    )
+    district_maps = cached_derived(
+        "district_map_html", sources,
+        lambda: render_all_district_maps(gazetteer)
+    )
+    return gazetteer, district_maps
+
+
+def load_district_reference():
+    # Built once per data version and kept in memory for dict lookups
+    sources = district_reference_sources()
+    return _load_district_reference(tuple(file_fingerprint(p) for p in sources))
+
+
+@st.cache_resource
+def _load_district_index(fingerprints):
+    gazetteer, _ = _load_district_reference(fingerprints)
+    return DistrictIndex.from_gazetteer(gazetteer)
+
+
+def load_district_index():
+    # KD-tree over the gazetteer's centroids for nearest / within-radius queries
+    sources = district_reference_sources()
+    return _load_district_index(tuple(file_fingerprint(p) for p in sources))
+
+
+@st.cache_resource
+def _load_correlation_moments(fingerprint):
+    return load_moments(COMBINED_DATA_PATH)
+
+
+def load_correlation_moments():
+    # Rebuilt from the combined table only when its content changes
+    return _load_correlation_moments(file_fingerprint(COMBINED_DATA_PATH))
+
+
+def describe_correlation(r):
+    if np.isnan(r):
+        return "undefined"
+    strength = abs(r)
+    if strength >= 0.8:
+        label = "very strong"
+    elif strength >= 0.6:
+        label = "strong"
+    elif strength >= 0.4:
+        label = "moderate"
+    elif strength >= 0.2:
+        label = "weak"
+    else:
+        return "negligible"
+    return f"{label} {'positive' if r > 0 else 'negative'}"
+
+
+@st.cache_resource
+def _load_climatology(fingerprint):
+    return cached_derived(
+        "climatology", CLIMATE_SOURCES,
+        lambda: build_climatology(load_climate_archive())
+    )
+
+
+def load_climatology():
+    return _load_climatology(file_fingerprint(CLIMATE_ARCHIVE_PATH))
+
+
+@st.cache_resource(on_release=WeatherService.close)
+def get_weather_service():
+    # One service per process so its TTL cache and connection pool are shared by every session;
+    # on_release covers clearing the cache, atexit covers server shutdown
+    service = WeatherService(provider_from_env(), load_climatology())
+    atexit.register(service.close)
+    return service
+
+
+def fetch_current_weather(district, month):
+    # All located districts are fetched concurrently, so switching district afterwards is a cache hit
+    gazetteer, _ = load_district_reference()
+    locations = {name: gazetteer.centroid(name) for name in gazetteer.located_names()}
+    if district not in locations:
+        return None
+    return get_weather_service().get_current(locations, month)[district]
+
+
+# Startup warm-up, shared by every session of this server process
+def warm_caches(status):
+    status["state"] = "running"
+    start = time.perf_counter()
+    try:
+        # Processed datasets
+        climate_data = add_year_month(load_climate_data(DEFAULT_YEAR_RANGE))
+        fire_data = add_year_month(load_dataset(COMBINED_DATA_PATH))
+
+        # Model artifacts, plus one dummy prediction so lazy initialisation happens now
+        models = {name: load_model(name) for name in MODEL_NAMES}
+        sample = fire_data.iloc[[0]][['DISTRICT', 'MONTH', 'LAT', 'LON', 'Prep', 'AvgTemp',
+                                      'MaxTemp', 'Humidity', 'WindSpeed']].copy()
+        sample['DISTRICT'] = sample['DISTRICT'].str.lower().str.strip()
+        X_scaled = build_model_input(sample, models['scaler'], models['district_encoder'])
+        for engine_name, model_name in [(ForestFireEngine.name, FOREST_MODEL_NAME),
+                                        (CompactFireEngine.name, COMPACT_MODEL_NAME)]:
+            if model_file_exists(model_name):
+                get_fire_engine(engine_name, models).probability_with_spread(sample, X_scaled)
+        if model_file_exists(RISK_MODEL_NAME):
+            get_risk_engine(ForestRiskEngine.name, models).score_with_spread(sample, X_scaled)
+
+        # District gazetteer, location maps and climatology for the prediction page
+        load_district_reference()
+        load_climatology()
+
+        # Default views of the map page
+        cached_figure("map_max_temp", CLIMATE_SOURCES,
+                      lambda: build_max_temp_map(climate_data, DEFAULT_YEAR_RANGE), params=DEFAULT_YEAR_RANGE)
+        cached_figure("map_fire_count", [COMBINED_DATA_PATH], lambda: build_fire_count_map(fire_data))
+
+        status["state"] = "done"
+    except Exception as e:
+        status["state"] = "failed"
+        status["error"] = str(e)
+    finally:
+        status["seconds"] = time.perf_counter() - start
+
+
+@st.cache_resource
+def start_cache_warmup():
+    # cache_resource makes this run once per server process. `streamlit run` has no server-start
+    # hook, so it starts with the first session's script run, as the first line of main().
+    # That run renders without waiting for the thread, except that a cached loader the warm-up
+    # is still computing holds its entry's lock, so the page waits for it rather than loading
+    # it a second time. Sessions arriving after the warm-up find everything cached.
+    status = {"state": "starting"}
+    thread = threading.Thread(target=warm_caches, args=(status,), name="cache-warmup", daemon=True)
+    thread.start()
+    return status
+
+
+def show_cache_stats(warmup_status):
+    stats = get_cache().stats()
+    with st.sidebar.expander("⚙️ Cache statistics"):
+        st.caption(
+            f"Hits: {stats['hits']} · Misses: {stats['misses']} · "
+            f"Hit rate: {stats['hit_rate']:.0%}"
+        )
+        st.caption(
+            f"Entries: {stats['entries']} · Size: {stats['size_bytes'] / 1e6:.1f} MB / "
+            f"{stats['max_bytes'] / 1e6:.0f} MB · Evictions: {stats['evictions']}"
+        )
+        warmup = f"Warm-up: {warmup_status['state']}"
+        if "seconds" in warmup_status:
+            warmup += f" ({warmup_status['seconds']:.1f} s)"
+        if "error" in warmup_status:
+            warmup += f" – {warmup_status['error']}"
+        st.caption(warmup)
+
 
 # Navigation Menu
 def create_sidebar_menu():
@@ -145,6 +667,59 @@ def home_page():
     3. Support forest conservation efforts
     """)
 
+
+# Figure builders shared by the map page and the startup warm-up
+def build_max_temp_map(climate_data, year_range):
+    df_filtered, frame_label, period = animation_frames(climate_data, year_range)
+    df_filtered = df_filtered.copy()
+    min_temp = df_filtered["MaxTemp"].min()
+    df_filtered["SizeTemp"] = df_filtered["MaxTemp"] + abs(min_temp) + 1
+
+    fig = px.scatter_mapbox(
+        df_filtered,
+        lat="LAT",
+        lon="LON",
+        size="SizeTemp",
+        color="MaxTemp",
+        animation_frame="YearMonth",  #  # Using YearMonth for animation
+        hover_name="DISTRICT",
+        hover_data={"MaxTemp": ":.2f °C", "LAT": False, "LON": False,"SizeTemp": False},
+        size_max=15,
+        zoom=5,
+        mapbox_style="open-street-map",  
+        title=f"Monthly Maximum Temperature Variation Across Districts of Nepal ({period})",
+        color_continuous_scale="Reds"
+    )
+    fig.update_layout(
+        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+        sliders=[{"currentvalue": {"prefix": f"{frame_label}: "}}]
+    )
+    return fig
+
+
+def build_fire_count_map(fire_data):
+    fig = px.scatter_mapbox(
+        fire_data,
+        lat='LAT',
+        lon='LON',
+        color='Fire_Count',
+        size='Fire_Count',
+        animation_frame='YearMonth',
+        hover_name='DISTRICT',
+        hover_data={'Fire_Count': True, 'LAT': False, 'LON': False},
+        zoom=5,
+        center={'lat': 28.0, 'lon': 84.0},
+        title='Monthly Fire Count Across Districts (2012–2017)',
+        color_continuous_scale='Viridis',
+        range_color=[0, fire_data['Fire_Count'].max()]
+    )
+    fig.update_layout(
+        mapbox_style="open-street-map",
+        margin={"r": 0, "t": 40, "l": 0, "b": 0}
+    )
+    return fig
+
+
 # Interactive Map Page
 def interactive_map_page():
     st.title("🗺️ Interactive Climate And Forest Fire Maps")
@@ -152,11 +727,11 @@ def interactive_map_page():
     try:
         
         # Load climate data
-        file_path = "data/processed/flitered_climate_data.csv"
-        climate_data = pd.read_csv(file_path)
+        year_range = get_year_range()
+        climate_data = load_climate_data(year_range)
 
         # Create YearMonth column for animation frame
-        climate_data['YearMonth'] = climate_data['YEAR'].astype(str) + '-' + climate_data['MONTH'].astype(str).str.zfill(2)
+        add_year_month(climate_data)
 
        
         # Map Selection
@@ -187,29 +762,8 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                df_filtered = climate_data.copy()
-                min_temp = df_filtered["MaxTemp"].min()
-                df_filtered["SizeTemp"] = df_filtered["MaxTemp"] + abs(min_temp) + 1
-
-                fig = px.scatter_mapbox(
-                    df_filtered,
-                    lat="LAT",
-                    lon="LON",
-                    size="SizeTemp",
-                    color="MaxTemp",
-                    animation_frame="YearMonth",  #  # Using YearMonth for animation
-                    hover_name="DISTRICT",
-                    hover_data={"MaxTemp": ":.2f °C", "LAT": False, "LON": False,"SizeTemp": False},
-                    size_max=15,
-                    zoom=5,
-                    mapbox_style="open-street-map",  
-                    title="Monthly Maximum Temperature Variation Across Districts of Nepal (2012-2017)",
-                    color_continuous_scale="Reds"
-                )
-                fig.update_layout(
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                    sliders=[{"currentvalue": {"prefix": "Month: "}}]
-                )
+                fig = cached_figure("map_max_temp", CLIMATE_SOURCES,
+                                    lambda: build_max_temp_map(climate_data, year_range), params=year_range)
                 st.plotly_chart(fig)
 
             elif climate_var == "Humidity":
@@ -224,28 +778,33 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                df_filtered = climate_data.copy()
-                fig = px.scatter_mapbox(
-                    df_filtered,
-                    lat='LAT',
-                    lon='LON',
-                    color='Humidity',
-                    size='Humidity',
-                    size_max=10,
-                    animation_frame='YearMonth',  # Using YearMonth for animation
-                    hover_name='DISTRICT',
-                    hover_data={'Humidity': ":.1f %", 'LAT': False, 'LON': False},
-                    zoom=5.5,
-                    center={'lat': 27.7172, 'lon': 85.3240},
-                    title='Monthly Humidity Variation Across Nepal (2012-2017)',
-                    color_continuous_scale='Blues',
-                    range_color=[climate_data['Humidity'].min(), climate_data['Humidity'].max()],
-                    height=600
-                )
-                fig.update_layout(
-                    mapbox_style="open-street-map",  
-                    margin={"r":0,"t":40,"l":0,"b":0}
-                )
+                def build_fig():
+                    df_filtered, frame_label, period = animation_frames(climate_data, year_range)
+                    fig = px.scatter_mapbox(
+                        df_filtered,
+                        lat='LAT',
+                        lon='LON',
+                        color='Humidity',
+                        size='Humidity',
+                        size_max=10,
+                        animation_frame='YearMonth',  # Using YearMonth for animation
+                        hover_name='DISTRICT',
+                        hover_data={'Humidity': ":.1f %", 'LAT': False, 'LON': False},
+                        zoom=5.5,
+                        center={'lat': 27.7172, 'lon': 85.3240},
+                        title=f'Monthly Humidity Variation Across Nepal ({period})',
+                        color_continuous_scale='Blues',
+                        range_color=[df_filtered['Humidity'].min(), df_filtered['Humidity'].max()],
+                        height=600
+                    )
+                    fig.update_layout(
+                        mapbox_style="open-street-map",  
+                        margin={"r":0,"t":40,"l":0,"b":0},
+                        sliders=[{"currentvalue": {"prefix": f"{frame_label}: "}}]
+                    )
+                    return fig
+
+                fig = cached_figure("map_humidity", CLIMATE_SOURCES, build_fig, params=year_range)
                 st.plotly_chart(fig)
 
             elif climate_var == "Precipitation":
@@ -260,27 +819,32 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                df_filtered = climate_data.copy()
-                fig = px.scatter_mapbox(
-                    df_filtered,
-                    lat='LAT',
-                    lon='LON',
-                    color='Prep',
-                    size=[8]*len(df_filtered),
-                    size_max=8,
-                    animation_frame='YearMonth',  
-                    hover_name='DISTRICT',
-                    hover_data={'Prep': ":.1f mm", 'LAT': False, 'LON': False},
-                    zoom=5,
-                    center={'lat':28.0, 'lon':84.0},
-                    title='Monthly Precipitation Across Districts (2012-2017)',
-                    color_continuous_scale='Blues',
-                    range_color=[0, climate_data['Prep'].max()]
-                )
-                fig.update_layout(
-                    mapbox_style="open-street-map",
-                    margin={"r":0,"t":40,"l":0,"b":0}
-                )
+                def build_fig():
+                    df_filtered, frame_label, period = animation_frames(climate_data, year_range)
+                    fig = px.scatter_mapbox(
+                        df_filtered,
+                        lat='LAT',
+                        lon='LON',
+                        color='Prep',
+                        size=[8]*len(df_filtered),
+                        size_max=8,
+                        animation_frame='YearMonth',  
+                        hover_name='DISTRICT',
+                        hover_data={'Prep': ":.1f mm", 'LAT': False, 'LON': False},
+                        zoom=5,
+                        center={'lat':28.0, 'lon':84.0},
+                        title=f'Monthly Precipitation Across Districts ({period})',
+                        color_continuous_scale='Blues',
+                        range_color=[0, df_filtered['Prep'].max()]
+                    )
+                    fig.update_layout(
+                        mapbox_style="open-street-map",
+                        margin={"r":0,"t":40,"l":0,"b":0},
+                        sliders=[{"currentvalue": {"prefix": f"{frame_label}: "}}]
+                    )
+                    return fig
+
+                fig = cached_figure("map_precipitation", CLIMATE_SOURCES, build_fig, params=year_range)
                 st.plotly_chart(fig)
 
             elif climate_var == "Wind Speed":
@@ -295,41 +859,45 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                df_filtered = climate_data.copy()
-                fig = px.scatter_mapbox(
-                    df_filtered,
-                    lat="LAT",
-                    lon="LON",
-                    size="WindSpeed",
-                    color="WindSpeed",
-                    animation_frame="YearMonth",  
-                    hover_name="DISTRICT",
-                    hover_data={"WindSpeed": ":.2f m/s", "LAT": False, "LON": False},
-                    size_max=15,
-                    zoom=5,
-                    mapbox_style="open-street-map",
-                    title="Monthly Wind Speed Variation Across Districts (2012-2017)",
-                    color_continuous_scale="Viridis"
-                )
-                fig.update_layout(
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                    sliders=[{"currentvalue": {"prefix": "Month: "}}]
-                )
+                def build_fig():
+                    df_filtered, frame_label, period = animation_frames(climate_data, year_range)
+                    fig = px.scatter_mapbox(
+                        df_filtered,
+                        lat="LAT",
+                        lon="LON",
+                        size="WindSpeed",
+                        color="WindSpeed",
+                        animation_frame="YearMonth",  
+                        hover_name="DISTRICT",
+                        hover_data={"WindSpeed": ":.2f m/s", "LAT": False, "LON": False},
+                        size_max=15,
+                        zoom=5,
+                        mapbox_style="open-street-map",
+                        title=f"Monthly Wind Speed Variation Across Districts ({period})",
+                        color_continuous_scale="Viridis"
+                    )
+                    fig.update_layout(
+                        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                        sliders=[{"currentvalue": {"prefix": f"{frame_label}: "}}]
+                    )
+                    return fig
+
+                fig = cached_figure("map_wind_speed", CLIMATE_SOURCES, build_fig, params=year_range)
                 st.plotly_chart(fig)
 
         elif map_type == "Fire Variables":
             st.markdown("### Fire Variables Visualization\nExplore fire-related data across Nepal's districts.")
 
-            firefile_path = "data/processed/combined_fire_climate.csv"
-            fire_data = pd.read_csv(firefile_path)
+            fire_data = load_dataset(COMBINED_DATA_PATH)
 
-            fire_data['YearMonth'] = fire_data['YEAR'].astype(str) + '-' + fire_data['MONTH'].astype(str).str.zfill(2)
+            add_year_month(fire_data)
             
             fire_var = st.selectbox("Select Fire Variable", [
                 "Fire Count", 
                 "Fire Confidence", 
                 "Fire Radiative Power",
-                "Fire Risk"
+                "Fire Risk",
+                "Fire Detection Heatmap"
             ])
             
             if fire_var == "Fire Count":
@@ -344,25 +912,7 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                fig = px.scatter_mapbox(
-                    fire_data,
-                    lat='LAT',
-                    lon='LON',
-                    color='Fire_Count',
-                    size='Fire_Count',
-                    animation_frame='YearMonth',
-                    hover_name='DISTRICT',
-                    hover_data={'Fire_Count': True, 'LAT': False, 'LON': False},
-                    zoom=5,
-                    center={'lat': 28.0, 'lon': 84.0},
-                    title='Monthly Fire Count Across Districts (2012–2017)',
-                    color_continuous_scale='Viridis',
-                    range_color=[0, fire_data['Fire_Count'].max()]
-                )
-                fig.update_layout(
-                    mapbox_style="open-street-map",
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0}
-                )
+                fig = cached_figure("map_fire_count", [COMBINED_DATA_PATH], lambda: build_fire_count_map(fire_data))
                 st.plotly_chart(fig)
             
             elif fire_var == "Fire Confidence":
@@ -378,26 +928,30 @@ def interactive_map_page():
                 """)
                 
                 
-                fig = px.scatter_mapbox(
-                    fire_data,
-                    lat="LAT",
-                    lon="LON",
-                    size="Confidence",
-                    color="Confidence",
-                    animation_frame="YearMonth",
-                    hover_name="DISTRICT",
-                    hover_data={"Confidence": ":.2f", "LAT": False, "LON": False},
+                def build_fig():
+                    fig = px.scatter_mapbox(
+                        fire_data,
+                        lat="LAT",
+                        lon="LON",
+                        size="Confidence",
+                        color="Confidence",
+                        animation_frame="YearMonth",
+                        hover_name="DISTRICT",
+                        hover_data={"Confidence": ":.2f", "LAT": False, "LON": False},
                     
-                    size_max=15,
-                    zoom=5,
-                    mapbox_style="open-street-map",
-                    title="Monthly Fire Confidence Across Districts of Nepal (2012–2017)",
-                    color_continuous_scale="OrRd"
-                )
-                fig.update_layout(
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                    sliders=[{"currentvalue": {"prefix": "Month: "}}]
-                )
+                        size_max=15,
+                        zoom=5,
+                        mapbox_style="open-street-map",
+                        title="Monthly Fire Confidence Across Districts of Nepal (2012–2017)",
+                        color_continuous_scale="OrRd"
+                    )
+                    fig.update_layout(
+                        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                        sliders=[{"currentvalue": {"prefix": "Month: "}}]
+                    )
+                    return fig
+
+                fig = cached_figure("map_fire_confidence", [COMBINED_DATA_PATH], build_fig)
                 st.plotly_chart(fig)
             elif fire_var == "Fire Radiative Power":
                 st.markdown("### Monthly Fire Radiative Power Variation")
@@ -411,26 +965,30 @@ def interactive_map_page():
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
                 
-                fig = px.scatter_mapbox(
-                    fire_data,
-                    lat="LAT",
-                    lon="LON",
-                    size="FRP",
-                    color="FRP",
-                    animation_frame="YearMonth",
-                    hover_name="DISTRICT",
-                    hover_data={"FRP": ":.2f MW", "LAT": False, "LON": False},
+                def build_fig():
+                    fig = px.scatter_mapbox(
+                        fire_data,
+                        lat="LAT",
+                        lon="LON",
+                        size="FRP",
+                        color="FRP",
+                        animation_frame="YearMonth",
+                        hover_name="DISTRICT",
+                        hover_data={"FRP": ":.2f MW", "LAT": False, "LON": False},
                     
-                    size_max=15,
-                    zoom=5,
-                    mapbox_style="open-street-map",
-                    title="Monthly Fire Radiative Power Across Districts of Nepal (2012–2017)",
-                    color_continuous_scale="YlOrRd"
-                )
-                fig.update_layout(
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                    sliders=[{"currentvalue": {"prefix": "Month: "}}]
-                )
+                        size_max=15,
+                        zoom=5,
+                        mapbox_style="open-street-map",
+                        title="Monthly Fire Radiative Power Across Districts of Nepal (2012–2017)",
+                        color_continuous_scale="YlOrRd"
+                    )
+                    fig.update_layout(
+                        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                        sliders=[{"currentvalue": {"prefix": "Month: "}}]
+                    )
+                    return fig
+
+                fig = cached_figure("map_fire_frp", [COMBINED_DATA_PATH], build_fig)
                 st.plotly_chart(fig)
             elif fire_var == "Fire Risk":
                 st.markdown("### Monthly Fire Risk Variation")
@@ -443,52 +1001,156 @@ def interactive_map_page():
                 - **Zoom In/Out**: Zoom into areas using the map's zoom controls.
                 - **Full Screen**: Click on the full-screen button on the map for a larger view.
                 """)
-                district_risk = fire_data.groupby("DISTRICT").agg({
-                   "LAT": "mean",
-                   "LON": "mean",
-                   "Confidence": "mean",
-                   "FRP": "mean",
-                   "Fire_Count": "sum"
-                }).reset_index()
-
-            
-                district_risk['Fire_Risk'] = (district_risk['Confidence'] + district_risk['Fire_Count'] + district_risk['FRP']) / 3
+                def build_risk_table():
+                    district_risk = fire_data.groupby("DISTRICT").agg({
+                       "LAT": "mean",
+                       "LON": "mean",
+                       "Confidence": "mean",
+                       "FRP": "mean",
+                       "Fire_Count": "sum"
+                    }).reset_index()
 
-                district_risk['RiskLevel'] = pd.qcut(district_risk['Fire_Risk'], q=3, labels=['Low', 'Medium', 'High'])
+                    district_risk['Fire_Risk'] = (district_risk['Confidence'] + district_risk['Fire_Count'] + district_risk['FRP']) / 3
 
-                fig = px.scatter_mapbox(
-                    district_risk,      
-                    lat="LAT",
+                    district_risk['RiskLevel'] = pd.qcut(district_risk['Fire_Risk'], q=3, labels=['Low', 'Medium', 'High'])
+                    return district_risk
 
-                    lon="LON",
-                    size="Fire_Risk",
-                    color="RiskLevel",
-                    
-                    hover_name="DISTRICT",
-                    hover_data={"Fire_Risk": ":.2f", "LAT": False, "LON": False},
-                    size_max=15,
-                    zoom=5,
-                    mapbox_style="open-street-map",
-                    title="Monthly Fire Risk Across Districts of Nepal (2012–2017)",
-                    color_continuous_scale="YlGnBu",
-                    color_discrete_map={
-                     "Low": "#ff9999",
-                     "Medium": "#ff4d4d",
-                    "High": "#990000"
-                    }
-                )
+                def build_fig():
+                    district_risk = cached_derived("district_risk_table", [COMBINED_DATA_PATH], build_risk_table)
+                    fig = px.scatter_mapbox(
+                        district_risk,
+                        lat="LAT",
+                        lon="LON",
+                        size="Fire_Risk",
+                        color="RiskLevel",
+                        hover_name="DISTRICT",
+                        hover_data={"Fire_Risk": ":.2f", "LAT": False, "LON": False},
+                        size_max=15,
+                        zoom=5,
+                        mapbox_style="open-street-map",
+                        title="Monthly Fire Risk Across Districts of Nepal (2012–2017)",
+                        color_continuous_scale="YlGnBu",
+                        color_discrete_map={
+                         "Low": "#ff9999",
+                         "Medium": "#ff4d4d",
+                         "High": "#990000"
+                        }
+                    )
+                    fig.update_layout(
+                        margin={"r": 0, "t": 40, "l": 0, "b": 0},
+                    )
+                    return fig
 
-                fig.update_layout(
-                    margin={"r": 0, "t": 40, "l": 0, "b": 0},
-                    
-                )
+                # The risk levels and the figure are built once per version of the combined table
+                fig = cached_figure("map_fire_risk", [COMBINED_DATA_PATH], build_fig)
                 st.plotly_chart(fig, use_container_width=True)
+
+                risk_surface_section()
+
+            elif fire_var == "Fire Detection Heatmap":
+                st.markdown("### Fire Detection Heatmap (2012–2017)")
+                st.markdown("""
+                **📌 Map Features:**
+                - **Zoom In/Out**: Detections are grouped into hexagons that get finer as you zoom in (40 km down to 1 km).
+                - **Pan**: Only the hexagons around the current view are sent to the map.
+                """)
+                fire_heatmap_fragment()
     
     except FileNotFoundError:
         st.error("Data files not found. Please ensure the data is in the correct directory.")
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
+def risk_surface_section():
+    st.markdown("### Interpolated Risk Surface")
+    st.markdown(
+        "Every district scored at its climatological inputs for the month, with the engines selected on "
+        "the prediction page, and interpolated between district centres by inverse-distance weighting."
+    )
+    try:
+        models = {name: load_model(name) for name in MODEL_NAMES}
+    except Exception as e:
+        st.error(f"⚠️ Error loading models: {e}")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        month = st.selectbox("Month", range(1, 13), index=datetime.now().month - 1,
+                             format_func=lambda m: MONTH_NAMES[m - 1], key="risk_surface_month")
+    with col2:
+        output = st.radio("Surface", list(SURFACE_OUTPUTS), format_func=lambda o: SURFACE_OUTPUTS[o][0],
+                          horizontal=True, key="risk_surface_output")
+    risk_engine_name = st.session_state.get("pred_risk_engine", DEFAULT_RISK_ENGINE)
+    fire_engine_name = st.session_state.get("pred_fire_engine", DEFAULT_FIRE_ENGINE)
+
+    surface = risk_surface(month, output, models, risk_engine_name, fire_engine_name)
+    sources = engine_sources(risk_engine_name, fire_engine_name) + CLIMATE_SOURCES + district_reference_sources()
+    fig = cached_figure("map_risk_surface", sources, lambda: build_risk_surface_map(surface, output),
+                        params=(month, output, risk_engine_name, fire_engine_name, GRID_RESOLUTION, MASK_KM))
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(
+        f"{GRID_RESOLUTION}° grid clipped to {surface['mask']}. Engines: "
+        f"{RISK_ENGINE_LABELS[risk_engine_name]} / {FIRE_ENGINE_LABELS[fire_engine_name]}."
+    )
+
+@st.cache_resource
+def _load_heatmap_bins(fingerprint):
+    return read_bins()
+
+
+@st.cache_resource(max_entries=1)
+def _update_heatmap_bins(raw_fingerprints):
+    # Appended detections are folded into the stored bins
+    manifest, _ = update_bins()
+    return manifest
+
+
+def load_heatmap_bins():
+    # Pans and zooms only stat the raw files; update_bins runs again once one of them changes
+    raw_paths = sorted(glob.glob(MODIS_RAW_GLOB))
+    manifest = _update_heatmap_bins(tuple(file_fingerprint(path) for path in raw_paths))
+    return _load_heatmap_bins(file_fingerprint(os.path.join(HEATMAP_DIR, "bins.parquet"))), manifest
+
+
+def on_heatmap_move():
+    # The map's zoom and bounds, read before the fragment reruns so it sends the bins for the new view
+    returned = st.session_state.get("fire_heatmap") or {}
+    bounds = returned.get('bounds') or {}
+    if returned.get('zoom') is None or not bounds.get('_southWest'):
+        return
+    st.session_state.heatmap_view = {
+        'zoom': int(returned['zoom']),
+        'bounds': ((bounds['_southWest']['lat'], bounds['_southWest']['lng']),
+                   (bounds['_northEast']['lat'], bounds['_northEast']['lng'])),
+    }
+
+
+@fragment
+def fire_heatmap_fragment():
+    try:
+        bins, manifest = load_heatmap_bins()
+    except Exception as e:
+        st.error(f"⚠️ Error loading fire detections: {e}")
+        return
+
+    weight = st.radio("Weight by", list(WEIGHTS), format_func=WEIGHTS.get, horizontal=True, key="heatmap_weight")
+    # The last view reported by the map (on_heatmap_move); the map keeps its own zoom and position
+    view = st.session_state.setdefault("heatmap_view", {'zoom': DEFAULT_ZOOM, 'bounds': None})
+    km = level_for_zoom(view['zoom'])
+    shown = visible_bins(bins, view['zoom'], view['bounds'])
+    # Scaled by the whole level's maximum, so intensities do not change while panning
+    points = heat_points(shown, weight, scale=bins.loc[bins['KM'] == km, weight].max())
+
+    layer = folium.FeatureGroup(name="Fire detections")
+    heatmap_layer(points).add_to(layer)
+    fire_map = folium.Map(location=MAP_CENTER, zoom_start=DEFAULT_ZOOM, tiles="OpenStreetMap")
+    st_folium(fire_map, key="fire_heatmap", feature_group_to_add=layer, returned_objects=["zoom", "bounds"],
+              on_change=on_heatmap_move, height=550, use_container_width=True)
+    st.caption(
+        f"Zoom {view['zoom']}: {len(shown):,} hexagons of {km} km ({payload_bytes(points) / 1024:.1f} KB) "
+        f"from {manifest['detections']:,} detections."
+    )
+
 # Data Visualization Page
 def data_visualization_page():
     st.title("📊 Data Visualization")
@@ -497,6 +1159,7 @@ def data_visualization_page():
     ### Exploring Forest Fire Trends
     
     Dive deep into our comprehensive visualizations of climate patterns and fire occurrences across Nepal from 2012-2017.
+    Climate charts follow the year range selected in the sidebar.
     """)
     
     
@@ -508,6 +1171,7 @@ def data_visualization_page():
     ], horizontal=True)
     
     if viz_category == "Climate Analysis":
+        year_range = get_year_range()
     
         viz_type = st.radio("Select Visualization Type", [
             "Heatmap View", 
@@ -525,17 +1189,22 @@ def data_visualization_page():
             
            
             def create_climate_heatmap(param_name, df_filtered, value_col, cmap='coolwarm', title_prefix="Monthly Average"):
-                st.markdown(f"### {title_prefix} {param_name} Heatmap (2012-2017)")
+                st.markdown(f"### {title_prefix} {param_name} Heatmap ({period_label(year_range)})")
                 st.markdown(f"This heatmap shows the average {param_name.lower()} patterns across months and years, highlighting seasonal variations.")
                 
                 try:
                    
-                    pivot_df = df_filtered.pivot_table(index='MONTH', columns='YEAR', values=value_col)
+                    pivot_df = cached_derived(
+                        "climate_pivot", CLIMATE_SOURCES,
+                        lambda: df_filtered.pivot_table(index='MONTH', columns='YEAR', values=value_col),
+                        params=(value_col, year_range)
+                    )
                     
-                   
-                    fig, ax = plt.subplots(figsize=(12, 6))
-                    sns.heatmap(pivot_df, annot=True, cmap=cmap, fmt='.1f', ax=ax)
-                    plt.title(f'{title_prefix} {param_name} Heatmap (2012-2017)')
+                    # Annotations stay readable up to about a dozen years
+                    n_years = pivot_df.shape[1]
+                    fig, ax = plt.subplots(figsize=(max(12, n_years * 0.5), 6))
+                    sns.heatmap(pivot_df, annot=n_years <= 12, cmap=cmap, fmt='.1f', ax=ax)
+                    plt.title(f'{title_prefix} {param_name} Heatmap ({period_label(year_range)})')
                     plt.xlabel('Year')
                     plt.ylabel('Month')
                     
@@ -582,8 +1251,7 @@ def data_visualization_page():
             
             # Load the data once
             try:
-                file_path = "data/processed/flitered_climate_data.csv"
-                df_filtered = pd.read_csv(file_path)
+                df_filtered = load_climate_data(year_range)
                 
                 # 
                 param_mapping = {
@@ -615,7 +1283,7 @@ def data_visualization_page():
             
             
             def create_climate_distribution(param_name, df_filtered, value_col, color_scheme='viridis'):
-                st.markdown(f"### Monthly {param_name} Distribution (2012-2017)")
+                st.markdown(f"### Monthly {param_name} Distribution ({period_label(year_range)})")
                 st.markdown(f"This box plot shows the distribution of {param_name.lower()} values across different months, highlighting seasonal variations and outliers.")
                 
                 try:
@@ -624,7 +1292,7 @@ def data_visualization_page():
                              x='MONTH', 
                              y=value_col,
                              color='MONTH',
-                             title=f'Monthly {param_name} Distribution (2012-2017)',
+                             title=f'Monthly {param_name} Distribution ({period_label(year_range)})',
                              labels={'MONTH': 'Month', value_col: f'{param_name} {get_unit(param_name)}'})
                     
                     fig.update_layout(xaxis={'tickvals': list(range(1,13)),
@@ -683,8 +1351,7 @@ def data_visualization_page():
             
             # Load the data
             try:
-                file_path = "data/processed/flitered_climate_data.csv"
-                df_filtered = pd.read_csv(file_path)
+                df_filtered = load_climate_data(year_range)
                 
               
                 param_mapping = {
@@ -709,7 +1376,8 @@ def data_visualization_page():
             "Top Fire-Prone Districts",
             "Annual Fire Count",
             "Average Monthly Fire Occurrence",
-            "Monthly Fire Count Trend"
+            "Monthly Fire Count Trend",
+            "Fire Events vs Detections"
         ])
         
         if fire_viz_type == "Top Fire-Prone Districts":
@@ -717,12 +1385,14 @@ def data_visualization_page():
             st.markdown("This bar chart shows the districts with the highest number of forest fires over the 5-year period.")
             
             try:
-                file_path = "data/processed/combined_fire_climate.csv"
-                df_fire_filtered = pd.read_csv(file_path)
+                df_fire_filtered = load_dataset(COMBINED_DATA_PATH)
                 
                 
                 fig, ax = plt.subplots(figsize=(14, 7))
-                district_fires = df_fire_filtered.groupby('DISTRICT')['Fire_Count'].sum().sort_values(ascending=False)[:15]
+                district_fires = cached_derived(
+                    "top_fire_districts", [COMBINED_DATA_PATH],
+                    lambda: df_fire_filtered.groupby('DISTRICT')['Fire_Count'].sum().sort_values(ascending=False)[:15]
+                )
                 sns.barplot(x=district_fires.values, y=district_fires.index, palette='Reds_r', ax=ax)
                 plt.title('Top 15 Fire-Prone Districts (2012-2017)')
                 plt.xlabel('Total Fire Count')
@@ -747,11 +1417,13 @@ def data_visualization_page():
             
             try:
                 
-                file_path = "data/processed/combined_fire_climate.csv"
-                df_fire_filtered = pd.read_csv(file_path)
+                df_fire_filtered = load_dataset(COMBINED_DATA_PATH)
                 
                 # Aggregate fire counts by year
-                annual_fire_counts = df_fire_filtered.groupby('YEAR', as_index=False)['Fire_Count'].sum()
+                annual_fire_counts = cached_derived(
+                    "annual_fire_counts", [COMBINED_DATA_PATH],
+                    lambda: df_fire_filtered.groupby('YEAR', as_index=False)['Fire_Count'].sum()
+                )
                 
                 # Create the bar chart
                 fig_annual = px.bar(
@@ -788,11 +1460,13 @@ def data_visualization_page():
             st.markdown("This line chart shows the average number of fires by month, highlighting seasonal fire patterns.")
             
             try:
-                file_path = "data/processed/combined_fire_climate.csv"
-                df_fire_filtered = pd.read_csv(file_path)
+                df_fire_filtered = load_dataset(COMBINED_DATA_PATH)
                 
                 # Calculate average fire counts by month
-                monthly_avg_fire = df_fire_filtered.groupby('MONTH', as_index=False)['Fire_Count'].mean()
+                monthly_avg_fire = cached_derived(
+                    "monthly_avg_fire", [COMBINED_DATA_PATH],
+                    lambda: df_fire_filtered.groupby('MONTH', as_index=False)['Fire_Count'].mean()
+                )
                 
                 # Define month names for better readability
                 month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
@@ -834,11 +1508,13 @@ def data_visualization_page():
             st.markdown("This line chart shows the detailed monthly trend of forest fires over the entire period.")
             
             try:
-                file_path = "data/processed/combined_fire_climate.csv"
-                df_fire_filtered = pd.read_csv(file_path)
+                df_fire_filtered = load_dataset(COMBINED_DATA_PATH)
                 
                 # Aggregate fire counts by year and month
-                monthly_fire_counts = df_fire_filtered.groupby(['YEAR', 'MONTH'], as_index=False)['Fire_Count'].sum()
+                monthly_fire_counts = cached_derived(
+                    "monthly_fire_counts", [COMBINED_DATA_PATH],
+                    lambda: df_fire_filtered.groupby(['YEAR', 'MONTH'], as_index=False)['Fire_Count'].sum()
+                )
                 
                 # Create a 'Date' column for plotting
                 monthly_fire_counts['Date'] = pd.to_datetime(monthly_fire_counts[['YEAR', 'MONTH']].assign(DAY=1))
@@ -875,6 +1551,59 @@ def data_visualization_page():
                 """)
             except Exception as e:
                 st.error(f"Error loading monthly fire count trend chart: {e}")
+
+        elif fire_viz_type == "Fire Events vs Detections":
+            st.markdown("### Fire Events vs Satellite Detections (2012-2017)")
+            st.markdown(
+                f"Fire_Count counts MODIS detections, so one large fire burning for days counts many times. "
+                f"Here detections within {EVENT_KM:g} km and {EVENT_GAP_DAYS:g} days of each other are grouped "
+                f"into fire events, each counted once in the district and month where it started."
+            )
+
+            try:
+                events, monthly_events = load_fire_events()
+                df_fire_filtered = load_dataset(COMBINED_DATA_PATH)
+
+                def build_monthly():
+                    with_events = attach_event_aggregates(df_fire_filtered, monthly_events)
+                    return with_events.groupby(['YEAR', 'MONTH'], as_index=False)[['Fire_Count', 'Fire_Events']].sum()
+
+                monthly = cached_derived("monthly_fire_events", [COMBINED_DATA_PATH] + fire_event_sources(),
+                                         build_monthly)
+                monthly['Date'] = pd.to_datetime(monthly[['YEAR', 'MONTH']].assign(DAY=1))
+
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Detections", f"{int(events['DETECTIONS'].sum()):,}")
+                col2.metric("Fire Events", f"{len(events):,}")
+                col3.metric("Multi-day Events", f"{int((events['DURATION_DAYS'] > 1).sum()):,}")
+                col4.metric("Cross District Lines", f"{int((events['DISTRICTS'] > 1).sum()):,}")
+
+                fig = px.line(
+                    monthly.melt(id_vars='Date', value_vars=['Fire_Count', 'Fire_Events'],
+                                 var_name='Measure', value_name='Count'),
+                    x='Date',
+                    y='Count',
+                    color='Measure',
+                    title='Monthly Detections and Fire Events in Nepal (2012–2017)',
+                    color_discrete_map={'Fire_Count': 'firebrick', 'Fire_Events': 'darkorange'},
+                    markers=True
+                )
+                fig.update_layout(hovermode='x unified', template='plotly_white')
+                st.plotly_chart(fig)
+
+                st.markdown("#### Largest Fire Events by Total FRP")
+                largest = events.nlargest(10, 'TOTAL_FRP')
+                st.dataframe(pd.DataFrame({
+                    'Start': largest['START'].dt.strftime('%Y-%m-%d'),
+                    'District': largest['DISTRICT'].str.title(),
+                    'Days': largest['DURATION_DAYS'],
+                    'Detections': largest['DETECTIONS'],
+                    'Districts': largest['DISTRICTS'],
+                    'Extent (km)': largest['EXTENT_KM'].round(1),
+                    'Total FRP (MW)': largest['TOTAL_FRP'].round(1),
+                }), hide_index=True)
+            except Exception as e:
+                st.error(f"Error loading fire events: {e}")
     
     elif viz_category == "Climate-Fire Relationships":
         climate_fire_viz_type = st.selectbox("Select Climate-Fire Visualization", [
@@ -884,34 +1613,49 @@ def data_visualization_page():
         ])
         
         try:
-            file_path = "data/processed/combined_fire_climate.csv"
-            df = pd.read_csv(file_path)
+            df = load_dataset(COMBINED_DATA_PATH)
             
             if climate_fire_viz_type == "Correlation Heatmap":
                 st.markdown("### Correlation Between Climate Variables and Fire Metrics")
                 st.markdown("This heatmap shows the correlations between different climate variables and fire metrics.")
                 
-                # Select relevant columns
-                fire_climate_vars = ['Prep', 'AvgTemp', 'MaxTemp', 'Humidity', 'WindSpeed',
-                                   'Brightness', 'Confidence', 'FRP', 'Fire_Count']
-                
-                
+                # Correlations come from the stored partition moments, no rescan of the rows
+                moments = load_correlation_moments()
+                all_years = sorted(moments.keys['YEAR'].unique())
+                all_districts = sorted(moments.keys['DISTRICT'].unique())
+
+                filter_col1, filter_col2 = st.columns(2)
+                with filter_col1:
+                    year_range = st.select_slider("Years", options=all_years, value=(all_years[0], all_years[-1]))
+                with filter_col2:
+                    selected_districts = st.multiselect("Districts (all if empty)", all_districts)
+
+                years = range(year_range[0], year_range[1] + 1)
+                merged = moments.merged(years, selected_districts or None)
+                corr = pd.DataFrame(merged.correlation(), index=moments.columns, columns=moments.columns)
+                n_rows = int(merged.n)
+                st.caption(f"Based on {n_rows} district-months")
+
                 fig, ax = plt.subplots(figsize=(12, 8))
-                sns.heatmap(df[fire_climate_vars].corr()[['Fire_Count', 'Confidence']].sort_values(by='Fire_Count', ascending=False),
+                sns.heatmap(corr[['Fire_Count', 'Confidence']].sort_values(by='Fire_Count', ascending=False),
                           annot=True, cmap='RdYlGn', vmin=-1, vmax=1, center=0)
                 plt.title('Correlation Between Climate Variables and Fire Metrics')
                 
             
                 st.pyplot(fig)
-                
-                st.markdown("""
+
+                # Quoted numbers are read from the same matrix so they never go stale
+                def r(a, b):
+                    return corr.loc[a, b]
+
+                st.markdown(f"""
                 **Key Insights from Correlation Heatmap:**
-                - Fire_Count and FRP (Fire Radiative Power) are highly correlated (0.9)
-                - Humidity has a notable negative correlation (-0.28) with Fire_Count and (-0.49) with Confidence
-                - Brightness and Confidence are very strongly correlated (0.97), indicating that brighter fires are detected with higher confidence
-                - Wind speed shows a weak positive correlation (0.22) with fire count
-                - Temperature metrics (AvgTemp, MaxTemp) show weak positive correlations with fire occurrence
-                - Precipitation shows negative correlations with both fire metrics, confirming that wetter conditions reduce fire probability
+                - Fire_Count and FRP (Fire Radiative Power) show a {describe_correlation(r('Fire_Count', 'FRP'))} correlation ({r('Fire_Count', 'FRP'):.2f})
+                - Humidity has a {describe_correlation(r('Humidity', 'Fire_Count'))} correlation ({r('Humidity', 'Fire_Count'):.2f}) with Fire_Count and a {describe_correlation(r('Humidity', 'Confidence'))} one ({r('Humidity', 'Confidence'):.2f}) with Confidence
+                - Brightness and Confidence show a {describe_correlation(r('Brightness', 'Confidence'))} correlation ({r('Brightness', 'Confidence'):.2f}), indicating how strongly brighter fires are detected with higher confidence
+                - Wind speed shows a {describe_correlation(r('WindSpeed', 'Fire_Count'))} correlation ({r('WindSpeed', 'Fire_Count'):.2f}) with fire count
+                - Temperature metrics show {describe_correlation(r('AvgTemp', 'Fire_Count'))} (AvgTemp, {r('AvgTemp', 'Fire_Count'):.2f}) and {describe_correlation(r('MaxTemp', 'Fire_Count'))} (MaxTemp, {r('MaxTemp', 'Fire_Count'):.2f}) correlations with fire occurrence
+                - Precipitation shows {describe_correlation(r('Prep', 'Fire_Count'))} ({r('Prep', 'Fire_Count'):.2f}) and {describe_correlation(r('Prep', 'Confidence'))} ({r('Prep', 'Confidence'):.2f}) correlations with Fire_Count and Confidence
                 """)
                 
             elif climate_fire_viz_type == "Climate Parameters vs Fire Metrics":
@@ -943,27 +1687,49 @@ def data_visualization_page():
                 
             elif climate_fire_viz_type == "Fire Probability by Temperature and Humidity":
                 st.markdown("### Fire Probability Based on Temperature and Humidity")
-                st.markdown("This heatmap shows how the probability of fire occurrence varies with different combinations of temperature and humidity.")
-                
-                # Create bins for climate variables
-                df['Temp_bin'] = pd.cut(df['AvgTemp'], bins=5)
-                df['Humidity_bin'] = pd.cut(df['Humidity'], bins=5)
-                
-                # Calculate fire probability
-                prob_table = df.groupby(['Temp_bin', 'Humidity_bin'])['Fire_Count'].apply(
-                    lambda x: (x > 0).mean()).unstack()
-                
+                st.markdown("This heatmap shows how the probability of fire occurrence varies with different combinations of temperature and humidity. Pick any other pair of climate variables and bin counts to explore further.")
+                
+                # Any pair of climate variables can be explored; the default is the original view
+                pair_col1, pair_col2, pair_col3 = st.columns(3)
+                with pair_col1:
+                    y_var = st.selectbox("Rows", CLIMATE_VARIABLES, index=CLIMATE_VARIABLES.index('AvgTemp'),
+                                         format_func=VARIABLE_LABELS.get)
+                    y_bins = st.slider("Row bins", min_value=2, max_value=20, value=5)
+                with pair_col2:
+                    x_var = st.selectbox("Columns", CLIMATE_VARIABLES, index=CLIMATE_VARIABLES.index('Humidity'),
+                                         format_func=VARIABLE_LABELS.get)
+                    x_bins = st.slider("Column bins", min_value=2, max_value=20, value=5)
+                with pair_col3:
+                    statistic = st.radio("Statistic", ["Fire probability", "Sample count", "Mean FRP"])
+
+                if x_var == y_var:
+                    st.warning("Please select two different climate variables.")
+                    return
+
+                # One vectorized pass per (pair, bins, data version), shared across workers
+                tables = cached_derived(
+                    "conditional_fire_table", [COMBINED_DATA_PATH],
+                    lambda: conditional_fire_table(df, x_var, y_var, x_bins, y_bins),
+                    params=(x_var, y_var, x_bins, y_bins)
+                )
+                table_key, fmt, cmap = {
+                    "Fire probability": ('probability', ".0%", "YlOrRd"),
+                    "Sample count": ('count', ".0f", "Greys"),
+                    "Mean FRP": ('mean_frp', ".0f", "OrRd"),
+                }[statistic]
+
                 # Create heatmap
-                fig, ax = plt.subplots(figsize=(10, 8))
-                sns.heatmap(prob_table, annot=True, fmt=".0%", cmap="YlOrRd")
-                plt.title('Probability of Fire Occurrence by Temperature and Humidity')
-                plt.xlabel('Humidity Range')
-                plt.ylabel('Temperature Range')
+                fig, ax = plt.subplots(figsize=(max(10, x_bins), max(8, y_bins * 0.6)))
+                sns.heatmap(tables[table_key], annot=max(x_bins, y_bins) <= 10, fmt=fmt, cmap=cmap, ax=ax)
+                plt.title(f'{statistic} by {VARIABLE_LABELS[y_var]} and {VARIABLE_LABELS[x_var]}')
+                plt.xlabel(f'{VARIABLE_LABELS[x_var]} Range')
+                plt.ylabel(f'{VARIABLE_LABELS[y_var]} Range')
                 
                 # Display in Streamlit
                 st.pyplot(fig)
                 
-                st.markdown("""
+                if statistic == "Fire probability" and (x_var, y_var, x_bins, y_bins) == ('Humidity', 'AvgTemp', 5, 5):
+                    st.markdown("""
                 **Key Insights from Fire Probability Heatmap:**
                 - This heatmap clearly demonstrates how fire probability increases with:
                   1. Higher temperatures (moving down the y-axis)
@@ -982,8 +1748,7 @@ def data_visualization_page():
         st.markdown("This interactive visualization allows you to explore fire trends for specific districts in Nepal.")
         
         try:
-            file_path = "data/processed/combined_fire_climate.csv"
-            df = pd.read_csv(file_path)
+            df = load_dataset(COMBINED_DATA_PATH)
             df['MONTH_YEAR'] = df['MONTH'].apply(lambda x: f"{x:02d}") + '-' + df['YEAR'].astype(str)
             districts = sorted(df['DISTRICT'].unique())
             
@@ -1076,450 +1841,898 @@ def data_visualization_page():
 
 
 
+MONTH_NAMES = ["January", "February", "March", "April", "May", "June",
+               "July", "August", "September", "October", "November", "December"]
+
+
 def model_prediction_page():
     # Page header with styled title and description
     st.markdown("<h1 class='main-header'>🔥 Forest Fire Risk Prediction</h1>", unsafe_allow_html=True)
     st.markdown("""
     <div style='background-color: rgba(255, 235, 205, 0.7); padding: 15px; border-radius: 10px; margin-bottom: 20px;'>
         <p style='font-size: 16px; margin-bottom: 0;'>
-            This tool helps predict forest fire risk based on climate parameters and location data. 
+            This tool helps predict forest fire risk based on climate parameters and location data.
             Enter the required information below to get a risk assessment.
         </p>
     </div>
     """, unsafe_allow_html=True)
-    
-    model_dir = os.path.join("models")
+
     try:
         # Load models and encoders
-        risk_model = joblib.load(os.path.join(model_dir, 'risk_model.pkl'))
-        fire_model = joblib.load(os.path.join(model_dir, 'fire_model.pkl'))
-        scaler = joblib.load(os.path.join(model_dir, 'scaler.pkl'))
-        district_encoder = joblib.load(os.path.join(model_dir, 'district_encoder.pkl'))
+        models = {name: load_model(name) for name in MODEL_NAMES}
     except Exception as e:
         st.error(f"⚠️ Error loading models: {e}")
         return
-    
-    # Load combined dataset to extract district and coordinates
+
+    # District names, coordinates and pre-rendered location maps
     try:
-        combined_df = pd.read_csv("data/processed/combined_fire_climate.csv")
+        gazetteer, district_maps = load_district_reference()
     except Exception as e:
         st.error(f"⚠️ Error loading combined dataset: {e}")
         return
 
-    # Preprocess district column
-    combined_df['DISTRICT'] = combined_df['DISTRICT'].str.lower().str.strip()
-    district_list = sorted(combined_df['DISTRICT'].unique())
-    
+    # District x month climatology for default inputs and anomalies
+    try:
+        climatology = load_climatology()
+    except Exception as e:
+        st.error(f"⚠️ Error loading climate archive: {e}")
+        return
+
+    # Each section is its own fragment, so a widget change only reruns the
+    # section that owns it. Sections talk to each other through session_state.
+    prediction_location_fragment(gazetteer, district_maps, climatology)
+    prediction_inputs_fragment(climatology)
+    prediction_results_fragment(models)
+    prediction_outlook_fragment()
+    prediction_sensitivity_fragment(models)
+    prediction_scenarios_fragment(models)
+
+
+# Session-state keys of the climate inputs and the decimals each one shows
+CLIMATE_INPUT_KEYS = {
+    'Prep': ("pred_prep", 1),
+    'AvgTemp': ("pred_avg_temp", 2),
+    'MaxTemp': ("pred_max_temp", 2),
+    'Humidity': ("pred_humidity", 0),
+    'WindSpeed': ("pred_wind_speed", 2),
+}
+
+# Below the coldest district-month of the 1981-2019 archive (AvgTemp -17.8 °C), so defaults are never clamped
+TEMPERATURE_MIN = -40.0
+
+# Used when a district has no climatology
+FALLBACK_INPUTS = {'Prep': 26.7, 'AvgTemp': 27.43, 'MaxTemp': 34.93, 'Humidity': 30, 'WindSpeed': 2.86}
+
+
+def apply_climatology_defaults(climatology):
+    # Callback for the district selectbox and month slider
+    district = st.session_state.get("pred_district")
+    month = st.session_state.get("pred_month", datetime.now().month)
+    defaults = (climatology.defaults(district, month) if district else None) or FALLBACK_INPUTS
+    for var, (key, digits) in CLIMATE_INPUT_KEYS.items():
+        value = round(float(defaults[var]), digits)
+        st.session_state[key] = int(value) if digits == 0 else value
+    st.session_state.setdefault("pred_soil_moisture", 15)
+    st.session_state["pred_defaults_for"] = (district, month)
+
+
+def on_district_change(climatology):
+    apply_climatology_defaults(climatology)
+    st.session_state["pred_refresh_inputs"] = True
+
+
+@fragment
+def prediction_location_fragment(gazetteer, district_maps, climatology):
     # --- User Input ---
     st.subheader("📍 Select Location")
-    
+
     # Select District from dropdown with search
     district = st.selectbox(
-        "Select District", 
-        district_list,
+        "Select District",
+        gazetteer.located_names(),
+        key="pred_district",
+        on_change=on_district_change,
+        args=(climatology,),
         help="Choose the district for which you want to predict fire risk"
     )
-        
-    # Automatically retrieve lat/lon from data
-    try:
-        lat_lon_row = combined_df[combined_df['DISTRICT'] == district][['LAT', 'LON']].dropna().iloc[0]
-        lat = lat_lon_row['LAT']
-        lon = lat_lon_row['LON']
-        
-        # Display custom map with pin emoji instead of default red dot
-        import folium
-        from streamlit_folium import folium_static
-        
-        # Create a folium map centered at the district's coordinates
-        m = folium.Map(location=[lat, lon], zoom_start=8)
-        
-        # Add a marker with custom icon (pin emoji)
-        folium.Marker(
-            location=[lat, lon],
-            popup=district.title(),
-            icon=folium.DivIcon(
-                icon_size=(150, 36),
-                icon_anchor=(12, 36),
-                html=f'<div style="font-size: 24px;">📍</div>',
-            )
-        ).add_to(m)
-        
-        # Display the map
-        folium_static(m)
-        
-        st.markdown(f"""
-        <div style='margin-top: 10px; padding: 10px; background-color:transparent; border-radius: 5px;'>
-            <b>Coordinates:</b> Lat: {lat:.4f}, Lon: {lon:.4f}
-        </div>
-        """, unsafe_allow_html=True)
-        
-    except IndexError:
+    unlocated = gazetteer.unlocated_names()
+    if unlocated:
+        st.caption(
+            f"Predictions and location maps cover the {len(gazetteer.located_names())} districts in the climate "
+            f"archive, out of {len(gazetteer)} in the fire detections. No climate data for "
+            f"{', '.join(n.title() for n in unlocated)}."
+        )
+
+    # New district -> new climatology defaults, which live in the inputs fragment
+    if st.session_state.pop("pred_refresh_inputs", False):
+        st.rerun()
+
+    # Coordinates come straight from the gazetteer
+    record = gazetteer.lookup(district)
+    if record is None or record['lat'] is None:
+        st.session_state.pop("pred_location", None)
         st.error("❌ Latitude and Longitude not found for selected district.")
         return
-    except Exception as e:
-        st.error(f"Error loading map: {e}")
-        # Fallback to text-only location
-        try:
-            lat_lon_row = combined_df[combined_df['DISTRICT'] == district][['LAT', 'LON']].dropna().iloc[0]
-            lat = lat_lon_row['LAT']
-            lon = lat_lon_row['LON']
-            
-            st.markdown(f"""
-            <div style='margin-top: 10px; padding: 10px; background-color: transparent; border-radius: 5px;'>
-                <b>Selected District:</b> {district.title()}<br>
-                <b>Coordinates:</b> Lat: {lat:.4f}, Lon: {lon:.4f}
-            </div>
-            """, unsafe_allow_html=True)
-            
-        except IndexError:
-            st.error("❌ Latitude and Longitude not found for selected district.")
-            return
+    lat, lon = record['lat'], record['lon']
+    st.session_state["pred_location"] = (district, lat, lon)
+
+    # Display the pre-rendered map with pin emoji instead of default red dot
+    components.html(district_maps[district], height=510, width=700)
+
+    province = f"<br><b>Province:</b> {record['province']}" if record['province'] else ""
+    st.markdown(f"""
+    <div style='margin-top: 10px; padding: 10px; background-color:transparent; border-radius: 5px;'>
+        <b>Coordinates:</b> Lat: {lat:.4f}, Lon: {lon:.4f}{province}
+    </div>
+    """, unsafe_allow_html=True)
+
+    with st.expander("🧭 Neighbouring districts"):
+        radius = st.slider("Within (km)", 25, 200, 75, 25, key="pred_neighbour_radius",
+                           help="Distance between district centroids")
+        index = load_district_index()
+        nearby = index.within(lat, lon, radius)
+        nearby = nearby[nearby['DISTRICT'] != district]
+        if nearby.empty:
+            st.caption(f"No district centroid within {radius} km; the nearest ones are:")
+            nearby = index.nearest(lat, lon, k=3, exclude=district)
+        st.dataframe(pd.DataFrame({
+            'District': nearby['DISTRICT'].str.title(),
+            'Distance (km)': nearby['KM'].round(1),
+            'Province': [gazetteer.province(name) or "" for name in nearby['DISTRICT']],
+        }), use_container_width=True, hide_index=True)
+
+
+@fragment
+def prediction_inputs_fragment(climatology):
+    district = st.session_state.get("pred_district")
+
+    # Seed the inputs from the climatology the first time the page is shown
+    if "pred_defaults_for" not in st.session_state:
+        st.session_state.setdefault("pred_month", datetime.now().month)
+        apply_climatology_defaults(climatology)
 
     # --- Climate Parameters ---
     st.subheader("🌡️ Climate Parameters")
-    
+
     with st.container():
         st.markdown("""
         <div style='background-color: transparent; padding: 15px; border-radius: 10px; border-left: 5px solid #FF5733;'>
         """, unsafe_allow_html=True)
-        
+
         # Date-based inputs
-        current_month = datetime.now().month
         date_col1, date_col2 = st.columns([3, 1])
-        
+
         with date_col1:
             month = st.slider(
-                "Month", 
-                min_value=1, 
-                max_value=12, 
-                value=current_month,
+                "Month",
+                min_value=1,
+                max_value=12,
                 format="%d",
+                key="pred_month",
+                on_change=apply_climatology_defaults,
+                args=(climatology,),
                 help="Select the month for prediction (1-12)"
             )
-            
+
             # Month name display
-            month_names = ["January", "February", "March", "April", "May", "June", 
-                         "July", "August", "September", "October", "November", "December"]
             st.markdown(f"""
             <div style='text-align: center; margin-bottom: 15px;'>
-                <span style='font-weight: bold; color: #FF5733;'>{month_names[month-1]}</span>
+                <span style='font-weight: bold; color: #FF5733;'>{MONTH_NAMES[month-1]}</span>
             </div>
             """, unsafe_allow_html=True)
-        
+
         with date_col2:
-            use_current_data = st.checkbox("Use current weather data", value=False, 
+            use_current_data = st.checkbox("Use current weather data", value=False,
+                                         key="pred_use_current",
                                          help="Fetch latest weather data for the selected location")
-        
+
         # Two columns for climate parameters
         param_col1, param_col2 = st.columns(2)
-        
+
         with param_col1:
             prep = st.number_input(
-                "Precipitation (mm)", 
-                min_value=0.0, 
-                value=26.7,
+                "Precipitation (mm)",
+                min_value=0.0,
                 format="%.1f",
+                key="pred_prep",
                 help="Average precipitation in millimeters",
                 disabled=use_current_data
             )
-            
+
             avg_temp = st.number_input(
-                "Average Temperature (°C)", 
-                min_value=-10.0, 
-                value=27.43,
+                "Average Temperature (°C)",
+                min_value=TEMPERATURE_MIN,
                 format="%.2f",
+                key="pred_avg_temp",
                 help="Average temperature in degrees Celsius",
                 disabled=use_current_data
             )
-            
+
             # Make humidity consistent with other inputs
             humidity = st.number_input(
-                "Humidity (%)", 
-                min_value=0, 
-                max_value=100, 
-                value=30,
+                "Humidity (%)",
+                min_value=0,
+                max_value=100,
                 format="%d",
+                key="pred_humidity",
                 help="Relative humidity percentage",
                 disabled=use_current_data
             )
-        
+
         with param_col2:
             max_temp = st.number_input(
-                "Max Temperature (°C)", 
-                min_value=-10.0, 
-                value=34.93,
+                "Max Temperature (°C)",
+                min_value=TEMPERATURE_MIN,
                 format="%.2f",
+                key="pred_max_temp",
                 help="Maximum temperature in degrees Celsius",
                 disabled=use_current_data
             )
-            
+
             wind_speed = st.number_input(
-                "Wind Speed (m/s)", 
-                min_value=0.0, 
-                value=2.86,
+                "Wind Speed (m/s)",
+                min_value=0.0,
                 format="%.2f",
+                key="pred_wind_speed",
                 help="Wind speed in meters per second",
                 disabled=use_current_data
             )
-            
+
             # Empty slot to balance the layout or add another parameter
             soil_moisture = st.number_input(
-                "Soil Moisture (%)", 
-                min_value=0, 
-                max_value=100, 
-                value=15,
+                "Soil Moisture (%)",
+                min_value=0,
+                max_value=100,
                 format="%d",
+                key="pred_soil_moisture",
                 help="Soil moisture percentage (optional)",
                 disabled=use_current_data
             )
-        
+
         st.markdown("</div>", unsafe_allow_html=True)
-        
+
         # Fetch weather data if checkbox is checked
         if use_current_data:
             with st.spinner("Fetching current weather data..."):
-                # This would be replaced with actual API call in production
-                time.sleep(1)  # Simulate API call
-                
-                st.success("✅ Weather data fetched successfully!")
-                st.info("Using real-time weather data for prediction")
-                
-                # In a real implementation, these values would come from the API
-                prep = 10.2
-                avg_temp = 28.5
-                max_temp = 35.3
-                humidity = 45
-                wind_speed = 3.2
-    
-    # Add notes field
-    notes = st.text_area("📝 Notes (optional)", 
-                        placeholder="Add any additional context or observations...",
-                        help="Enter any relevant notes about this prediction")
-    
+                weather = fetch_current_weather(district, month) if district else None
+
+            if weather is None:
+                st.warning("⚠️ No location selected; using the values above")
+            else:
+                if weather["source"] == "climatology":
+                    st.warning("⚠️ Weather service unavailable; using the climatology for this district and month")
+                else:
+                    st.success("✅ Weather data fetched successfully!")
+                    st.info("Using real-time weather data for prediction")
+
+                current = {**FALLBACK_INPUTS, **weather["values"]}
+                prep = round(float(current['Prep']), 1)
+                avg_temp = round(float(current['AvgTemp']), 2)
+                max_temp = round(float(current['MaxTemp']), 2)
+                humidity = int(round(float(current['Humidity'])))
+                wind_speed = round(float(current['WindSpeed']), 2)
+
+    values = {
+        'Prep': prep,
+        'AvgTemp': avg_temp,
+        'MaxTemp': max_temp,
+        'Humidity': humidity,
+        'WindSpeed': wind_speed,
+    }
+
+    # Anomalies of the current inputs relative to the district-month climatology
+    anomalies = climatology.anomalies(district, month, values) if district else {}
+    if anomalies:
+        first_year, last_year = climatology.period
+        st.caption(
+            f"Defaults are the {first_year}-{last_year} climatology for {district.title()} in "
+            f"{MONTH_NAMES[month-1]}. Deltas show how far the inputs are from it (z = standard deviations)."
+        )
+        anomaly_cols = st.columns(len(values))
+        for col, (var, value) in zip(anomaly_cols, values.items()):
+            anomaly = anomalies[var]
+            col.metric(
+                VARIABLE_LABELS[var],
+                f"{value:.1f}",
+                delta=f"{anomaly['delta']:+.1f} (z {anomaly['z']:+.1f})",
+                delta_color="off"
+            )
+
+    # Picked up by the results fragment when "Predict Fire Risk" is clicked
+    st.session_state["pred_inputs"] = {
+        'MONTH': month,
+        **values,
+        'anomaly_z': {var: anomaly['z'] for var, anomaly in anomalies.items()},
+    }
+
+
+@fragment
+def prediction_results_fragment(models):
     # Predict button with styling
     predict_col1, predict_col2, predict_col3 = st.columns([1, 2, 1])
+    with predict_col1:
+        engine_name = st.radio(
+            "Risk engine",
+            list(RISK_ENGINE_LABELS),
+            index=list(RISK_ENGINE_LABELS).index(DEFAULT_RISK_ENGINE),
+            format_func=RISK_ENGINE_LABELS.get,
+            key="pred_risk_engine",
+            help="The closed-form formula is the exact training target of risk_model and needs no model file"
+        )
+        fire_engine_name = st.radio(
+            "Fire model",
+            list(FIRE_ENGINE_LABELS),
+            index=list(FIRE_ENGINE_LABELS).index(DEFAULT_FIRE_ENGINE),
+            format_func=FIRE_ENGINE_LABELS.get,
+            key="pred_fire_engine",
+            help="The compact model is distilled from fire_model (python -m src.distill) and much faster to load and run"
+        )
     with predict_col2:
         predict_button = st.button(
-            "🔮 Predict Fire Risk", 
+            "🔮 Predict Fire Risk",
             use_container_width=True,
             help="Click to calculate fire risk based on input parameters"
         )
-    
-    # Show a divider before results
+
     if predict_button:
-        st.markdown("<hr style='margin: 30px 0; border: none; height: 1px; background-color: #ddd;'>", unsafe_allow_html=True)
-        
+        if "pred_location" not in st.session_state:
+            st.error("❌ Latitude and Longitude not found for selected district.")
+            return
+
+        district, lat, lon = st.session_state["pred_location"]
+        inputs = st.session_state["pred_inputs"]
+
         # Construct input data
         input_df = pd.DataFrame({
             'DISTRICT': [district],
-            'MONTH': [month],
+            'MONTH': [inputs['MONTH']],
             'LAT': [lat],
             'LON': [lon],
-            'Prep': [prep],
-            'AvgTemp': [avg_temp],
-            'MaxTemp': [max_temp],
-            'Humidity': [humidity],
-            'WindSpeed': [wind_speed]
+            'Prep': [inputs['Prep']],
+            'AvgTemp': [inputs['AvgTemp']],
+            'MaxTemp': [inputs['MaxTemp']],
+            'Humidity': [inputs['Humidity']],
+            'WindSpeed': [inputs['WindSpeed']]
         })
 
-        # Add cyclical month features
-        input_df['Month_sin'] = np.sin(2 * np.pi * input_df['MONTH'] / 12)
-        input_df['Month_cos'] = np.cos(2 * np.pi * input_df['MONTH'] / 12)
+        with st.spinner("Calculating risk assessment..."):
+            X_scaled = build_model_input(input_df, models['scaler'], models['district_encoder'])
 
-        # One-hot encode district
-        district_cols = [f"DISTRICT_{d}" for d in district_encoder.categories_[0]]
-        district_encoded = district_encoder.transform(input_df[['DISTRICT']])
-        for i, col in enumerate(district_cols):
-            input_df[col] = district_encoded[0][i]
+            # Predict fire risk and occurrence
+            try:
+                risk_engine = get_risk_engine(engine_name, models)
+                fire_engine = get_fire_engine(fire_engine_name, models)
+            except Exception as e:
+                st.error(f"⚠️ Error loading models: {e}")
+                return
+            # Point predictions and their spread across the forests' trees, in one pass each
+            risk = risk_engine.score_with_spread(input_df, X_scaled)
+            fire = fire_engine.probability_with_spread(input_df, X_scaled)
+            risk_value = float(risk['value'][0])
+            fire_probability = float(fire['value'][0]) * 100
 
-        # Fill any missing district columns with 0 (in case of unseen districts)
-        for col in district_cols:
-            if col not in input_df:
-                input_df[col] = 0
+            # Combine for final confidence estimation
+            adjusted_confidence = combine_confidence(fire_probability, risk_value)
 
-        # Define full feature list
-        features = ['Prep', 'AvgTemp', 'MaxTemp', 'Humidity', 'WindSpeed',
-                    'Month_sin', 'Month_cos', 'LAT', 'LON'] + district_cols
+            # Why: each input's share of the scores, from the trees' split paths
+            attributions = explain_prediction(input_df, X_scaled, models, engine_name, fire_engine_name)
 
-        with st.spinner("Calculating risk assessment..."):
-            X_input = input_df[features]
-            X_scaled = scaler.transform(X_input)
+            # None when the engine has no trees to compare (formula, compact model, boosting)
+            risk_interval = spread_interval(risk)
+            fire_interval = spread_interval(fire, scale=100)
+            confidence_interval = None
+            if fire_interval is not None:
+                # combine_confidence grows with both inputs, so the bounds map to bounds
+                risk_bounds = risk_interval or (risk_value, risk_value)
+                confidence_interval = (combine_confidence(fire_interval[0], risk_bounds[0]),
+                                       combine_confidence(fire_interval[1], risk_bounds[1]))
 
-            # Predict fire risk and occurrence
-            risk_value = risk_model.predict(X_scaled)[0]
-            fire_probability = fire_model.predict_proba(X_scaled)[0][1] * 100
+        # Kept so the export fragment can rerun on its own
+        st.session_state["pred_result"] = {
+            'generated_at': datetime.now(),
+            'district': district,
+            'lat': lat,
+            'lon': lon,
+            **inputs,
+            'risk_value': risk_value,
+            'risk_interval': risk_interval,
+            'risk_std': None if risk['std'] is None else float(risk['std'][0]),
+            'fire_probability': fire_probability,
+            'fire_interval': fire_interval,
+            'fire_std': None if fire['std'] is None else float(fire['std'][0]) * 100,
+            'confidence_interval': confidence_interval,
+            'risk_attribution': attributions['risk'],
+            'fire_attribution': attributions['fire'],
+            'risk_engine': risk_engine.describe(),
+            'fire_engine': fire_engine.describe(),
+            'risk_category': get_risk_category(risk_value),
+            'adjusted_confidence': adjusted_confidence,
+            'confidence_level': get_confidence_label(adjusted_confidence),
+        }
 
-            # Combine for final confidence estimation
-            risk_factor = min(risk_value / 40, 1.0)
-            adjusted_confidence = fire_probability * (0.8 + 0.2 * risk_factor)
+    result = st.session_state.get("pred_result")
+    if result is None:
+        return
 
-            # Get risk categories
-            risk_category = get_risk_category(risk_value)
-            confidence_level = get_confidence_label(adjusted_confidence)
-        
-        # Display results in an attractive format
-        st.markdown("<h2 class='sub-header'>🧪 Prediction Results</h2>", unsafe_allow_html=True)
-        
-        # Create columns for results
-        res_col1, res_col2 = st.columns(2)
-        
-        with res_col1:
-            # Risk Score Gauge - Improved color contrast
-            fig = go.Figure(go.Indicator(
-                mode = "gauge+number+delta",
-                value = risk_value,
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                title = {'text': "Fire Risk Score", 'font': {'size': 24}},
-                gauge = {
-                    'axis': {'range': [None, 40], 'tickwidth': 1, 'tickcolor': "darkgray"},
-                    'bar': {'color': "darkgray"},
-                    'bgcolor': "white",
-                    'steps': [
-                        {'range': [0, 15], 'color': "#4CAF50"},    # Darker green
-                        {'range': [15, 25], 'color': "#FFC107"},   # Darker yellow
-                        {'range': [25, 35], 'color': "#FF9800"},   # Darker orange
-                        {'range': [35, 40], 'color': "#F44336"}    # Darker red
-                    ],
-                    'threshold': {
-                        'line': {'color': "#B71C1C", 'width': 4},  # Darker red
-                        'thickness': 0.75,
-                        'value': risk_value
-                    }
-                }
-            ))
-            # FIX: Change transparent to rgba(0,0,0,0) for plotly
-            fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20), 
-                            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Risk category with improved contrast
-            risk_colors = {
-                "Low": "#2E7D32",       # Darker Green
-                "Moderate": "#F57F17",  # Darker Yellow
-                "High": "#E65100",      # Darker Orange
-                "Extreme": "#B71C1C"    # Darker Red
-            }
-            
-            st.markdown(f"""
-            <div style='background-color: {risk_colors[risk_category]}22; padding: 15px; border-radius: 10px; 
-                border: 2px solid {risk_colors[risk_category]}; text-align: center; margin-top: 10px;'>
-                <h3 style='margin: 0; color: {risk_colors[risk_category]}'>
-                    {risk_category} Risk
-                </h3>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add metric for direct number display
-            st.metric(
-                "Risk Score", 
-                f"{risk_value:.1f}/40", 
-                delta=None, 
-                delta_color="off"
-            )
-        
-        with res_col2:
-            # Confidence Gauge with improved contrast
-            fig2 = go.Figure(go.Indicator(
-                mode = "gauge+number",
-                value = adjusted_confidence,
-                domain = {'x': [0, 1], 'y': [0, 1]},
-                number = {'suffix': "%"},
-                title = {'text': "Fire Occurrence Confidence", 'font': {'size': 24}},
-                gauge = {
-                    'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkgray"},
-                    'bar': {'color': "darkgray"},
-                    'bgcolor': "white",
-                    'steps': [
-                        {'range': [0, 20], 'color': "#0D47A1"},     # Darker blue
-                        {'range': [20, 40], 'color': "#0097A7"},    # Darker cyan
-                        {'range': [40, 60], 'color': "#FBC02D"},    # Darker yellow
-                        {'range': [60, 80], 'color': "#F57C00"},    # Darker orange
-                        {'range': [80, 100], 'color': "#C62828"}    # Darker red
-                    ],
-                    'threshold': {
-                        'line': {'color': "#B71C1C", 'width': 4},   # Darker red
-                        'thickness': 0.75,
-                        'value': adjusted_confidence
-                    }
+    risk_value = result['risk_value']
+    risk_category = result['risk_category']
+    adjusted_confidence = result['adjusted_confidence']
+    confidence_level = result['confidence_level']
+
+    # Show a divider before results
+    st.markdown("<hr style='margin: 30px 0; border: none; height: 1px; background-color: #ddd;'>", unsafe_allow_html=True)
+
+    # Display results in an attractive format
+    st.markdown("<h2 class='sub-header'>🧪 Prediction Results</h2>", unsafe_allow_html=True)
+    if not predict_button:
+        st.caption(
+            f"Showing the last prediction for {result['district'].title()} "
+            f"({MONTH_NAMES[result['MONTH']-1]}). Click \"Predict Fire Risk\" to refresh it."
+        )
+
+    # Create columns for results
+    res_col1, res_col2 = st.columns(2)
+
+    with res_col1:
+        # Risk Score Gauge - Improved color contrast
+        fig = go.Figure(go.Indicator(
+            mode = "gauge+number+delta",
+            value = risk_value,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            title = {'text': "Fire Risk Score", 'font': {'size': 24}},
+            gauge = {
+                'axis': {'range': [None, 40], 'tickwidth': 1, 'tickcolor': "darkgray"},
+                'bar': {'color': "darkgray"},
+                'bgcolor': "white",
+                'steps': [
+                    {'range': [0, 15], 'color': "#4CAF50"},    # Darker green
+                    {'range': [15, 25], 'color': "#FFC107"},   # Darker yellow
+                    {'range': [25, 35], 'color': "#FF9800"},   # Darker orange
+                    {'range': [35, 40], 'color': "#F44336"}    # Darker red
+                ],
+                'threshold': {
+                    'line': {'color': "#B71C1C", 'width': 4},  # Darker red
+                    'thickness': 0.75,
+                    'value': risk_value
                 }
-            ))
-            # FIX: Change transparent to rgba(0,0,0,0) for plotly
-            fig2.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20), 
-                            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
-            st.plotly_chart(fig2, use_container_width=True)
-            
-            # Confidence level with improved contrast
-            confidence_colors = {
-                "Very Low": "#0D47A1",    # Darker Blue
-                "Low": "#006064",         # Darker Cyan
-                "Moderate": "#F57F17",    # Darker Yellow
-                "High": "#E65100",        # Darker Orange
-                "Very High": "#B71C1C"    # Darker Red
             }
-            
-            st.markdown(f"""
-            <div style='background-color: {confidence_colors[confidence_level]}22; padding: 15px; border-radius: 10px; 
-                border: 2px solid {confidence_colors[confidence_level]}; text-align: center; margin-top: 10px;'>
-                <h3 style='margin: 0; color: {confidence_colors[confidence_level]}'>
-                    {confidence_level} Confidence
-                </h3>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # Add metric for direct percentage display
-            st.metric(
-                "Confidence Score", 
-                f"{adjusted_confidence:.1f}%", 
-                delta=None, 
-                delta_color="off"
-            )
-        
-        
-        # Export section
-        st.subheader("📥 Export Results")
-        
-        # Create a CSV for download
-        csv_data = f"""Date,{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-District,{district.title()}
-Month,{month_names[month-1]}
-Coordinates,{lat:.4f},{lon:.4f}
-Precipitation (mm),{prep}
-Average Temperature (°C),{avg_temp}
-Maximum Temperature (°C),{max_temp}
-Humidity (%),{humidity}
-Wind Speed (m/s),{wind_speed}
-Risk Score,{risk_value:.2f}
-Risk Category,{risk_category}
-Confidence Score,{adjusted_confidence:.2f}%
-Confidence Level,{confidence_level}
-Notes,{notes}
-"""
-        
-        # Download button
-        st.download_button(
-            label="📊 Download Report",
-            data=csv_data,
-            file_name=f"fire_risk_{district}_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-        
-        # Add disclaimer about prediction accuracy
-        st.markdown("""
-        <div style='background-color: transparent; padding: 10px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #ffc107;'>
-            <p style='margin: 0; font-size: 14px;'>⚠️ <strong>Note:</strong> These predictions are based on historical data and climate patterns. 
-            Actual fire conditions may vary. Use this information as a guide and refer to official sources for critical decisions.</p>
+        ))
+        # FIX: Change transparent to rgba(0,0,0,0) for plotly
+        fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20),
+                        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Risk category with improved contrast
+        risk_colors = {
+            "Low": "#2E7D32",       # Darker Green
+            "Moderate": "#F57F17",  # Darker Yellow
+            "High": "#E65100",      # Darker Orange
+            "Extreme": "#B71C1C"    # Darker Red
+        }
+
+        st.markdown(f"""
+        <div style='background-color: {risk_colors[risk_category]}22; padding: 15px; border-radius: 10px;
+            border: 2px solid {risk_colors[risk_category]}; text-align: center; margin-top: 10px;'>
+            <h3 style='margin: 0; color: {risk_colors[risk_category]}'>
+                {risk_category} Risk
+            </h3>
         </div>
         """, unsafe_allow_html=True)
-        
-        # Add a timestamp
+
+        # Add metric for direct number display
+        st.metric(
+            "Risk Score",
+            f"{risk_value:.1f}/40",
+            delta=None,
+            delta_color="off"
+        )
+        if result.get('risk_interval') is not None:
+            low, high = result['risk_interval']
+            st.caption(f"Trees' {INTERVAL_LABEL} range: {low:.1f} – {high:.1f} (std {result['risk_std']:.2f})")
+
+        if result.get('risk_attribution') is not None:
+            show_attribution(result['risk_attribution'], "What drives the risk score", "")
+
+    with res_col2:
+        # Confidence Gauge with improved contrast
+        fig2 = go.Figure(go.Indicator(
+            mode = "gauge+number",
+            value = adjusted_confidence,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            number = {'suffix': "%"},
+            title = {'text': "Fire Occurrence Confidence", 'font': {'size': 24}},
+            gauge = {
+                'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "darkgray"},
+                'bar': {'color': "darkgray"},
+                'bgcolor': "white",
+                'steps': [
+                    {'range': [0, 20], 'color': "#0D47A1"},     # Darker blue
+                    {'range': [20, 40], 'color': "#0097A7"},    # Darker cyan
+                    {'range': [40, 60], 'color': "#FBC02D"},    # Darker yellow
+                    {'range': [60, 80], 'color': "#F57C00"},    # Darker orange
+                    {'range': [80, 100], 'color': "#C62828"}    # Darker red
+                ],
+                'threshold': {
+                    'line': {'color': "#B71C1C", 'width': 4},   # Darker red
+                    'thickness': 0.75,
+                    'value': adjusted_confidence
+                }
+            }
+        ))
+        # FIX: Change transparent to rgba(0,0,0,0) for plotly
+        fig2.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20),
+                        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+        st.plotly_chart(fig2, use_container_width=True)
+
+        # Confidence level with improved contrast
+        confidence_colors = {
+            "Very Low": "#0D47A1",    # Darker Blue
+            "Low": "#006064",         # Darker Cyan
+            "Moderate": "#F57F17",    # Darker Yellow
+            "High": "#E65100",        # Darker Orange
+            "Very High": "#B71C1C"    # Darker Red
+        }
+
         st.markdown(f"""
-        <div style='text-align: center; color: gray; font-size: 12px; margin-top: 30px;'>
-            Prediction generated on {datetime.now().strftime('%B %d, %Y at %H:%M')}
+        <div style='background-color: {confidence_colors[confidence_level]}22; padding: 15px; border-radius: 10px;
+            border: 2px solid {confidence_colors[confidence_level]}; text-align: center; margin-top: 10px;'>
+            <h3 style='margin: 0; color: {confidence_colors[confidence_level]}'>
+                {confidence_level} Confidence
+            </h3>
         </div>
         """, unsafe_allow_html=True)
 
+        # Add metric for direct percentage display
+        st.metric(
+            "Confidence Score",
+            f"{adjusted_confidence:.1f}%",
+            delta=None,
+            delta_color="off"
+        )
+        if result.get('fire_interval') is not None:
+            fire_low, fire_high = result['fire_interval']
+            conf_low, conf_high = result['confidence_interval']
+            st.caption(
+                f"Fire probability {result['fire_probability']:.1f}%; {VOTE_INTERVAL_LABEL} interval of the trees' vote "
+                f"{fire_low:.1f}% – {fire_high:.1f}% (std {result['fire_std']:.1f} pts), "
+                f"confidence {conf_low:.1f}% – {conf_high:.1f}%"
+            )
+
+        if result.get('fire_attribution') is not None:
+            show_attribution(result['fire_attribution'], "What drives the fire probability", " pts")
+
+    # Batch attribution for the same month, using each district's climatology
+    with st.expander(f"🧭 Risk drivers for every district in {MONTH_NAMES[result['MONTH']-1]}"):
+        st.caption("Each district at its average climate for the month, scored and explained with the selected engines.")
+        if st.button("Explain all districts", key="pred_explain_all"):
+            with st.spinner("Attributing all districts..."):
+                table = explain_all_districts(result['MONTH'], models, engine_name, fire_engine_name)
+            st.dataframe(table, use_container_width=True, hide_index=True)
+
+    prediction_export_fragment()
+
+
+@fragment
+def prediction_outlook_fragment():
+    st.markdown("<hr style='margin: 30px 0; border: none; height: 1px; background-color: #ddd;'>", unsafe_allow_html=True)
+    st.markdown(f"<h2 class='sub-header'>📅 {HORIZONS}-Month Outlook</h2>", unsafe_allow_html=True)
+    st.markdown(
+        f"Forecast fire probability and risk score for the next {HORIZONS} months of every district, "
+        "from the latest month of recorded data and the same season in past years."
+    )
+
+    try:
+        outlook = load_outlook()
+    except Exception as e:
+        st.error(f"⚠️ Error loading the outlook: {e}")
+        return
+    if outlook is None:
+        st.info("No outlook has been computed for the current data yet.")
+        if not st.button("📅 Compute Outlook", key="outlook_run"):
+            return
+        with st.spinner("Fitting the forecast models and forecasting every district..."):
+            try:
+                outlook = load_outlook(compute=True)
+            except Exception as e:
+                st.error(f"⚠️ Error computing the outlook: {e}")
+                return
+    table, manifest = outlook
+    table = table.assign(Month=[f"{MONTH_NAMES[m-1][:3]} {y}" for y, m in zip(table['YEAR'], table['MONTH'])])
+
+    # Held-out skill one month ahead, next to the seasonal baselines
+    skill = manifest['skill']['1']
+    fire_skill = (f"fire AUC {skill['fire_auc']:.2f} (seasonal frequency alone {skill['fire_auc_seasonal']:.2f}), "
+                  if skill['fire_auc'] is not None else "")
+    st.caption(
+        f"From {MONTH_NAMES[manifest['origin'][1]-1]} {manifest['origin'][0]} data. "
+        f"On the last year held out, one month ahead: {fire_skill}"
+        f"risk score error {skill['risk_mae']:.1f} (last year's value {skill['risk_mae_last_year']:.1f})."
+    )
+
+    district = st.session_state.get("pred_district")
+    rows = table[table['DISTRICT'] == district]
+    if len(rows):
+        out_col1, out_col2 = st.columns(2)
+        with out_col1:
+            fig = px.bar(rows, x='Month', y=rows['FIRE_PROBABILITY'] * 100, title=f"Fire probability, {district.title()}",
+                         labels={'y': "Fire probability (%)", 'Month': ""}, color_discrete_sequence=["#C62828"])
+            fig.update_layout(height=300, yaxis_range=[0, 100], margin=dict(l=20, r=20, t=50, b=20),
+                              paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig, use_container_width=True)
+        with out_col2:
+            fig = px.bar(rows, x='Month', y='FIRE_RISK', color='RISK_CATEGORY', title=f"Risk score, {district.title()}",
+                         labels={'FIRE_RISK': "Risk score", 'Month': "", 'RISK_CATEGORY': "Category"},
+                         color_discrete_map={"Low": "#4CAF50", "Moderate": "#FFC107", "High": "#FF9800",
+                                             "Extreme": "#F44336"})
+            fig.update_layout(height=300, margin=dict(l=20, r=20, t=50, b=20),
+                              paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig, use_container_width=True)
+
+    with st.expander("Fire probability (%) for every district"):
+        months = table.drop_duplicates('HORIZON').sort_values('HORIZON')['Month'].tolist()
+        pivot = (table.pivot(index='DISTRICT', columns='Month', values='FIRE_PROBABILITY')[months] * 100).round(1)
+        pivot = pivot.loc[pivot.max(axis=1).sort_values(ascending=False).index]
+        pivot.index = pivot.index.str.title()
+        st.dataframe(pivot, use_container_width=True)
+
+
+SENSITIVITY_OUTPUTS = {
+    'risk': "Risk score",
+    'fire': "Fire probability (%)",
+}
+
+
+@fragment
+def prediction_sensitivity_fragment(models):
+    st.markdown("<hr style='margin: 30px 0; border: none; height: 1px; background-color: #ddd;'>", unsafe_allow_html=True)
+    st.markdown("<h2 class='sub-header'>🗺️ Sensitivity Surface</h2>", unsafe_allow_html=True)
+    st.markdown(
+        "How the prediction responds to two inputs at once, with the others held at the values above. "
+        "The surface starts coarse and sharpens."
+    )
+    if "pred_location" not in st.session_state or "pred_inputs" not in st.session_state:
+        return
+
+    sens_col1, sens_col2, sens_col3 = st.columns(3)
+    with sens_col1:
+        x_var = st.selectbox("Horizontal axis", CLIMATE_VARIABLES, index=CLIMATE_VARIABLES.index('MaxTemp'),
+                             format_func=VARIABLE_LABELS.get, key="sens_x")
+    with sens_col2:
+        y_choices = [var for var in CLIMATE_VARIABLES if var != x_var]
+        y_default = 'Humidity' if 'Humidity' in y_choices else y_choices[0]
+        y_var = st.selectbox("Vertical axis", y_choices, index=y_choices.index(y_default),
+                             format_func=VARIABLE_LABELS.get, key="sens_y")
+    with sens_col3:
+        output = st.radio("Show", list(SENSITIVITY_OUTPUTS), format_func=SENSITIVITY_OUTPUTS.get,
+                          horizontal=True, key="sens_output")
+
+    if not st.button("🗺️ Compute Surface", key="sens_run"):
+        return
+
+    district, lat, lon = st.session_state["pred_location"]
+    inputs = st.session_state["pred_inputs"]
+    base = {'DISTRICT': district, 'MONTH': inputs['MONTH'], 'LAT': lat, 'LON': lon,
+            **{var: float(inputs[var]) for var in CLIMATE_VARIABLES}}
+    risk_engine_name = st.session_state.get("pred_risk_engine", DEFAULT_RISK_ENGINE)
+    fire_engine_name = st.session_state.get("pred_fire_engine", DEFAULT_FIRE_ENGINE)
+
+    placeholder = st.empty()
+    for resolution in REFINEMENT_LEVELS:
+        try:
+            surface = sensitivity_surface(base, x_var, y_var, resolution, models, risk_engine_name, fire_engine_name)
+        except Exception as e:
+            st.error(f"⚠️ Error computing the surface: {e}")
+            return
+        values = surface[output] * (100 if output == 'fire' else 1)
+        fig = go.Figure(go.Heatmap(
+            x=surface['x'], y=surface['y'], z=values,
+            colorscale="YlOrRd", colorbar={'title': SENSITIVITY_OUTPUTS[output]},
+            hovertemplate=(f"{VARIABLE_LABELS[x_var]}: %{{x:.1f}}<br>{VARIABLE_LABELS[y_var]}: %{{y:.1f}}"
+                           f"<br>{SENSITIVITY_OUTPUTS[output]}: %{{z:.1f}}<extra></extra>")
+        ))
+        # The current inputs, for orientation
+        fig.add_trace(go.Scatter(x=[base[x_var]], y=[base[y_var]], mode="markers", name="Current inputs",
+                                 marker={'symbol': "x", 'size': 12, 'color': "black"}))
+        fig.update_layout(
+            title=f"{SENSITIVITY_OUTPUTS[output]}, {district.title()} in {MONTH_NAMES[base['MONTH']-1]} "
+                  f"({resolution}×{resolution})",
+            xaxis_title=VARIABLE_LABELS[x_var], yaxis_title=VARIABLE_LABELS[y_var], height=500,
+            margin=dict(l=20, r=20, t=50, b=20), showlegend=False,
+            paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)"
+        )
+        placeholder.plotly_chart(fig, use_container_width=True, key=f"sens_chart_{resolution}")
+
+
+@fragment
+def prediction_scenarios_fragment(models):
+    st.markdown("<hr style='margin: 30px 0; border: none; height: 1px; background-color: #ddd;'>", unsafe_allow_html=True)
+    st.markdown("<h2 class='sub-header'>🎲 Scenario Mode</h2>", unsafe_allow_html=True)
+    month = st.session_state.get("pred_month", datetime.now().month)
+    st.markdown(
+        f"Samples plausible {MONTH_NAMES[month-1]} climates around every district's climatology "
+        "and scores them all in one batch with the selected engines, showing the spread of outcomes."
+    )
+
+    scen_col1, scen_col2, scen_col3, scen_col4, scen_col5 = st.columns(5)
+    with scen_col1:
+        samples = st.select_slider("Samples per district", [250, 500, 1000, 2000, 5000], value=1000,
+                                   key="scen_samples")
+    with scen_col2:
+        spread = st.slider("Spread (× std)", 0.5, 2.0, 1.0, 0.25, key="scen_spread",
+                           help="Width of the sampled climates, in district-month standard deviations")
+    with scen_col3:
+        temp_shift = st.slider("Temperature (°C)", -3.0, 3.0, 0.0, 0.5, key="scen_temp_shift",
+                               help="Added to average and maximum temperature")
+    with scen_col4:
+        prep_change = st.slider("Precipitation (%)", -50, 50, 0, 10, key="scen_prep_change")
+    with scen_col5:
+        humidity_shift = st.slider("Humidity (pts)", -20, 20, 0, 5, key="scen_humidity_shift")
+
+    if st.button("🎲 Run Scenarios", key="scen_run"):
+        st.session_state["scen_request"] = (month, {
+            'samples': samples, 'spread': spread, 'temp_shift': temp_shift,
+            'prep_change': prep_change, 'humidity_shift': humidity_shift,
+        })
+
+    request = st.session_state.get("scen_request")
+    if request is None:
+        return
+    scenario_month, spec = request
+    risk_engine_name = st.session_state.get("pred_risk_engine", DEFAULT_RISK_ENGINE)
+    fire_engine_name = st.session_state.get("pred_fire_engine", DEFAULT_FIRE_ENGINE)
+    with st.spinner("Scoring scenarios for all districts..."):
+        try:
+            result = run_climate_scenarios(scenario_month, spec, models, risk_engine_name, fire_engine_name)
+        except Exception as e:
+            st.error(f"⚠️ Error running scenarios: {e}")
+            return
+
+    st.caption(
+        f"{MONTH_NAMES[scenario_month-1]}, {spec['samples']} samples for each of {len(result['districts'])} districts; "
+        f"{RISK_ENGINE_LABELS[risk_engine_name]} / {FIRE_ENGINE_LABELS[fire_engine_name]}."
+    )
+
+    # Distributions for the selected district
+    district = st.session_state.get("pred_district")
+    if district in result['districts']:
+        index = result['districts'].index(district)
+        hist_col1, hist_col2 = st.columns(2)
+        with hist_col1:
+            fig = px.histogram(x=result['risk'][index], nbins=40, title=f"Risk score, {district.title()}",
+                               labels={'x': "Risk score"}, color_discrete_sequence=["#E65100"])
+            for bound in [15, 25, 35]:
+                fig.add_vline(x=bound, line_dash="dot", line_color="gray")
+            fig.update_layout(height=300, yaxis_title="Samples", margin=dict(l=20, r=20, t=50, b=20),
+                              paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig, use_container_width=True)
+        with hist_col2:
+            fig = px.histogram(x=result['fire'][index] * 100, nbins=40, title=f"Fire probability, {district.title()}",
+                               labels={'x': "Fire probability (%)"}, color_discrete_sequence=["#C62828"])
+            fig.update_layout(height=300, yaxis_title="Samples", margin=dict(l=20, r=20, t=50, b=20),
+                              paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+            st.plotly_chart(fig, use_container_width=True)
+
+    # Every district, most at risk first
+    summary = result['summary'].sort_values('P(High or Extreme) %', ascending=False)
+    st.dataframe(summary.round(1), use_container_width=True, hide_index=True)
+
+
+@fragment
+def prediction_export_fragment():
+    result = st.session_state.get("pred_result")
+    if result is None:
+        return
+
+    # Export section
+    st.subheader("📥 Export Results")
+
+    # Add notes field
+    notes = st.text_area("📝 Notes (optional)",
+                        placeholder="Add any additional context or observations...",
+                        key="pred_notes",
+                        help="Enter any relevant notes about this prediction")
+
+    # Anomalies relative to the district-month climatology
+    anomaly_lines = "".join(
+        f"{VARIABLE_LABELS[var]} anomaly (z),{z:.2f}\n" for var, z in result.get('anomaly_z', {}).items()
+    )
+
+    # Per-tree spread, when the selected engines are forests
+    detail_lines = ""
+    if result.get('risk_interval') is not None:
+        detail_lines += f"Risk Score Range (trees {INTERVAL_LABEL}),{result['risk_interval'][0]:.2f},{result['risk_interval'][1]:.2f}\n"
+        detail_lines += f"Risk Score Std (trees),{result['risk_std']:.2f}\n"
+    if result.get('fire_interval') is not None:
+        detail_lines += f"Fire Probability,{result['fire_probability']:.2f}%\n"
+        detail_lines += f"Fire Probability Interval (tree vote {VOTE_INTERVAL_LABEL}),{result['fire_interval'][0]:.2f}%,{result['fire_interval'][1]:.2f}%\n"
+        detail_lines += f"Fire Probability Std (trees),{result['fire_std']:.2f}\n"
+        detail_lines += f"Confidence Score Interval,{result['confidence_interval'][0]:.2f}%,{result['confidence_interval'][1]:.2f}%\n"
+
+    # What drove each score
+    for kind, label, unit in [('risk_attribution', "Risk Score", ""), ('fire_attribution', "Fire Probability", " pts")]:
+        attribution = result.get(kind)
+        if attribution is None:
+            continue
+        detail_lines += f"{label} Attribution: Baseline,{attribution['bias']:.2f}{unit}\n"
+        for group, value in attribution['credits'].items():
+            detail_lines += f"{label} Attribution: {group},{value:+.2f}{unit}\n"
+
+    # Create a CSV for download
+    csv_data = f"""Date,{result['generated_at'].strftime('%Y-%m-%d %H:%M:%S')}
+District,{result['district'].title()}
+Month,{MONTH_NAMES[result['MONTH']-1]}
+Coordinates,{result['lat']:.4f},{result['lon']:.4f}
+Precipitation (mm),{result['Prep']}
+Average Temperature (°C),{result['AvgTemp']}
+Maximum Temperature (°C),{result['MaxTemp']}
+Humidity (%),{result['Humidity']}
+Wind Speed (m/s),{result['WindSpeed']}
+{anomaly_lines}Risk Score,{result['risk_value']:.2f}
+Risk Engine,{result['risk_engine']}
+Fire Model,{result['fire_engine']}
+Risk Category,{result['risk_category']}
+Confidence Score,{result['adjusted_confidence']:.2f}%
+Confidence Level,{result['confidence_level']}
+{detail_lines}Notes,{notes}
+"""
+
+    # Download button
+    st.download_button(
+        label="📊 Download Report",
+        data=csv_data,
+        file_name=f"fire_risk_{result['district']}_{result['generated_at'].strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+    # Add disclaimer about prediction accuracy
+    st.markdown("""
+    <div style='background-color: transparent; padding: 10px; border-radius: 5px; margin: 15px 0; border-left: 4px solid #ffc107;'>
+        <p style='margin: 0; font-size: 14px;'>⚠️ <strong>Note:</strong> These predictions are based on historical data and climate patterns.
+        Actual fire conditions may vary. Use this information as a guide and refer to official sources for critical decisions.</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Add a timestamp
+    st.markdown(f"""
+    <div style='text-align: center; color: gray; font-size: 12px; margin-top: 30px;'>
+        Prediction generated on {result['generated_at'].strftime('%B %d, %Y at %H:%M')}
+    </div>
+    """, unsafe_allow_html=True)
+
 # Helper functions (keep the same logic)
+INTERVAL_LABEL = f"{TREE_INTERVAL[0]}–{TREE_INTERVAL[1]}%"
+VOTE_INTERVAL_LABEL = f"{TREE_INTERVAL[1] - TREE_INTERVAL[0]}%"
+
+
+def combine_confidence(fire_probability, risk_value):
+    # Fire probability (%) nudged by the risk score
+    risk_factor = min(risk_value / 40, 1.0)
+    return fire_probability * (0.8 + 0.2 * risk_factor)
+
+
+def show_attribution(attribution, title, unit):
+    # Horizontal bars of the feature-group credits; positive pushes the score up
+    credits = pd.Series(attribution['credits']).sort_values(key=np.abs)
+    fig = go.Figure(go.Bar(
+        x=credits.values, y=credits.index, orientation='h',
+        marker_color=["#C62828" if v > 0 else "#1565C0" for v in credits.values],
+        hovertemplate="%{y}: %{x:+.2f}" + unit + "<extra></extra>"
+    ))
+    fig.update_layout(title={'text': title, 'font': {'size': 16}}, height=260,
+                      margin=dict(l=20, r=20, t=40, b=20),
+                      paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Bars add up, from a baseline of {attribution['bias']:.1f}{unit}, to the prediction.")
+
+
+def spread_interval(summary, scale=1):
+    # (lower, upper) of a one-row engine summary, or None without a per-tree spread
+    if summary['lower'] is None:
+        return None
+    return float(summary['lower'][0]) * scale, float(summary['upper'][0]) * scale
+
+
 def classify_fire_risk(confidence):
     if confidence < 50:
         return "Low"
@@ -1582,7 +2795,7 @@ def datasets_page():
         view_option = st.radio("Choose an option", ["View Raw Data", "View Filtered Data", "Download Data"])
         
         if view_option == "View Raw Data":
-            df = pd.read_csv(dataset_options[selected_dataset]["raw_path"])
+            df = load_dataset(dataset_options[selected_dataset]["raw_path"])
             st.markdown("#### Raw Data Preview")
             st.dataframe(df.head(100))
             if st.button("Load Full Data"):
@@ -1601,7 +2814,7 @@ def datasets_page():
                 - **TS**: Earth Skin Temp (°C)  
                 - **WS10M/WS50M**: Wind Speed at 10m/50m (m/s)  
                 - **_MAX/MIN/RANGE**: Max, Min, and Range values of wind speed  
-                -**Note**: Before January 2018, precipitation is reported as an accumulation; after, it is an average rate.                   
+                -**Note**: Before January 2018, precipitation is reported as an accumulation; after, it is an average rate. The maps, charts and models convert the 2018-2019 rates to monthly totals (rate × days in the month).
                 """)
 
             elif selected_dataset == "Fire Data":
@@ -1615,7 +2828,7 @@ def datasets_page():
                 """)
 
         elif view_option == "View Filtered Data":
-            df = pd.read_csv(dataset_options[selected_dataset]["filtered_path"])
+            df = load_dataset(dataset_options[selected_dataset]["filtered_path"])
             st.markdown("#### Filtered Data Preview")
             st.dataframe(df.head(100))
             if st.button("Load Full Data"):
@@ -1690,7 +2903,10 @@ def feedback_page():
 
 # Main App Logic
 def main():
+    warmup_status = start_cache_warmup()
     page = create_sidebar_menu()
+    year_range_selector()
+    show_cache_stats(warmup_status)
     
     if page == "home":
         home_page()
@@ -0,0 +1,68 @@
+"""
+Latency and exactness of the tree-path attributions (src/attribution.py).
+
+For the trained forests in models/: the one-off cost of building the
+PathAttributor, single-row p50/p99 latency, one month of every district and
+the whole table, and the largest gap between bias + credits and the
+forest's own prediction (should be float rounding only). A repeated input
+in the app is a shared-cache lookup on top of this and is not timed here.
+
+Usage (from the repository root):
+    python benchmarks/bench_attribution.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.attribution import PathAttributor  # noqa: E402
+from src.features import build_model_input  # noqa: E402
+from src.train import MODEL_DIR, load_training_frame  # noqa: E402
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    os.chdir(REPO_ROOT)
+    df = load_training_frame()
+    scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
+    encoder = joblib.load(os.path.join(MODEL_DIR, "district_encoder.pkl"))
+    X = build_model_input(df, scaler, encoder)
+    month = X[(df['YEAR'] == df['YEAR'].max()).to_numpy() & (df['MONTH'] == 4).to_numpy()]
+
+    print(f"{'model':<11}{'build ms':>9}{'p50 ms':>9}{'p99 ms':>9}{f'{len(month)} rows ms':>13}"
+          f"{f'{len(X)} rows ms':>15}{'max gap':>10}")
+    for name in ["risk_model", "fire_model"]:
+        model = joblib.load(os.path.join(MODEL_DIR, f"{name}.pkl"), mmap_mode='r')
+        start = time.perf_counter()
+        attributor = PathAttributor(model, list(scaler.feature_names_in_))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        attributor.explain(X[:1])
+        single = timed(lambda: attributor.explain(X[:1]), 100)
+        month_ms = statistics.median(timed(lambda: attributor.explain(month), 5))
+        table_ms = statistics.median(timed(lambda: attributor.explain(X), 3))
+
+        bias, credits = attributor.explain(X)
+        prediction = model.predict(X) if name == "risk_model" else model.predict_proba(X)[:, 1]
+        gap = float(np.max(np.abs(bias + credits.sum(axis=1).to_numpy() - prediction)))
+        print(f"{name:<11}{build_ms:>9.1f}{np.percentile(single, 50):>9.2f}{np.percentile(single, 99):>9.2f}"
+              f"{month_ms:>13.1f}{table_ms:>15.1f}{gap:>10.1e}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+Cost of the lag feature store (src/feature_store.py).
+
+For a range of synthetic history sizes: computing every lag feature with
+the grid layout, the same features with a per-district groupby + rolling
+and a loop over districts for the neighbour averages (the straightforward
+pandas version, as a reference), a full store build, and appending one new
+month to an existing store.
+
+Usage (from the repository root):
+    python benchmarks/bench_feature_store.py [--scales 1 4 16]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.climate_archive import read_climate_archive  # noqa: E402
+from src.feature_store import LAG_FEATURES, climate_normals, compute_lag_features, update_store  # noqa: E402
+from src.spatial import DistrictIndex, district_centroids  # noqa: E402
+from src.synthetic import scaled_frame  # noqa: E402
+from src.train import load_training_frame  # noqa: E402
+
+
+def groupby_lag_features(df, normals, centroids):
+    """The same features with shift/rolling per district group and a loop over districts for neighbours."""
+    frame = df.merge(normals, on=['DISTRICT', 'MONTH'], how='left').sort_values(['DISTRICT', 'YEAR', 'MONTH'])
+    frame['T'] = frame['YEAR'] * 12 + frame['MONTH']
+    frame['Prep_deficit'] = frame['Prep_Normal'] - frame['Prep']
+    frame['MaxTemp_anomaly'] = frame['MaxTemp'] - frame['MaxTemp_Normal']
+    grouped = frame.groupby('DISTRICT')
+    reducers = {'deficit': 'sum', 'sum': 'sum', 'max': 'max', 'mean': 'mean'}
+    index = DistrictIndex.from_frame(centroids)
+    weights = index.neighbour_weights()
+    for name, (op, column, window) in LAG_FEATURES.items():
+        transform = op.removeprefix('neighbour').strip('_')
+        source = f"{column}_{transform}" if transform in ('deficit', 'anomaly') else column
+        if not op.startswith('neighbour'):
+            frame[name] = grouped[source].transform(lambda s: s.shift(1).rolling(window).agg(reducers[op]))
+            continue
+        previous = frame.pivot(index='T', columns='DISTRICT', values=source).shift(1)
+        values = {}
+        for i, district in enumerate(index.names):
+            row = weights.getrow(i)
+            neighbours = previous[index.names[row.indices]]
+            known = neighbours.notna()
+            values[district] = (neighbours.fillna(0) @ row.data) / (known @ row.data)
+        stacked = pd.DataFrame(values).stack().rename(name)
+        frame = frame.drop(columns=name, errors='ignore').merge(stacked, left_on=['T', 'DISTRICT'],
+                                                                 right_index=True, how='left')
+    return frame.sort_values(['DISTRICT', 'YEAR', 'MONTH'])
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    source = load_training_frame()
+    normals = climate_normals(read_climate_archive(), source)
+    centroids = district_centroids(source)
+    print(f"{'rows':>8}{'grid s':>9}{'groupby s':>11}{'max diff':>10}{'build s':>9}{'append s':>10}{'append rows':>13}")
+    for scale in args.scales:
+        df = scaled_frame(source, scale)
+        grid, grid_seconds = timed(lambda: compute_lag_features(df, normals, centroids))
+        reference, groupby_seconds = timed(lambda: groupby_lag_features(df, normals, centroids))
+
+        grid = pd.concat([df, grid], axis=1).sort_values(['DISTRICT', 'YEAR', 'MONTH'])
+        diff = np.nanmax(np.abs(grid[list(LAG_FEATURES)].to_numpy() - reference[list(LAG_FEATURES)].to_numpy()))
+
+        t = df['YEAR'] * 12 + df['MONTH']
+        with tempfile.TemporaryDirectory() as store_dir:
+            _, build_seconds = timed(lambda: update_store(df[t < t.max()], store_dir))
+            (manifest, _), append_seconds = timed(lambda: update_store(df, store_dir))
+            append_rows = int((t == t.max()).sum())
+        print(f"{len(df):>8}{grid_seconds:>9.3f}{groupby_seconds:>11.3f}{diff:>10.1e}{build_seconds:>9.3f}"
+              f"{append_seconds:>10.3f}{append_rows:>13}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Cost of clustering MODIS detections into fire events (src/fire_events.py).
+
+The 2012-2017 detections are repeated back to back in time (each copy a
+little jittered in space) to reach a range of sizes, then clustered with
+the grid hash. At the smallest scales the events are checked against the
+same linkage built from a KD-tree pair query (scipy cKDTree.query_pairs on
+the cell-scaled coordinates), which is the usual reference but keeps every
+pair in memory.
+
+Usage (from the repository root):
+    python benchmarks/bench_fire_events.py [--scales 1 10 50] [--check-up-to 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.fire_events import EVENT_GAP_DAYS, EVENT_KM, cluster_detections, load_detections  # noqa: E402
+from src.spatial import project_km  # noqa: E402
+
+
+def scaled_detections(detections, scale, seed=0):
+    """scale copies of the detections, one after another in time, jittered by up to 0.01 degrees."""
+    rng = np.random.default_rng(seed)
+    span = detections['TIME'].max() - detections['TIME'].min() + pd.Timedelta(days=30)
+    copies = []
+    for k in range(scale):
+        copy = detections.copy()
+        copy['TIME'] = copy['TIME'] + k * span
+        if k:
+            copy['LAT'] += rng.uniform(-0.01, 0.01, len(copy))
+            copy['LON'] += rng.uniform(-0.01, 0.01, len(copy))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def kdtree_events(detections, km=EVENT_KM, gap_days=EVENT_GAP_DAYS):
+    """Number of events from a KD-tree over (x / km, y / km, t / gap): max-norm pairs, then the exact test."""
+    xy = project_km(detections['LAT'], detections['LON'], float(detections['LAT'].mean()))
+    days = (detections['TIME'] - detections['TIME'].min()).dt.total_seconds().to_numpy() / 86400
+    pairs = cKDTree(np.column_stack([xy / km, days / gap_days])).query_pairs(1, p=np.inf, output_type='ndarray')
+    i, j = pairs[:, 0], pairs[:, 1]
+    keep = np.hypot(*(xy[i] - xy[j]).T) <= km
+    n = len(detections)
+    graph = coo_matrix((np.ones(keep.sum(), dtype=np.int8), (i[keep], j[keep])), shape=(n, n))
+    return connected_components(graph, directed=False)[0]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--check-up-to", type=int, default=10, help="Largest scale checked against the KD-tree")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    source = load_detections()
+    print(f"{'detections':>11}{'events':>9}{'grid s':>9}{'us/detection':>14}{'kd-tree s':>11}{'same':>6}")
+    for scale in args.scales:
+        detections = scaled_detections(source, scale)
+        labels, grid_seconds = timed(lambda: cluster_detections(detections))
+        events = int(labels.max()) + 1
+        check = ""
+        if scale <= args.check_up_to:
+            kd_events, kd_seconds = timed(lambda: kdtree_events(detections))
+            check = f"{kd_seconds:>11.3f}{str(kd_events == events):>6}"
+        print(f"{len(detections):>11}{events:>9}{grid_seconds:>9.3f}{grid_seconds / len(detections) * 1e6:>14.2f}"
+              + check)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Payload and update cost of the hex-binned fire heatmap (src/fire_heatmap.py).
+
+The raw detections are repeated (each copy jittered by up to 0.05 degrees)
+to stand in for more fire seasons. For each size: the heatmap payload at
+the default zoom and at the finest level, against one point per detection,
+and the time to rebuild the bins versus appending one more copy's rows to
+an existing set.
+
+Usage (from the repository root):
+    python benchmarks/bench_fire_heatmap.py [--scales 1 10 50]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.fire_events import MODIS_RAW_GLOB  # noqa: E402
+from src.fire_heatmap import (DEFAULT_ZOOM, LEVELS, heat_points, level_for_zoom, payload_bytes,  # noqa: E402
+                              read_bins, update_bins)
+
+
+def write_scaled(raw, scale, path, seed=0):
+    """scale jittered copies of the raw detections as one CSV in the raw layout."""
+    rng = np.random.default_rng(seed)
+    copies = []
+    for k in range(scale):
+        copy = raw.copy()
+        if k:
+            copy['latitude'] = (copy['latitude'] + rng.uniform(-0.05, 0.05, len(copy))).round(4)
+            copy['longitude'] = (copy['longitude'] + rng.uniform(-0.05, 0.05, len(copy))).round(4)
+        copies.append(copy)
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    raw = pd.concat([pd.read_csv(path) for path in sorted(glob.glob(MODIS_RAW_GLOB))], ignore_index=True)
+    finest = min(LEVELS.values())
+    print(f"{'points':>9}{'points KB':>11}{f'zoom {DEFAULT_ZOOM} KB':>11}{f'{finest} km KB':>10}"
+          f"{'rebuild s':>11}{'append s':>10}")
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "modis_synthetic_Nepal.csv")
+            write_scaled(raw, scale, path)
+            _, rebuild_seconds = timed(lambda: update_bins([path], os.path.join(tmp, "bins"), rebuild=True))
+            bins = read_bins(os.path.join(tmp, "bins"))
+
+            points = pd.read_csv(path, usecols=['latitude', 'longitude'])
+            point_kb = payload_bytes(np.column_stack([points['latitude'], points['longitude'],
+                                                      np.ones(len(points))]).tolist()) / 1024
+            default_kb = payload_bytes(heat_points(bins[bins['KM'] == level_for_zoom(DEFAULT_ZOOM)])) / 1024
+            finest_kb = payload_bytes(heat_points(bins[bins['KM'] == finest])) / 1024
+
+            # One more copy arrives at the end of the file
+            write_scaled(raw, scale + 1, path)
+            _, append_seconds = timed(lambda: update_bins([path], os.path.join(tmp, "bins")))
+        print(f"{len(points):>9}{point_kb:>11.1f}{default_kb:>11.1f}{finest_kb:>10.1f}"
+              f"{rebuild_seconds:>11.3f}{append_seconds:>10.3f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Random forest versus XGBoost / LightGBM for risk_model and fire_model.
+
+For every backend installed, both models are fitted with the backend's
+default parameters (src/backends.py) on the notebook's training split and
+measured on its held-out rows: training time, pickle size, load time,
+single-row p50/p99 and batch prediction latency, and accuracy (R² for the
+risk score, AUC for fire occurrence). The real table is measured first, then
+scaled synthetic versions of it (src/synthetic.py), whose held-out accuracy
+is optimistic because fire labels repeat across the copies.
+
+Usage (from the repository root):
+    python benchmarks/bench_model_backends.py [--scales 1 4 16] [--n-jobs N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from sklearn.metrics import r2_score, roc_auc_score
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.backends import DEFAULT_PARAMS, available_backends, make_model  # noqa: E402
+from src.evaluate import load_evaluation_data  # noqa: E402
+from src.train import MODEL_TARGETS, build_feature_matrix, holdout_split  # noqa: E402
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def predict(kind, model, X):
+    return model.predict(X) if kind == 'risk_model' else model.predict_proba(X)[:, 1]
+
+
+def measure(kind, backend, X, y, train_idx, test_idx, n_jobs, workdir):
+    start = time.perf_counter()
+    model = make_model(kind, backend, DEFAULT_PARAMS[backend], n_jobs=n_jobs).fit(X[train_idx], y[train_idx])
+    train_s = time.perf_counter() - start
+
+    path = os.path.join(workdir, f"{backend}_{kind}.pkl")
+    joblib.dump(model, path)
+    load_ms = statistics.median(timed(lambda: joblib.load(path), 3))
+
+    X_test, y_test = X[test_idx], y[test_idx]
+    row = X_test[:1]
+    predict(kind, model, row)  # first call pays any lazy initialisation
+    single = timed(lambda: predict(kind, model, row), 200)
+    batch_ms = statistics.median(timed(lambda: predict(kind, model, X_test), 5))
+
+    pred = predict(kind, model, X_test)
+    accuracy = r2_score(y_test, pred) if kind == 'risk_model' else roc_auc_score(y_test, pred)
+    return {
+        'train_s': train_s,
+        'size_mb': os.path.getsize(path) / 1e6,
+        'load_ms': load_ms,
+        'p50_ms': float(np.percentile(single, 50)),
+        'p99_ms': float(np.percentile(single, 99)),
+        'batch_ms': batch_ms,
+        'accuracy': accuracy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    backends = available_backends()
+    header = (f"{'backend':<10}{'train s':>9}{'MB':>8}{'load ms':>9}{'p50 ms':>9}"
+              f"{'p99 ms':>9}{'batch ms':>10}{'R²/AUC':>9}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            df, fingerprint = load_evaluation_data(synthetic_scale=scale)
+            matrix, _ = build_feature_matrix(df, fingerprint)
+            X = np.asarray(matrix.load_X())
+            train_idx, test_idx = holdout_split(df)
+            label = "real data" if scale == 1 else f"synthetic x{scale}"
+
+            for kind, target in MODEL_TARGETS.items():
+                y = np.asarray(matrix.load_target(target))
+                print(f"\n{kind}, {label}: {len(train_idx)} training / {len(test_idx)} held-out rows")
+                print(header)
+                for backend in backends:
+                    m = measure(kind, backend, X, y, train_idx, test_idx, args.n_jobs, workdir)
+                    print(f"{backend:<10}{m['train_s']:>9.2f}{m['size_mb']:>8.2f}{m['load_ms']:>9.1f}"
+                          f"{m['p50_ms']:>9.3f}{m['p99_ms']:>9.3f}{m['batch_ms']:>10.2f}{m['accuracy']:>9.4f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""
+Per-interaction latency of the Model Prediction page, before and after the
+page was split into fragments.
+
+Before: every widget change re-executed the whole page (models, dataset,
+folium map, inputs and results). The baseline runs that page from app.py as
+it was at BASELINE_COMMIT, read out of git into a temporary directory. When
+that commit is not in the checkout (a shallow or squashed clone) the
+baseline is skipped and speed-ups are against the current page run in full.
+After: only the fragment that owns the widget is re-executed. The current
+page run in full is listed too, for what the fragments save within it.
+
+Each scenario is run through Streamlit's AppTest so the timings include the
+script runner. AppTest always reruns the whole script, so a fragment rerun
+is timed as a script that calls just that fragment. Every scenario starts
+from a session that already holds a prediction, as it does once the user
+has pressed Predict; the results and export sections are empty without one.
+
+Usage (from the repository root):
+    python benchmarks/bench_prediction_fragments.py [--repeat 20] [--baseline-commit e557fc8]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# The last app.py before the prediction page was split into fragments
+BASELINE_COMMIT = "e557fc8"
+BASELINE = "page before fragments"
+
+SCRIPT_HEADER = f"""
+import sys
+sys.path.insert(0, {REPO_ROOT!r})
+import app
+"""
+
+PREDICT_SCRIPT = SCRIPT_HEADER + "app.model_prediction_page()"
+# What the page keeps in session_state between fragments once a prediction is made
+PREDICTION_STATE = ("pred_location", "pred_inputs", "pred_defaults_for", "pred_result")
+
+SCENARIOS = {
+    # The current page, every fragment executed
+    "whole page now": "app.model_prediction_page()",
+    # Month slider / number inputs / checkbox
+    "inputs fragment": "app.prediction_inputs_fragment(app.load_climatology())",
+    # District selectbox
+    "location fragment": """
+gazetteer, district_maps = app.load_district_reference()
+app.prediction_location_fragment(gazetteer, district_maps, app.load_climatology())
+""",
+    # Engine radios / Predict button; the export fragment runs nested inside it, as in the page
+    "results fragment": "app.prediction_results_fragment({name: app.load_model(name) for name in app.MODEL_NAMES})",
+    # Notes text area: only the nested export fragment reruns
+    "export fragment": "app.prediction_export_fragment()",
+}
+
+
+def baseline_script(commit, module_dir):
+    """
+    Write app.py at commit to module_dir as baseline_app.py and return the script
+    running its page, or None when the commit is not available.
+    """
+    try:
+        source = subprocess.run(["git", "show", f"{commit}:app.py"], cwd=REPO_ROOT, check=True,
+                                capture_output=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    with open(os.path.join(module_dir, "baseline_app.py"), "wb") as f:
+        f.write(source)
+    return f"""
+import sys
+sys.path.insert(0, {module_dir!r})
+import baseline_app
+baseline_app.model_prediction_page()
+"""
+
+
+def make_prediction():
+    """The session_state a press of the Predict button leaves behind."""
+    at = AppTest.from_string(PREDICT_SCRIPT, default_timeout=120)
+    at.run()
+    next(b for b in at.button if "Predict" in b.label).click().run()
+    # Widget keys are left out: AppTest cannot seed buttons, and the widgets start from their defaults
+    return {key: at.session_state[key] for key in PREDICTION_STATE}
+
+
+def time_scenario(script, repeat, state=None):
+    at = AppTest.from_string(script, default_timeout=120)
+    for key, value in (state or {}).items():
+        at.session_state[key] = value
+    at.run()  # warm imports, caches and models
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline-commit", default=BASELINE_COMMIT)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    state = make_prediction()
+    results = {}
+    with tempfile.TemporaryDirectory() as module_dir:
+        script = baseline_script(args.baseline_commit, module_dir)
+        if script is not None:
+            results[BASELINE] = time_scenario(script, args.repeat)
+        results.update({name: time_scenario(SCRIPT_HEADER + body, args.repeat, state)
+                        for name, body in SCENARIOS.items()})
+
+    if BASELINE in results:
+        reference = BASELINE
+        print(f"speed-up against the prediction page at {args.baseline_commit}")
+    else:
+        reference = "whole page now"
+        print(f"{args.baseline_commit} is not in this checkout; speed-up against the current page in full")
+    baseline = statistics.median(results[reference])
+
+    print(f"{'scenario':<24}{'p50 ms':>10}{'p90 ms':>10}{'speed-up':>10}")
+    for name, timings in results.items():
+        p50 = statistics.median(timings)
+        p90 = statistics.quantiles(timings, n=10)[-1]
+        print(f"{name:<24}{p50:>10.1f}{p90:>10.1f}{baseline / p50:>9.1f}x")
+
+if __name__ == "__main__":
+    sys.exit(main())
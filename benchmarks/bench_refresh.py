@@ -0,0 +1,90 @@
+"""
+Monthly incremental refresh versus a full retrain every month.
+
+A base artifact set is trained on every month before --start (default: the
+last year in the table). Then month by month, the next month is scored
+before any update (prequential risk MAE and fire AUC) and the models are
+brought up to date twice: with src/refresh.py (new rows plus the replay
+sample, warm-started trees) and with a full src/train.py retrain on the whole
+history so far. The real table or a scaled synthetic version of it
+(src/synthetic.py) is used, so the full retrain's growing cost can be seen
+against the refresh's flat one.
+
+Usage (from the repository root):
+    python benchmarks/bench_refresh.py [--start YEAR] [--months 6] [--scale 1]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import joblib
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.evaluate import load_evaluation_data  # noqa: E402
+from src.features import build_model_input  # noqa: E402
+from src.refresh import prequential_metrics, refresh  # noqa: E402
+from src.train import train  # noqa: E402
+
+
+def until(df, year, month):
+    return df[df['YEAR'] * 12 + df['MONTH'] <= year * 12 + month]
+
+
+def score_month(version_dir, frame):
+    """Prequential metrics of a version's models on a month they have not seen."""
+    models = {name: joblib.load(os.path.join(version_dir, f"{name}.pkl"))
+              for name in ["scaler", "district_encoder", "risk_model", "fire_model"]}
+    X = build_model_input(frame, models["scaler"], models["district_encoder"])
+    return prequential_metrics(models["risk_model"], models["fire_model"], X,
+                               frame['FireRisk'].to_numpy(), frame['Fire_Occurred'].to_numpy())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--start", type=int, default=None, help="year refreshed month by month (default: the last)")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--scale", type=int, default=1, help="synthetic copies of the history")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    df, _ = load_evaluation_data(synthetic_scale=args.scale)
+    args.start = args.start or int(df['YEAR'].max())
+    print(f"{len(df)} rows; base trained through {args.start - 1}-12")
+    print(f"{'month':<9}{'new rows':>9}{'refresh s':>11}{'full s':>8}{'MAE refresh':>13}{'MAE full':>10}"
+          f"{'AUC refresh':>13}{'AUC full':>10}")
+
+    nan = float('nan')
+    with tempfile.TemporaryDirectory() as workdir:
+        def save(frame, name):
+            path = os.path.join(workdir, name)
+            frame.to_csv(path, index=False)
+            return path
+
+        versions = os.path.join(workdir, "versions")
+        incremental, _ = train(save(until(df, args.start - 1, 12), "base.csv"), versions, search=False)
+        full = incremental
+        for month in range(1, args.months + 1):
+            new_rows = df[(df['YEAR'] == args.start) & (df['MONTH'] == month)]
+            history, new = save(until(df, args.start, month), "history.csv"), save(new_rows, "new.csv")
+            refresh_scores, full_scores = score_month(incremental, new_rows), score_month(full, new_rows)
+
+            start = time.perf_counter()
+            incremental, _, mode = refresh(incremental, history, new, versions, max_incremental_months=args.months)
+            refresh_s = time.perf_counter() - start
+            start = time.perf_counter()
+            full, _ = train(history, versions, search=False)
+            full_s = time.perf_counter() - start
+
+            print(f"{args.start}-{month:02d}{len(new_rows):>9}{refresh_s:>11.2f}{full_s:>8.2f}"
+                  f"{refresh_scores['risk_mae']:>13.4f}{full_scores['risk_mae']:>10.4f}"
+                  f"{refresh_scores.get('fire_auc', nan):>13.4f}{full_scores.get('fire_auc', nan):>10.4f}"
+                  + ("" if mode == "incremental" else f"  ({mode})"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
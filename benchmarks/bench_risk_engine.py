@@ -0,0 +1,63 @@
+"""
+Scoring latency of the closed-form FireRisk engine versus the random forest.
+
+Both engines score the same rows of the combined dataset (tiled for the
+larger batches). The forest timings include building and scaling the
+feature frame, since bulk callers have to do that too.
+
+Usage (from the repository root):
+    python benchmarks/bench_risk_engine.py [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.risk_engine import (ClosedFormRiskEngine, ForestRiskEngine,  # noqa: E402
+                             agreement_report, format_report)
+
+BATCH_SIZES = [1, 100, 4464, 100_000]
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    data = pd.read_csv(os.path.join("data", "processed", "combined_fire_climate.csv"))
+    data['DISTRICT'] = data['DISTRICT'].str.lower().str.strip()
+
+    formula = ClosedFormRiskEngine()
+    forest = ForestRiskEngine(*(joblib.load(os.path.join("models", f"{name}.pkl"))
+                                for name in ['risk_model', 'scaler', 'district_encoder']))
+
+    print(format_report(agreement_report(formula.score(data), forest.score(data))))
+    print()
+    print(f"{'rows':>8}{'forest ms':>12}{'formula ms':>12}{'speed-up':>10}")
+    for size in BATCH_SIZES:
+        batch = data.sample(n=size, replace=size > len(data), random_state=0).reset_index(drop=True)
+        forest_ms = timed(lambda: forest.score(batch), args.repeat)
+        formula_ms = timed(lambda: formula.score(batch), args.repeat)
+        print(f"{size:>8}{forest_ms:>12.2f}{formula_ms:>12.3f}{forest_ms / formula_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Cost of the interpolated risk surface (src/risk_surface.py).
+
+For a range of grid resolutions: the KD-tree IDW over every cell at once,
+the same interpolation with a dense (cells x districts) distance matrix as
+a reference, the uint8 encoding's size and the PNG overlay's size.
+
+Usage (from the repository root):
+    python benchmarks/bench_risk_surface.py [--resolutions 0.1 0.05 0.025 0.01]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.risk_surface import (IDW_NEIGHBOURS, IDW_POWER, decode, grid_axes,  # noqa: E402
+                              interpolate_surface, surface_png)
+from src.spatial import DistrictIndex, district_centroids  # noqa: E402
+from src.train import load_training_frame  # noqa: E402
+
+
+def dense_idw(index, values, lon, lat, k=IDW_NEIGHBOURS, power=IDW_POWER):
+    """Every cell against every centroid, keeping the k nearest by a full sort."""
+    lon_grid, lat_grid = np.meshgrid(lon, lat)
+    cells = index.project(lat_grid.ravel(), lon_grid.ravel())
+    km = np.linalg.norm(cells[:, None, :] - index.tree.data[None, :, :], axis=2)
+    idx = np.argsort(km, axis=1)[:, :k]
+    km = np.take_along_axis(km, idx, axis=1)
+    weights = 1 / np.maximum(km, 1e-6) ** power
+    return ((weights * values[idx]).sum(axis=1) / weights.sum(axis=1)).reshape(lat_grid.shape)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--resolutions", type=float, nargs="+", default=[0.1, 0.05, 0.025, 0.01])
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    index = DistrictIndex.from_frame(district_centroids(load_training_frame()))
+    values = np.random.default_rng(0).uniform(0, 45, len(index.names))
+    print(f"{'degrees':>8}{'cells':>9}{'kd-tree s':>11}{'dense s':>9}{'max diff':>10}{'uint8 KB':>10}{'png KB':>8}")
+    for resolution in args.resolutions:
+        surface, tree_seconds = timed(lambda: interpolate_surface(index, values, (0, 45), resolution=resolution))
+        lon, lat = grid_axes(resolution=resolution)
+        dense, dense_seconds = timed(lambda: dense_idw(index, values, lon, lat))
+        # The surface is quantised to 255 levels, so expect differences up to half a level
+        diff = np.nanmax(np.abs(decode(surface) - dense))
+        png = surface_png(surface)
+        print(f"{resolution:>8}{dense.size:>9}{tree_seconds:>11.3f}{dense_seconds:>9.3f}{diff:>10.3f}"
+              f"{surface['codes'].nbytes / 1024:>10.1f}{len(png) / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Cost of the Monte Carlo scenario mode (src/scenarios.py) for every district.
+
+Times sampling plus batched scoring for a range of samples per district,
+with the default engines (formula + forest fire model), the trained forests
+for both, and formula + compact fire model. Rows/s counts every
+(district, sample) pair scored by both engines.
+
+Usage (from the repository root):
+    python benchmarks/bench_scenarios.py [--samples 250 1000 5000] [--month 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.climate_archive import read_climate_archive  # noqa: E402
+from src.climatology import build_climatology  # noqa: E402
+from src.fire_engine import CompactFireEngine, ForestFireEngine  # noqa: E402
+from src.gazetteer import build_gazetteer  # noqa: E402
+from src.risk_engine import ClosedFormRiskEngine, ForestRiskEngine  # noqa: E402
+from src.scenarios import anomaly_correlation, simulate  # noqa: E402
+from src.train import COMBINED_DATA_PATH, MODEL_DIR  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--samples", type=int, nargs="+", default=[250, 1000, 5000])
+    parser.add_argument("--month", type=int, default=4)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    archive = read_climate_archive()
+    climatology = build_climatology(archive)
+    correlation = anomaly_correlation(archive)
+    gazetteer = build_gazetteer(pd.read_csv(COMBINED_DATA_PATH))
+    locations = {name: gazetteer.centroid(name) for name in gazetteer.located_names()}
+
+    def load(name):
+        return joblib.load(os.path.join(MODEL_DIR, f"{name}.pkl"), mmap_mode='r')
+
+    scaler, encoder = load("scaler"), load("district_encoder")
+    forest_risk = ForestRiskEngine(load("risk_model"), scaler, encoder)
+    forest_fire = ForestFireEngine(load("fire_model"), scaler, encoder)
+    engines = [("formula + forest", ClosedFormRiskEngine(), forest_fire),
+               ("forest + forest", forest_risk, forest_fire)]
+    if os.path.exists(os.path.join(MODEL_DIR, "fire_model_compact.pkl")):
+        engines.append(("formula + compact", ClosedFormRiskEngine(), CompactFireEngine(load("fire_model_compact"))))
+
+    print(f"{len(locations)} districts, month {args.month}")
+    print(f"{'engines':<20}{'samples':>9}{'rows':>10}{'seconds':>9}{'rows/s':>11}")
+    for label, risk_engine, fire_engine in engines:
+        for samples in args.samples:
+            start = time.perf_counter()
+            result = simulate(climatology, locations, args.month, {'samples': samples}, correlation,
+                              risk_engine, fire_engine, scaler, encoder)
+            seconds = time.perf_counter() - start
+            rows = result['risk'].size
+            print(f"{label:<20}{samples:>9}{rows:>10}{seconds:>9.2f}{rows / seconds:>11.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
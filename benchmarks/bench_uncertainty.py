@@ -0,0 +1,84 @@
+"""
+Point prediction versus prediction with per-tree spread.
+
+For the trained risk_model and fire_model forests in models/, compares
+sklearn's predict / predict_proba (the app's previous single prediction),
+a loop over estimators (the straightforward way to get per-tree outputs)
+and TreeStack.summarize (src/uncertainty.py), which returns the point
+prediction together with std and interval bounds. Single-row p50/p99 and
+whole-table batch latency, plus the largest difference from sklearn's point
+prediction.
+
+Usage (from the repository root):
+    python benchmarks/bench_uncertainty.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.features import build_model_input  # noqa: E402
+from src.train import MODEL_DIR, load_training_frame  # noqa: E402
+from src.uncertainty import TreeStack  # noqa: E402
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    os.chdir(REPO_ROOT)
+    df = load_training_frame()
+    scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
+    encoder = joblib.load(os.path.join(MODEL_DIR, "district_encoder.pkl"))
+    X = build_model_input(df, scaler, encoder)
+    row = X[:1]
+
+    print(f"{len(X)} rows")
+    print(f"{'model':<11}{'method':<18}{'p50 ms':>9}{'p99 ms':>9}{'batch ms':>10}{'max diff':>11}")
+    for name in ["risk_model", "fire_model"]:
+        model = joblib.load(os.path.join(MODEL_DIR, f"{name}.pkl"), mmap_mode='r')
+        if name == "risk_model":
+            def point(data):
+                return model.predict(data)
+        else:
+            def point(data):
+                return model.predict_proba(data)[:, 1]
+
+        def per_estimator(data):
+            # Trees see float32, as inside the forest
+            data = np.asarray(data, dtype=np.float32)
+            if name == "risk_model":
+                return np.column_stack([tree.predict(data) for tree in model.estimators_]).mean(axis=1)
+            return np.column_stack([tree.predict_proba(data)[:, 1] for tree in model.estimators_]).mean(axis=1)
+
+        start = time.perf_counter()
+        stack = TreeStack(model)
+        print(f"{name:<11}{'(build stack)':<18}{(time.perf_counter() - start) * 1000:>9.1f}")
+
+        reference = point(X)
+        methods = [("predict", point), ("estimator loop", per_estimator),
+                   ("TreeStack", lambda data: stack.summarize(data)['value'])]
+        for label, func in methods:
+            func(row)
+            single = timed(lambda: func(row), 200)
+            batch_ms = statistics.median(timed(lambda: func(X), 5))
+            diff = float(np.max(np.abs(func(X) - reference)))
+            print(f"{'':<11}{label:<18}{np.percentile(single, 50):>9.3f}{np.percentile(single, 99):>9.3f}"
+                  f"{batch_ms:>10.1f}{diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Latency of fetching current weather for every district.
+
+Runs the WeatherService against the local stand-in server (with an artificial
+per-request delay standing in for network latency) and compares:
+    sequential   one request after another, the way a per-district loop would
+    concurrent   all districts at once from a new service, opening its connections
+    warm pool    the same on a long-lived service whose connections are already open
+    cached       the same call again within the TTL
+    outage       a server that never answers, bounded by the timeout
+
+Usage (from the repository root):
+    python benchmarks/bench_weather_provider.py [--delay 0.1] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from src.climate_archive import read_climate_archive  # noqa: E402
+from src.climatology import build_climatology  # noqa: E402
+from src.gazetteer import normalize_district  # noqa: E402
+from src.weather import JsonHttpProvider, WeatherService  # noqa: E402
+from src.weather_stub_server import StubServer  # noqa: E402
+
+
+def district_locations(archive):
+    first = archive.drop_duplicates('DISTRICT')
+    return {normalize_district(d): (lat, lon) for d, lat, lon in zip(first['DISTRICT'], first['LAT'], first['LON'])}
+
+
+def sequential(service, locations, month):
+    # One district at a time, as a per-district loop over the provider would do
+    async def run():
+        results = {}
+        for district, location in locations.items():
+            results.update(await service._fetch_all({district: location}))
+        return results
+    return service._run(run())
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--delay", type=float, default=0.1, help="stub server delay per request (s)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    archive = read_climate_archive()
+    climatology = build_climatology(archive)
+    locations = district_locations(archive)
+    month = 4
+
+    services = []
+    with StubServer(delay=args.delay) as server:
+        provider = JsonHttpProvider(server.url)
+
+        def fresh_service(**kwargs):
+            services.append(WeatherService(provider, climatology, **kwargs))
+            return services[-1]
+
+        cached_service = fresh_service()
+        cached_service.get_current(locations, month)
+
+        def warm_pool():
+            # An expired cache on a long-lived service: the pooled connections are reused
+            cached_service.clear()
+            cached_service.get_current(locations, month)
+
+        results = {
+            "sequential": timed(lambda: sequential(fresh_service(), locations, month), args.repeat),
+            "concurrent": timed(lambda: fresh_service().get_current(locations, month), args.repeat),
+            "warm pool": timed(warm_pool, args.repeat),
+            "cached": timed(lambda: cached_service.get_current(locations, month), args.repeat),
+        }
+
+        answers = fresh_service().get_current(locations, month)
+        sources = {entry["source"] for entry in answers.values()}
+        for service in services:
+            service.close()
+
+    # Nothing listens on the discard port, so every lookup fails fast and falls back
+    with WeatherService(JsonHttpProvider("http://127.0.0.1:9"), climatology, timeout=1.0) as outage_service:
+        results["outage"] = timed(lambda: outage_service.get_current(locations, month), 1)
+        fallback_sources = {entry["source"] for entry in outage_service.get_current(locations, month).values()}
+
+    print(f"{len(locations)} districts, {args.delay * 1000:.0f} ms per request")
+    print(f"sources: {sorted(sources)}; during outage: {sorted(fallback_sources)}")
+    baseline = statistics.median(results["sequential"])
+    print(f"{'scenario':<14}{'p50 ms':>10}{'speed-up':>10}")
+    for name, timings in results.items():
+        p50 = statistics.median(timings)
+        print(f"{name:<14}{p50:>10.1f}{baseline / max(p50, 1e-3):>9.1f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
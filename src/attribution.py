@@ -0,0 +1,97 @@
+"""
+Tree-path feature attributions for the forests and the FireRisk formula.
+
+Following a row down a decision tree, every split moves the node value (the
+mean target, or P(fire) for the classifier) from the parent's to the
+child's; that change is credited to the feature the parent split on. Summed
+over the path and averaged over the trees, the credits plus the mean root
+value (the bias) add up exactly to the forest's prediction.
+
+PathAttributor precomputes those per-node credits as a sparse
+(node x feature group) matrix, so attributing any number of rows is one
+sparse product with the rows' path indicator (src/uncertainty.py
+TreeStack.path_indicator). The district one-hot columns and coordinates are
+credited together as "District", the two cyclical month columns as
+"Month", and the feature store's features (models trained with
+--lag-features) as "Preceding months" and "Neighbouring districts".
+formula_attributions does the same for ClosedFormRiskEngine,
+where each input's credit is its weight times its distance from a
+reference value.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from src.conditional_probability import VARIABLE_LABELS
+from src.feature_store import LAG_FEATURES
+from src.features import BASE_FEATURES
+from src.risk_engine import RISK_INTERCEPT, RISK_WEIGHTS
+from src.uncertainty import TreeStack
+
+
+MONTH_FEATURES = ['Month_sin', 'Month_cos']
+LOCATION_FEATURES = ['LAT', 'LON']
+
+ATTRIBUTION_GROUPS = [VARIABLE_LABELS[var] for var in BASE_FEATURES
+                      if var not in MONTH_FEATURES + LOCATION_FEATURES] + ["Month", "District"]
+
+# Only columns for models that have feature-store features
+LAG_GROUP = "Preceding months"
+NEIGHBOUR_GROUP = "Neighbouring districts"
+
+
+def feature_group(feature):
+    if feature in MONTH_FEATURES:
+        return "Month"
+    if feature in LOCATION_FEATURES or feature.startswith("DISTRICT_"):
+        return "District"
+    if feature in LAG_FEATURES:
+        return NEIGHBOUR_GROUP if LAG_FEATURES[feature][0].startswith("neighbour") else LAG_GROUP
+    return VARIABLE_LABELS[feature]
+
+
+class PathAttributor:
+    """Per-node split credits of one forest, grouped by ATTRIBUTION_GROUPS (plus the store's groups if used)."""
+
+    def __init__(self, forest, feature_names, tree_stack=None):
+        stack = tree_stack or TreeStack(forest)
+        self.stack = stack
+        internal = np.flatnonzero(~stack.is_leaf)
+        parent = np.full(len(stack.value), -1)
+        parent[stack.left[internal]] = internal
+        parent[stack.right[internal]] = internal
+        children = np.flatnonzero(parent >= 0)
+
+        used = {feature_group(name) for name in feature_names}
+        self.groups = ATTRIBUTION_GROUPS + [group for group in [LAG_GROUP, NEIGHBOUR_GROUP] if group in used]
+        group_index = {group: i for i, group in enumerate(self.groups)}
+        feature_groups = np.array([group_index[feature_group(name)] for name in feature_names])
+        credit = (stack.value[children] - stack.value[parent[children]]) / stack.n_trees
+        self.credits = csr_matrix((credit, (children, feature_groups[stack.feature[parent[children]]])),
+                                  shape=(len(stack.value), len(self.groups)))
+        self.bias = float(stack.value[stack.roots].mean())
+
+    def explain(self, X):
+        """(bias, frame of per-group credits), one row per row of X; bias + credits sum to the prediction."""
+        credits = np.asarray((self.stack.path_indicator(X) @ self.credits).todense())
+        return self.bias, pd.DataFrame(credits, columns=self.groups)
+
+
+def formula_attributions(frame, reference=None):
+    """The FireRisk formula split into weight x (input - reference) per input; exact by linearity."""
+    reference = reference or {var: 0.0 for var in RISK_WEIGHTS}
+    bias = RISK_INTERCEPT + sum(weight * reference[var] for var, weight in RISK_WEIGHTS.items())
+    credits = pd.DataFrame(0.0, index=range(len(frame)), columns=ATTRIBUTION_GROUPS)
+    for var, weight in RISK_WEIGHTS.items():
+        credits[VARIABLE_LABELS[var]] = weight * (frame[var].to_numpy(dtype=float) - reference[var])
+    return bias, credits
+
+
+def top_drivers(credits, n=3):
+    """The n largest absolute credits of each row, as 'label (+x.xx)' strings."""
+    drivers = []
+    for _, row in credits.iterrows():
+        ranked = row.reindex(row.abs().sort_values(ascending=False).index)[:n]
+        drivers.append(", ".join(f"{label} ({value:+.2f})" for label, value in ranked.items()))
+    return drivers
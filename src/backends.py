@@ -0,0 +1,67 @@
+"""
+Model backends for risk_model and fire_model.
+
+"forest" is the scikit-learn RandomForest the notebook trains. "xgboost" and
+"lightgbm" are histogram-based gradient boosting through their scikit-learn
+wrappers, so the pickles they produce expose the same predict /
+predict_proba interface and are served by the existing engines unchanged.
+The boosting libraries are imported only when their backend is used.
+"""
+
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+
+BACKENDS = ['forest', 'xgboost', 'lightgbm']
+
+BACKEND_LABELS = {
+    'forest': 'Random forest',
+    'xgboost': 'XGBoost',
+    'lightgbm': 'LightGBM',
+}
+
+# forest matches src/models.ipynb; the boosting defaults are the usual hist-GBM starting points
+DEFAULT_PARAMS = {
+    'forest': {'n_estimators': 100, 'max_depth': None, 'min_samples_leaf': 1},
+    'xgboost': {'n_estimators': 300, 'max_depth': 6, 'learning_rate': 0.1},
+    'lightgbm': {'n_estimators': 300, 'num_leaves': 31, 'learning_rate': 0.05},
+}
+
+SEARCH_GRIDS = {
+    'forest': {'n_estimators': [100, 200], 'max_depth': [None, 16], 'min_samples_leaf': [1, 3]},
+    'xgboost': {'n_estimators': [200, 400], 'max_depth': [4, 6], 'learning_rate': [0.05, 0.1]},
+    'lightgbm': {'n_estimators': [200, 400], 'num_leaves': [15, 31], 'learning_rate': [0.05, 0.1]},
+}
+
+
+def available_backends():
+    found = ['forest']
+    for name in ['xgboost', 'lightgbm']:
+        try:
+            __import__(name)
+        except ImportError:
+            continue
+        found.append(name)
+    return found
+
+
+def make_model(kind, backend, params, n_jobs=1, random_state=42):
+    """An unfitted regressor (risk_model) or classifier (fire_model)."""
+    regression = kind == 'risk_model'
+    if backend == 'forest':
+        model_cls = RandomForestRegressor if regression else RandomForestClassifier
+        return model_cls(random_state=random_state, n_jobs=n_jobs, **params)
+    if backend == 'xgboost':
+        import xgboost
+        model_cls = xgboost.XGBRegressor if regression else xgboost.XGBClassifier
+        return model_cls(tree_method='hist', random_state=random_state, n_jobs=n_jobs, **params)
+    if backend == 'lightgbm':
+        import lightgbm
+        model_cls = lightgbm.LGBMRegressor if regression else lightgbm.LGBMClassifier
+        return model_cls(random_state=random_state, n_jobs=n_jobs, verbose=-1, **params)
+    raise ValueError(f"Unknown model backend: {backend}")
+
+
+def backend_of(model):
+    """Which backend a fitted model came from, judged by its class's module."""
+    module = type(model).__module__.split('.')[0]
+    return module if module in BACKEND_LABELS else 'forest'
@@ -0,0 +1,81 @@
+"""
+Year-range slices of the district-wise monthly MERRA2 climate archive.
+
+The raw archive covers 1981-2019. Only the needed columns are parsed
+(usecols + fixed dtypes), renamed to the names the app and models use, and
+any year range is then a cheap boolean slice of that projection.
+
+PRECTOT is a monthly total in mm up to 2017 and a mean daily rate in mm/day
+from PRECTOT_RATE_FROM_YEAR on; those rows are multiplied by the days in
+their month, so Prep is a monthly total throughout.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+CLIMATE_ARCHIVE_PATH = os.path.join("data", "raw", "climate_data_nepal_district_wise_monthly.csv")
+
+ID_COLUMNS = ['YEAR', 'MONTH', 'DISTRICT', 'LAT', 'LON']
+
+# Archive columns used by the app and the models, with their short names
+CORE_COLUMNS = {
+    'PRECTOT': 'Prep',
+    'T2M': 'AvgTemp',
+    'T2M_MAX': 'MaxTemp',
+    'RH2M': 'Humidity',
+    'WS10M': 'WindSpeed',
+}
+
+CLIMATE_VARIABLES = list(CORE_COLUMNS.values())
+
+# The other archive fields, available on request under their original names
+EXTRA_COLUMNS = ['PS', 'QV2M', 'T2MWET', 'T2M_MIN', 'T2M_RANGE', 'TS',
+                 'WS10M_MAX', 'WS10M_MIN', 'WS10M_RANGE',
+                 'WS50M', 'WS50M_MAX', 'WS50M_MIN', 'WS50M_RANGE']
+
+DEFAULT_YEAR_RANGE = (2012, 2017)
+
+# First year whose PRECTOT is a daily rate rather than a monthly total
+PRECTOT_RATE_FROM_YEAR = 2018
+
+
+def read_climate_archive(path=CLIMATE_ARCHIVE_PATH, extra_columns=()):
+    """Parse the archive with the column projection applied at parse time."""
+    unknown = set(extra_columns) - set(EXTRA_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown climate columns: {sorted(unknown)}")
+
+    value_columns = list(CORE_COLUMNS) + list(extra_columns)
+    dtypes = {'YEAR': np.int16, 'MONTH': np.int8, 'DISTRICT': str, 'LAT': float, 'LON': float}
+    dtypes.update({col: float for col in value_columns})
+
+    df = pd.read_csv(path, usecols=ID_COLUMNS + value_columns, dtype=dtypes)
+    df = df[ID_COLUMNS + value_columns].rename(columns=CORE_COLUMNS)
+    # Keep the int64 year/month the processed tables have always used
+    df['YEAR'] = df['YEAR'].astype(np.int64)
+    df['MONTH'] = df['MONTH'].astype(np.int64)
+
+    rate = (df['YEAR'] >= PRECTOT_RATE_FROM_YEAR).to_numpy()
+    days = pd.to_datetime(pd.DataFrame({'year': df['YEAR'], 'month': df['MONTH'], 'day': 1})).dt.days_in_month
+    df.loc[rate, 'Prep'] = df.loc[rate, 'Prep'] * days[rate]
+    return df
+
+
+def slice_years(archive, start_year, end_year):
+    """Rows of the parsed archive with start_year <= YEAR <= end_year."""
+    if start_year > end_year:
+        raise ValueError(f"Empty year range: {start_year}-{end_year}")
+    years = archive['YEAR'].to_numpy()
+    return archive[(years >= start_year) & (years <= end_year)].reset_index(drop=True)
+
+
+def year_bounds(archive):
+    return int(archive['YEAR'].min()), int(archive['YEAR'].max())
+
+
+def period_label(year_range):
+    start_year, end_year = year_range
+    return str(start_year) if start_year == end_year else f"{start_year}-{end_year}"
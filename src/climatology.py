@@ -0,0 +1,81 @@
+"""
+District x month climatology of the five model inputs.
+
+Built once from the raw monthly archive with grouped (vectorized) mean, std
+and quantile reductions, then stored as a dict keyed by (district, month)
+so the prediction page can look up defaults and anomaly baselines in O(1).
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.climate_archive import CLIMATE_VARIABLES, slice_years
+from src.gazetteer import normalize_district
+
+
+PERCENTILES = (10, 50, 90)
+
+
+class Climatology:
+    """Per (district, month) statistics: {var: {"mean", "std", "p10", "p50", "p90"}}."""
+
+    def __init__(self, table, period):
+        self.table = table          # long DataFrame, one row per district/month
+        self.period = period        # (first_year, last_year) it was computed over
+        self.records = {}
+        for row in table.to_dict('records'):
+            key = (row['DISTRICT'], int(row['MONTH']))
+            self.records[key] = {
+                var: {stat: row[f"{var}_{stat}"] for stat in self.statistics()}
+                for var in CLIMATE_VARIABLES
+            }
+
+    @staticmethod
+    def statistics():
+        return ['mean', 'std'] + [f"p{p}" for p in PERCENTILES]
+
+    def lookup(self, district, month):
+        return self.records.get((normalize_district(district), int(month)))
+
+    def defaults(self, district, month):
+        """Climatological mean of each input, or None if the district is unknown."""
+        record = self.lookup(district, month)
+        if record is None:
+            return None
+        return {var: record[var]['mean'] for var in CLIMATE_VARIABLES}
+
+    def anomalies(self, district, month, values):
+        """Difference from the mean and z-score for each supplied variable."""
+        record = self.lookup(district, month)
+        if record is None:
+            return {}
+        result = {}
+        for var, value in values.items():
+            if var not in record:
+                continue
+            stats = record[var]
+            delta = value - stats['mean']
+            std = stats['std']
+            result[var] = {
+                'delta': delta,
+                'z': delta / std if std and not np.isnan(std) and std > 0 else np.nan,
+            }
+        return result
+
+
+def build_climatology(archive, year_range=None):
+    """Group the parsed climate archive by district and month in one pass."""
+    if year_range is not None:
+        archive = slice_years(archive, *year_range)
+    data = archive[['DISTRICT', 'MONTH'] + CLIMATE_VARIABLES].copy()
+    data['DISTRICT'] = data['DISTRICT'].map(normalize_district)
+
+    grouped = data.groupby(['DISTRICT', 'MONTH'])[CLIMATE_VARIABLES]
+    parts = [grouped.mean().add_suffix('_mean'), grouped.std().add_suffix('_std')]
+    quantiles = grouped.quantile([p / 100 for p in PERCENTILES]).unstack()
+    quantiles.columns = [f"{var}_p{round(q * 100)}" for var, q in quantiles.columns]
+    parts.append(quantiles)
+
+    table = pd.concat(parts, axis=1).reset_index()
+    period = (int(archive['YEAR'].min()), int(archive['YEAR'].max()))
+    return Climatology(table, period)
@@ -0,0 +1,79 @@
+"""
+Fire-occurrence statistics over 2D bins of any two climate variables.
+
+Binning follows pd.cut(values, bins=n): n equal-width, right-closed intervals
+whose lowest edge is pushed down by 0.1% of the range. All cells are filled
+with one np.bincount per statistic instead of a groupby/apply per cell.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+VARIABLE_LABELS = {
+    'Prep': 'Precipitation',
+    'AvgTemp': 'Temperature',
+    'MaxTemp': 'Max Temperature',
+    'Humidity': 'Humidity',
+    'WindSpeed': 'Wind Speed',
+}
+
+
+def bin_edges(values, bins):
+    """Equal-width edges matching pd.cut(values, bins)."""
+    lo, hi = float(np.nanmin(values)), float(np.nanmax(values))
+    if lo == hi:
+        # pd.cut widens a constant range by 0.1% on each side
+        adj = abs(lo) * 0.001 if lo != 0 else 0.001
+        return np.linspace(lo - adj, hi + adj, bins + 1)
+    edges = np.linspace(lo, hi, bins + 1)
+    edges[0] -= (hi - lo) * 0.001
+    return edges
+
+
+def bin_index(values, edges):
+    # Right-closed intervals: (edges[i], edges[i + 1]] -> i
+    idx = np.searchsorted(edges, values, side='left') - 1
+    return np.clip(idx, 0, len(edges) - 2)
+
+
+def interval_labels(edges, precision=3):
+    return pd.IntervalIndex.from_breaks(np.round(edges, precision), closed='right')
+
+
+def conditional_fire_table(df, x_var, y_var, x_bins=5, y_bins=5):
+    """
+    Fire probability, sample counts and mean FRP for every (y_var, x_var) cell.
+
+    Returns a dict of DataFrames indexed by y_var intervals with x_var interval
+    columns, the same layout as groupby([y_bin, x_bin]).unstack() produced.
+    Cells without samples are NaN.
+    """
+    data = df[[x_var, y_var, 'Fire_Count', 'FRP']].dropna()
+    x = data[x_var].to_numpy(dtype=float)
+    y = data[y_var].to_numpy(dtype=float)
+
+    x_edges = bin_edges(x, x_bins)
+    y_edges = bin_edges(y, y_bins)
+    cell = bin_index(y, y_edges) * x_bins + bin_index(x, x_edges)
+
+    n_cells = x_bins * y_bins
+    counts = np.bincount(cell, minlength=n_cells).astype(float)
+    fires = np.bincount(cell, weights=(data['Fire_Count'].to_numpy() > 0), minlength=n_cells)
+    frp_sum = np.bincount(cell, weights=data['FRP'].to_numpy(dtype=float), minlength=n_cells)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        probability = np.where(counts > 0, fires / counts, np.nan)
+        mean_frp = np.where(counts > 0, frp_sum / counts, np.nan)
+
+    index = interval_labels(y_edges)
+    columns = interval_labels(x_edges)
+
+    def frame(values):
+        return pd.DataFrame(values.reshape(y_bins, x_bins), index=index, columns=columns)
+
+    return {
+        'probability': frame(probability),
+        'count': frame(counts),
+        'mean_frp': frame(mean_frp),
+    }
@@ -0,0 +1,160 @@
+"""
+Distil the fire-occurrence forest into a compact student model.
+
+The teacher (models/fire_model.pkl) labels the rows it was trained on, plus
+jittered copies of them, with its P(fire). A shallow gradient-boosted
+regressor is fitted to those soft labels on compact features (see
+src/fire_engine.py) and saved as models/fire_model_compact.pkl.
+
+The report compares teacher and student on the rows the notebook held out
+(the same train_test_split, random_state=42): artifact size, load time,
+single-row p50/p99 and batch latency, AUC, Brier score and calibration error
+against the observed fires, and how closely the student tracks the teacher.
+The student is only saved when it meets the latency/accuracy budget.
+
+    python -m src.distill [--max-p99-ms 5] [--min-auc-ratio 0.97] [--force]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import brier_score_loss, roc_auc_score
+
+from src.features import INPUT_COLUMNS
+from src.fire_engine import (CompactFireEngine, CompactFireModel, ForestFireEngine, student_feature_matrix,
+                             COMPACT_MODEL_NAME, FOREST_MODEL_NAME)
+from src.synthetic import jitter_climate
+from src.train import holdout_split, load_training_frame, MODEL_DIR
+
+
+# Jittered copies of each training row, and the jitter in district-month standard deviations
+AUGMENT_COPIES = 10
+AUGMENT_SCALE = 0.5
+
+STUDENT_PARAMS = {'max_depth': 4, 'max_iter': 200, 'learning_rate': 0.1, 'random_state': 0}
+
+
+def augment(frame, copies=AUGMENT_COPIES, scale=AUGMENT_SCALE, seed=0):
+    """Copies of the rows with each climate input nudged by its district-month spread."""
+    repeated = frame.loc[np.repeat(frame.index, copies)].reset_index(drop=True)
+    return jitter_climate(repeated, scale, np.random.default_rng(seed))
+
+
+def train_student(teacher, train_frame):
+    transfer = pd.concat([train_frame, augment(train_frame)], ignore_index=True)
+    soft_labels = teacher.probability(transfer[INPUT_COLUMNS])
+    regressor = HistGradientBoostingRegressor(**STUDENT_PARAMS)
+    regressor.fit(student_feature_matrix(transfer), soft_labels)
+    return CompactFireModel(regressor, teacher_info={'transfer_rows': len(transfer)})
+
+
+def expected_calibration_error(y_true, p, bins=10):
+    idx = np.minimum((p * bins).astype(int), bins - 1)
+    counts = np.bincount(idx, minlength=bins)
+    observed = np.bincount(idx, weights=y_true, minlength=bins)
+    predicted = np.bincount(idx, weights=p, minlength=bins)
+    nonzero = counts > 0
+    return float(np.sum(np.abs(observed[nonzero] - predicted[nonzero])) / len(p))
+
+
+def time_calls(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.asarray(timings)
+
+
+def measure(engine, path, load, test_frame, y_true, repeat=200):
+    row = test_frame.iloc[[0]]
+    engine.probability(row)  # first call pays any lazy initialisation
+    single = time_calls(lambda: engine.probability(row), repeat)
+    p = engine.probability(test_frame)
+    return {
+        'size_mb': os.path.getsize(path) / 1e6,
+        'load_ms': float(np.median(time_calls(load, 3))),
+        'p50_ms': float(np.percentile(single, 50)),
+        'p99_ms': float(np.percentile(single, 99)),
+        'batch_ms': float(np.median(time_calls(lambda: engine.probability(test_frame), 5))),
+        'auc': float(roc_auc_score(y_true, p)),
+        'brier': float(brier_score_loss(y_true, p)),
+        'ece': expected_calibration_error(y_true, p),
+        'probabilities': p,
+    }
+
+
+def format_report(teacher, student, rows):
+    lines = [f"held-out rows: {rows}", f"{'':<16}{'teacher':>12}{'student':>12}"]
+    for key, label, fmt in [
+        ('size_mb', 'artifact MB', '{:.2f}'),
+        ('load_ms', 'load ms', '{:.1f}'),
+        ('p50_ms', 'p50 ms (1 row)', '{:.3f}'),
+        ('p99_ms', 'p99 ms (1 row)', '{:.3f}'),
+        ('batch_ms', 'batch ms', '{:.2f}'),
+        ('auc', 'AUC', '{:.4f}'),
+        ('brier', 'Brier', '{:.4f}'),
+        ('ece', 'ECE', '{:.4f}'),
+    ]:
+        lines.append(f"{label:<16}{fmt.format(teacher[key]):>12}{fmt.format(student[key]):>12}")
+    tp, sp = teacher['probabilities'], student['probabilities']
+    lines.append(f"student vs teacher: MAE {np.mean(np.abs(tp - sp)):.4f}, "
+                 f"AUC on teacher labels {roc_auc_score(tp > 0.5, sp):.4f}, "
+                 f"decision agreement {np.mean((tp > 0.5) == (sp > 0.5)):.2%}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--max-p99-ms", type=float, default=5.0,
+                        help="budget for single-row p99 latency of the student")
+    parser.add_argument("--min-auc-ratio", type=float, default=0.97,
+                        help="student AUC must be at least this fraction of the teacher's")
+    parser.add_argument("--force", action="store_true", help="save the student even if it misses the budget")
+    args = parser.parse_args(argv)
+
+    df = load_training_frame()
+    teacher_path = os.path.join(MODEL_DIR, f"{FOREST_MODEL_NAME}.pkl")
+    student_path = os.path.join(MODEL_DIR, f"{COMPACT_MODEL_NAME}.pkl")
+    teacher = ForestFireEngine(*(joblib.load(os.path.join(MODEL_DIR, f"{name}.pkl"))
+                                 for name in [FOREST_MODEL_NAME, 'scaler', 'district_encoder']))
+
+    train_idx, test_idx = holdout_split(df)
+    start = time.perf_counter()
+    student_model = train_student(teacher, df.iloc[train_idx].reset_index(drop=True))
+    print(f"student trained on {student_model.teacher_info['transfer_rows']} teacher-labelled rows "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    # Measure from a scratch file so a budget miss never touches the served artifact
+    candidate_path = student_path + ".candidate"
+    joblib.dump(student_model, candidate_path)
+
+    test_frame = df.iloc[test_idx].reset_index(drop=True)
+    y_true = test_frame['Fire_Occurred'].to_numpy()
+    teacher_stats = measure(teacher, teacher_path, lambda: joblib.load(teacher_path),
+                            test_frame[INPUT_COLUMNS], y_true)
+    student_stats = measure(CompactFireEngine(student_model), candidate_path, lambda: joblib.load(candidate_path),
+                            test_frame[INPUT_COLUMNS], y_true)
+    print(format_report(teacher_stats, student_stats, len(test_frame)))
+
+    within_budget = (student_stats['p99_ms'] <= args.max_p99_ms
+                     and student_stats['auc'] >= args.min_auc_ratio * teacher_stats['auc'])
+    print(f"budget (p99 <= {args.max_p99_ms} ms, AUC >= {args.min_auc_ratio:.0%} of teacher): "
+          f"{'met' if within_budget else 'missed'}")
+
+    if within_budget or args.force:
+        os.replace(candidate_path, student_path)
+        print(f"saved {student_path}")
+        return 0
+    os.remove(candidate_path)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+Time-aware cross-validation for the risk and fire-occurrence models.
+
+The notebook scores one random train_test_split, which trains on months
+that come after the ones it tests on. This harness offers two honest
+schemes instead:
+
+    rolling    expanding-window rolling origin over YEAR/MONTH: train on
+               every month before the origin, test on the next horizon
+    district   grouped folds by DISTRICT: every district is tested by a
+               model that never saw it
+
+Folds run in worker processes that memory-map the feature matrix cached by
+src/train.py. Metrics are reported per fold and per district (pooled over
+the folds that tested it).
+
+    python -m src.evaluate [--scheme rolling district] [--models fire_model] [--backend xgboost]
+                           [--synthetic-scale 4] [--n-jobs N] [--output DIR]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score, roc_auc_score, brier_score_loss
+
+from src.shared_cache import file_fingerprint
+from src.synthetic import scaled_frame
+from src.backends import BACKENDS, DEFAULT_PARAMS, make_model
+from src.train import (COMBINED_DATA_PATH, MODEL_TARGETS, FeatureMatrix,
+                       build_feature_matrix, load_training_frame, run_pool)
+
+
+SCHEMES = ['rolling', 'district']
+
+# Rolling origin: at least two years of history, then one-year test windows
+MIN_TRAIN_MONTHS = 24
+HORIZON_MONTHS = 12
+
+
+def month_index(df):
+    return (df['YEAR'].to_numpy() - df['YEAR'].min()) * 12 + df['MONTH'].to_numpy() - 1
+
+
+def rolling_origin_splits(df, min_train_months=MIN_TRAIN_MONTHS, horizon=HORIZON_MONTHS):
+    """[(name, train_idx, test_idx)] with every training month before every test month."""
+    months = month_index(df)
+    splits = []
+    for origin in range(min_train_months, int(months.max()) + 1, horizon):
+        train_idx = np.flatnonzero(months < origin)
+        test_idx = np.flatnonzero((months >= origin) & (months < origin + horizon))
+        if len(test_idx):
+            first = df.iloc[test_idx[np.argmin(months[test_idx])]]
+            splits.append((f"from {int(first['YEAR'])}-{int(first['MONTH']):02d}", train_idx, test_idx))
+    return splits
+
+
+def district_group_splits(df, n_folds=5, seed=0):
+    """[(name, train_idx, test_idx)] with each district in exactly one test fold."""
+    districts = np.array(sorted(df['DISTRICT'].unique()))
+    np.random.default_rng(seed).shuffle(districts)
+    fold_of = {d: i % n_folds for i, d in enumerate(districts)}
+    folds = df['DISTRICT'].map(fold_of).to_numpy()
+    return [(f"districts {i + 1}/{n_folds}", np.flatnonzero(folds != i), np.flatnonzero(folds == i))
+            for i in range(n_folds)]
+
+
+# Metrics reported per model, and which direction is worse
+METRICS = {
+    'risk_model': {'mae': 'max', 'r2': 'min'},
+    'fire_model': {'auc': 'min', 'brier': 'max', 'accuracy': 'min'},
+}
+
+
+def score(kind, y_true, y_pred):
+    if kind == 'risk_model':
+        return {'mae': mean_absolute_error(y_true, y_pred), 'r2': r2_score(y_true, y_pred)}
+    both_classes = len(np.unique(y_true)) == 2
+    return {
+        'auc': roc_auc_score(y_true, y_pred) if both_classes else np.nan,
+        'brier': brier_score_loss(y_true, y_pred),
+        'accuracy': float(np.mean((y_pred > 0.5) == y_true)),
+        'fire_rate': float(np.mean(y_true)),
+    }
+
+
+def _evaluate_fold(task):
+    # Runs in a worker process; X and y are memory-mapped from the training cache
+    directory, kind, backend, params, scheme, name, train_idx, test_idx = task
+    matrix = FeatureMatrix(directory)
+    X, y = matrix.load_X(), matrix.load_target(MODEL_TARGETS[kind])
+    start = time.perf_counter()
+    model = make_model(kind, backend, params, n_jobs=1).fit(X[train_idx], y[train_idx])
+    if kind == 'risk_model':
+        pred = model.predict(X[test_idx])
+    else:
+        pred = model.predict_proba(X[test_idx])[:, 1]
+    return scheme, name, kind, test_idx, pred, len(train_idx), time.perf_counter() - start
+
+
+def cross_validate(df, matrix, schemes=SCHEMES, kinds=tuple(MODEL_TARGETS), params=None, n_jobs=None,
+                   backend='forest'):
+    """Return (fold metrics, district metrics) DataFrames."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    params = params or {kind: dict(DEFAULT_PARAMS[backend]) for kind in kinds}
+    split_makers = {'rolling': rolling_origin_splits, 'district': district_group_splits}
+
+    tasks = [(matrix.directory, kind, backend, params[kind], scheme, name, train_idx, test_idx)
+             for scheme in schemes
+             for name, train_idx, test_idx in split_makers[scheme](df)
+             for kind in kinds]
+    results = run_pool(_evaluate_fold, tasks, n_jobs)
+
+    targets = {kind: np.asarray(matrix.load_target(MODEL_TARGETS[kind])) for kind in kinds}
+    districts = df['DISTRICT'].to_numpy()
+    fold_rows, pooled = [], {}
+    for scheme, name, kind, test_idx, pred, n_train, seconds in results:
+        y_true = targets[kind][test_idx]
+        fold_rows.append({'scheme': scheme, 'fold': name, 'model': kind, 'train_rows': n_train,
+                          'test_rows': len(test_idx), 'seconds': seconds, **score(kind, y_true, pred)})
+        pooled.setdefault((scheme, kind), []).append((test_idx, pred))
+
+    district_rows = []
+    for (scheme, kind), parts in pooled.items():
+        idx = np.concatenate([p[0] for p in parts])
+        pred = np.concatenate([p[1] for p in parts])
+        frame = pd.DataFrame({'district': districts[idx], 'y': targets[kind][idx], 'pred': pred})
+        for district, group in frame.groupby('district'):
+            district_rows.append({'scheme': scheme, 'model': kind, 'district': district, 'rows': len(group),
+                                  **score(kind, group['y'].to_numpy(), group['pred'].to_numpy())})
+
+    return pd.DataFrame(fold_rows), pd.DataFrame(district_rows)
+
+
+def district_summary(by_district, kind):
+    """Median and worst district for each of the model's metrics, per scheme."""
+    rows = by_district[by_district['model'] == kind]
+    summary = {}
+    for metric, worst in METRICS[kind].items():
+        grouped = rows.groupby('scheme')[metric]
+        summary[(metric, 'median')] = grouped.median()
+        summary[(metric, 'worst')] = grouped.max() if worst == 'max' else grouped.min()
+    return pd.DataFrame(summary)
+
+
+def _fmt(value):
+    return f"{value:.4f}"
+
+
+def format_report(folds, by_district):
+    lines = []
+    for kind in folds['model'].unique():
+        columns = ['scheme', 'fold', 'train_rows', 'test_rows'] + list(METRICS[kind])
+        if kind == 'fire_model':
+            columns.append('fire_rate')
+        lines += ["", f"{kind} per fold:",
+                  folds[folds['model'] == kind][columns].to_string(index=False, float_format=_fmt),
+                  "", f"{kind} per district (median / worst district):",
+                  district_summary(by_district, kind).to_string(float_format=_fmt)]
+    return "\n".join(lines)
+
+
+def load_evaluation_data(path=COMBINED_DATA_PATH, synthetic_scale=1):
+    """The training frame (optionally scaled up) and a fingerprint naming its feature cache."""
+    df = load_training_frame(path)
+    fingerprint = file_fingerprint(path)
+    if synthetic_scale > 1:
+        df = scaled_frame(df, synthetic_scale)
+        fingerprint = hashlib.sha1(f"{fingerprint}:synthetic:{synthetic_scale}".encode()).hexdigest()
+    return df, fingerprint
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--data", default=COMBINED_DATA_PATH)
+    parser.add_argument("--scheme", nargs="+", choices=SCHEMES, default=SCHEMES)
+    parser.add_argument("--models", nargs="+", choices=list(MODEL_TARGETS), default=list(MODEL_TARGETS))
+    parser.add_argument("--backend", choices=BACKENDS, default='forest')
+    parser.add_argument("--synthetic-scale", type=int, default=1,
+                        help="evaluate on the real table plus N-1 jittered copies in later years")
+    parser.add_argument("--n-jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--output", help="directory for fold_metrics.csv and district_metrics.csv")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df, fingerprint = load_evaluation_data(args.data, args.synthetic_scale)
+    matrix, cache_hit = build_feature_matrix(df, fingerprint)
+    folds, by_district = cross_validate(df, matrix, args.scheme, args.models, n_jobs=args.n_jobs,
+                                        backend=args.backend)
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(df)} rows, feature cache {'hit' if cache_hit else 'miss'}, {elapsed:.1f}s total")
+    print(format_report(folds, by_district))
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        folds.to_csv(os.path.join(args.output, "fold_metrics.csv"), index=False)
+        by_district.to_csv(os.path.join(args.output, "district_metrics.csv"), index=False)
+        print(f"\nwrote {args.output}/fold_metrics.csv and district_metrics.csv")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
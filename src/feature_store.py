@@ -0,0 +1,353 @@
+"""
+Lag and rolling-window features per district, computed once and stored.
+
+Every feature in LAG_FEATURES summarises the months *before* a row's month,
+so it is known before that month's weather is:
+
+- Prep_Deficit_n: how much drier than normal the previous n months were in
+  total (the district-month mean precipitation of the 1981-2019 climate
+  archive minus actual, in mm),
+- MaxTemp_Max_3 / Humidity_Mean_3: hottest maximum temperature and mean
+  humidity over the previous three months,
+- Fire_Count_Prev / FRP_Prev: the previous month's detections and their
+  total fire radiative power,
+- Neighbour_*: the same about the district's neighbours last month
+  (detections, FRP, precipitation deficit and maximum-temperature anomaly),
+  averaged over its NEIGHBOURS nearest districts with inverse-distance
+  weights (src/spatial.py).
+
+compute_lag_features lays the source columns out as a (district x month)
+grid and shifts whole arrays, so all districts are done at once with no
+per-district loop; missing months are NaN, and so is any window that
+reaches one. Neighbour averages are one sparse (district x district)
+product with the whole grid, skipping neighbours with no value.
+
+The store (data/features/) is a directory of parquet parts plus a
+manifest.json recording the first and last months covered. update_store
+appends a part for the months after that, computed from the new rows and
+the MAX_WINDOW stored months before them, instead of recomputing the
+history; it takes either the whole source table or just the new months.
+The table is rebuilt when the definitions change, a new district appears,
+a month already stored changes in the source (checked against a hash of
+the stored source rows, when the table passed in reaches back to the
+store's first month), the archive or its parser changes (the normals would
+differ) or --rebuild is given. The climate normals come from the archive, not from
+the growing table, and the centroids are saved with the store, so appended
+parts match a rebuild exactly.
+
+Training (python -m src.train --lag-features) and prediction read the
+features through src/features.py build_model_input, which attaches them
+from here whenever the fitted scaler was trained with them. Rows without a
+YEAR (the prediction page's inputs) take the latest year on record for
+their district and month.
+
+    python -m src.feature_store [--data PATH] [--rebuild]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src import climate_archive
+from src.climate_archive import CLIMATE_ARCHIVE_PATH, read_climate_archive
+from src.climatology import normalize_district
+from src.shared_cache import file_fingerprint
+from src.spatial import IDW_POWER, NEIGHBOURS, DistrictIndex, district_centroids
+
+
+COMBINED_DATA_PATH = os.path.join("data", "processed", "combined_fire_climate.csv")
+STORE_DIR = os.path.join("data", "features")
+
+# name: (operation, source column, window in months before the row's month).
+# deficit is normal minus value, anomaly value minus normal; neighbour_*
+# averages the window over the district's neighbours instead of itself.
+LAG_FEATURES = {
+    'Prep_Deficit_1': ('deficit', 'Prep', 1),
+    'Prep_Deficit_2': ('deficit', 'Prep', 2),
+    'Prep_Deficit_3': ('deficit', 'Prep', 3),
+    'MaxTemp_Max_3': ('max', 'MaxTemp', 3),
+    'Humidity_Mean_3': ('mean', 'Humidity', 3),
+    'Fire_Count_Prev': ('sum', 'Fire_Count', 1),
+    'FRP_Prev': ('sum', 'FRP', 1),
+    'Neighbour_Fire_Prev': ('neighbour', 'Fire_Count', 1),
+    'Neighbour_FRP_Prev': ('neighbour', 'FRP', 1),
+    'Neighbour_Prep_Deficit_1': ('neighbour_deficit', 'Prep', 1),
+    'Neighbour_MaxTemp_Anomaly_1': ('neighbour_anomaly', 'MaxTemp', 1),
+}
+
+# Everything that changes the stored values; a store built with other definitions is rebuilt
+DEFINITIONS = {'features': LAG_FEATURES, 'neighbours': NEIGHBOURS, 'idw_power': IDW_POWER}
+
+SOURCE_COLUMNS = sorted({column for _, column, _ in LAG_FEATURES.values()})
+NORMAL_COLUMNS = sorted({column for op, column, _ in LAG_FEATURES.values() if op.endswith(('deficit', 'anomaly'))})
+MAX_WINDOW = max(window for _, _, window in LAG_FEATURES.values())
+KEY_COLUMNS = ['DISTRICT', 'YEAR', 'MONTH']
+STORED_COLUMNS = KEY_COLUMNS + ['LAT', 'LON'] + SOURCE_COLUMNS
+
+_WINDOW_OPS = {'deficit': np.sum, 'sum': np.sum, 'max': np.max, 'mean': np.mean}
+
+
+def load_source(path=COMBINED_DATA_PATH):
+    df = pd.read_csv(path, usecols=STORED_COLUMNS)
+    df['DISTRICT'] = df['DISTRICT'].str.lower().str.strip()
+    return df
+
+
+def climate_normals(archive, df):
+    """Mean of each NORMAL_COLUMNS input per (district, month) in the archive; districts it lacks use df's own."""
+    archive = archive.assign(DISTRICT=archive['DISTRICT'].map(normalize_district))
+    normals = archive.groupby(['DISTRICT', 'MONTH'])[NORMAL_COLUMNS].mean()
+    own = df.groupby(['DISTRICT', 'MONTH'])[NORMAL_COLUMNS].mean()
+    normals = pd.concat([normals, own[~own.index.isin(normals.index)]])
+    return normals.add_suffix('_Normal').reset_index()
+
+
+def _previous_months(grid, window):
+    """(window, districts, months) stack of grid shifted by 1..window months, NaN where the shift runs out."""
+    stacked = np.full((window,) + grid.shape, np.nan)
+    for k in range(1, window + 1):
+        stacked[k - 1, :, k:] = grid[:, :-k]
+    return stacked
+
+
+def _neighbour_mean(weights, grid):
+    """Weighted mean over each district's neighbours, renormalised over the ones with a value."""
+    known = ~np.isnan(grid)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (weights @ np.where(known, grid, 0)) / (weights @ known)
+
+
+def compute_lag_features(df, normals, centroids):
+    """LAG_FEATURES for every row of df (KEY_COLUMNS plus SOURCE_COLUMNS), in df's row order."""
+    districts = np.sort(df['DISTRICT'].unique())
+    t = df['YEAR'].to_numpy() * 12 + df['MONTH'].to_numpy() - 1
+    months = np.arange(t.min(), t.max() + 1)
+    # Grid positions of every row; months missing from df stay NaN in the grid
+    row_d = np.searchsorted(districts, df['DISTRICT'].to_numpy())
+    row_m = t - t.min()
+
+    grids = {}
+    for column in SOURCE_COLUMNS:
+        grid = np.full((len(districts), len(months)), np.nan)
+        grid[row_d, row_m] = df[column].to_numpy(dtype=float)
+        grids[column] = grid
+    normal_grid = normals.set_index(['DISTRICT', 'MONTH']).reindex(
+        pd.MultiIndex.from_product([districts, months % 12 + 1]))
+    for column in NORMAL_COLUMNS:
+        normal = normal_grid[f"{column}_Normal"].to_numpy().reshape(len(districts), len(months))
+        grids[f"{column}_deficit"] = normal - grids[column]
+        grids[f"{column}_anomaly"] = grids[column] - normal
+    weights = DistrictIndex.from_frame(centroids.set_index('DISTRICT').loc[districts].reset_index()).neighbour_weights()
+
+    features = pd.DataFrame(index=df.index)
+    for name, (op, column, window) in LAG_FEATURES.items():
+        spatial = op.startswith('neighbour')
+        transform = op.removeprefix('neighbour').strip('_')
+        source = grids[f"{column}_{transform}" if transform in ('deficit', 'anomaly') else column]
+        if spatial:
+            values = _neighbour_mean(weights, np.mean(_previous_months(source, window), axis=0))
+        else:
+            # NaN-propagating reductions: an incomplete window gives NaN, not a partial value
+            values = _WINDOW_OPS[op](_previous_months(source, window), axis=0)
+        features[name] = values[row_d, row_m]
+    return features
+
+
+def _read_manifest(store_dir):
+    path = os.path.join(store_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_part(store_dir, frame, name):
+    path = os.path.join(store_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _source_hash(df, through):
+    """Hash of the STORED_COLUMNS rows up to and including month through, independent of row order."""
+    t = df['YEAR'] * 12 + df['MONTH'] - 1
+    rows = df.loc[t <= through[0] * 12 + through[1] - 1, STORED_COLUMNS].sort_values(KEY_COLUMNS)
+    # Fixed dtypes, so the CSV source and the parquet store hash alike
+    rows = rows.astype({'YEAR': np.int64, 'MONTH': np.int64, **{c: float for c in STORED_COLUMNS[3:]}})
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+
+def _normals_source(archive_path):
+    """Fingerprint of what the climate normals are computed from: the archive and how it is parsed."""
+    digests = file_fingerprint(archive_path) + file_fingerprint(climate_archive.__file__)
+    return hashlib.sha1(digests.encode()).hexdigest()
+
+
+def _last_month(df):
+    last = df[['YEAR', 'MONTH']].sort_values(['YEAR', 'MONTH']).iloc[-1]
+    return [int(last['YEAR']), int(last['MONTH'])]
+
+
+def _first_month(df):
+    first = df[['YEAR', 'MONTH']].sort_values(['YEAR', 'MONTH']).iloc[0]
+    return [int(first['YEAR']), int(first['MONTH'])]
+
+
+def read_store(store_dir=STORE_DIR, columns=None):
+    """The stored rows (all parts), optionally only some columns; parquet reads just those."""
+    parts = sorted(glob.glob(os.path.join(store_dir, "part-*.parquet")))
+    return pd.concat([pd.read_parquet(part, columns=columns) for part in parts], ignore_index=True)
+
+
+def rebuild_store(df, store_dir=STORE_DIR, reason="new store", archive_path=CLIMATE_ARCHIVE_PATH):
+    os.makedirs(store_dir, exist_ok=True)
+    for part in glob.glob(os.path.join(store_dir, "part-*.parquet")):
+        os.remove(part)
+    normals = climate_normals(read_climate_archive(archive_path), df)
+    normals.to_parquet(os.path.join(store_dir, "normals.parquet"), index=False)
+    centroids = district_centroids(df)
+    centroids.to_parquet(os.path.join(store_dir, "centroids.parquet"), index=False)
+    table = df[STORED_COLUMNS].reset_index(drop=True)
+    table = pd.concat([table, compute_lag_features(table, normals, centroids)], axis=1)
+    through = _last_month(df)
+    name = f"part-{through[0]}-{through[1]:02d}.parquet"
+    _write_part(store_dir, table, name)
+    return {'definitions': DEFINITIONS, 'first': _first_month(df), 'through': through,
+            'districts': sorted(df['DISTRICT'].unique()), 'parts': [name], 'rows': len(table),
+            'source_hash': _source_hash(df, through), 'normals_source': _normals_source(archive_path),
+            'rebuilt': reason}
+
+
+def update_store(df, store_dir=STORE_DIR, rebuild=False, archive_path=CLIMATE_ARCHIVE_PATH):
+    """Bring the store up to df's last month; returns (manifest, mode) with mode 'rebuild', 'append' or 'none'.
+
+    df is either the whole source table or only the months after the store's last one.
+    """
+    start = time.perf_counter()
+    manifest = _read_manifest(store_dir)
+    # JSON turns the definition tuples into lists
+    definitions = json.loads(json.dumps(DEFINITIONS))
+    if manifest is not None and 'first' not in manifest:
+        # Stores written before the first month was recorded
+        manifest['first'] = _first_month(read_store(store_dir, ['YEAR', 'MONTH']))
+    # Only a table reaching back to the first stored month can show a stored month changed
+    full_history = manifest is not None and _first_month(df) <= manifest['first']
+    reason = None
+    if rebuild:
+        reason = "requested"
+    elif manifest is None:
+        reason = "new store"
+    elif manifest['definitions'] != definitions:
+        reason = "feature definitions changed"
+    elif set(df['DISTRICT'].unique()) - set(manifest['districts']):
+        reason = "new districts"
+    elif manifest.get('normals_source') != _normals_source(archive_path):
+        reason = "climate normals changed"
+    elif full_history and manifest.get('source_hash') != _source_hash(df, manifest['through']):
+        # Corrections to months already stored would otherwise never reach the store
+        reason = "stored months changed"
+
+    if reason is not None:
+        manifest, mode = rebuild_store(df, store_dir, reason, archive_path), "rebuild"
+    else:
+        through = manifest['through'][0] * 12 + manifest['through'][1] - 1
+        t = df['YEAR'] * 12 + df['MONTH'] - 1
+        new = df[t > through]
+        if new.empty:
+            return manifest, "none"
+        stored = read_store(store_dir, STORED_COLUMNS)
+        # Only the last MAX_WINDOW stored months feed the new rows' windows
+        history = stored[stored['YEAR'] * 12 + stored['MONTH'] - 1 > through - MAX_WINDOW]
+        frame = pd.concat([history, new[STORED_COLUMNS]], ignore_index=True)
+        features = compute_lag_features(frame, pd.read_parquet(os.path.join(store_dir, "normals.parquet")),
+                                        pd.read_parquet(os.path.join(store_dir, "centroids.parquet")))
+        table = pd.concat([frame, features], axis=1).iloc[len(history):]
+        manifest['through'] = _last_month(new)
+        # The stored source rows stand in for the months df does not hold
+        source = df if full_history else pd.concat([stored, new[STORED_COLUMNS]], ignore_index=True)
+        manifest['source_hash'] = _source_hash(source, manifest['through'])
+        name = f"part-{manifest['through'][0]}-{manifest['through'][1]:02d}.parquet"
+        _write_part(store_dir, table, name)
+        manifest['parts'].append(name)
+        manifest['rows'] += len(table)
+        mode = "append"
+
+    manifest['updated_utc'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    manifest['seconds'] = time.perf_counter() - start
+    # Written last: readers only see parts the manifest lists
+    tmp_path = os.path.join(store_dir, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(store_dir, "manifest.json"))
+    return manifest, mode
+
+
+# The lag table per store state, so predictions do not re-read parquet every call
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_lag_features(store_dir=STORE_DIR, data_path=COMBINED_DATA_PATH):
+    """KEY_COLUMNS plus LAG_FEATURES for every stored row, building the store from data_path if there is none."""
+    manifest_path = os.path.join(store_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        update_store(load_source(data_path), store_dir)
+    stamp = (os.path.abspath(store_dir), os.stat(manifest_path).st_mtime_ns)
+    with _loaded_lock:
+        table = _loaded.get(stamp)
+    if table is None:
+        table = read_store(store_dir, KEY_COLUMNS + list(LAG_FEATURES))
+        with _loaded_lock:
+            _loaded[stamp] = table
+    return table
+
+
+def attach_lag_features(frame, store_dir=STORE_DIR, fill=True):
+    """frame with the LAG_FEATURES columns added.
+
+    Rows with a YEAR get their own month's values; rows without one get the
+    latest year on record for their district and month. With fill, rows
+    the store does not cover get the store's mean of each feature.
+    """
+    table = load_lag_features(store_dir)
+    keys = KEY_COLUMNS if 'YEAR' in frame.columns else ['DISTRICT', 'MONTH']
+    if 'YEAR' not in frame.columns:
+        table = table.sort_values('YEAR').drop_duplicates(['DISTRICT', 'MONTH'], keep='last').drop(columns='YEAR')
+    lookup = frame[keys].copy()
+    lookup['DISTRICT'] = lookup['DISTRICT'].str.lower().str.strip()
+    values = lookup.merge(table, on=keys, how='left')[list(LAG_FEATURES)]
+    if fill:
+        values = values.fillna(table[list(LAG_FEATURES)].mean())
+    values.index = frame.index
+    return pd.concat([frame.drop(columns=[c for c in LAG_FEATURES if c in frame.columns]), values], axis=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--data", default=COMBINED_DATA_PATH)
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="recompute every row instead of appending")
+    args = parser.parse_args(argv)
+
+    manifest, mode = update_store(load_source(args.data), args.store_dir, args.rebuild)
+    through = f"{manifest['through'][0]}-{manifest['through'][1]:02d}"
+    if mode == "none":
+        print(f"store is up to date through {through} ({manifest['rows']} rows)")
+        return 0
+    detail = f"rebuilt ({manifest['rebuilt']})" if mode == "rebuild" else f"appended {manifest['parts'][-1]}"
+    print(f"{detail}: {manifest['rows']} rows in {len(manifest['parts'])} part(s) through {through}, "
+          f"{manifest['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Model input features, in the layout the models were trained with (see
+src/models.ipynb): the five climate variables, cyclical month, coordinates
+and one one-hot column per district. Models trained with --lag-features
+also take the preceding-month features of src/feature_store.py, after the
+coordinates; build_model_input adds them when the scaler expects them.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.feature_store import LAG_FEATURES, attach_lag_features
+
+
+BASE_FEATURES = ['Prep', 'AvgTemp', 'MaxTemp', 'Humidity', 'WindSpeed',
+                 'Month_sin', 'Month_cos', 'LAT', 'LON']
+
+# Columns a caller has to supply for build_feature_frame
+INPUT_COLUMNS = ['DISTRICT', 'MONTH', 'LAT', 'LON', 'Prep', 'AvgTemp', 'MaxTemp', 'Humidity', 'WindSpeed']
+
+
+def build_feature_frame(input_df, district_encoder, lag_columns=()):
+    # Works for any number of rows: DISTRICT, MONTH, LAT, LON and the five climate columns,
+    # plus lag_columns, which input_df must already have
+    input_df = input_df.copy()
+
+    # Add cyclical month features
+    input_df['Month_sin'] = np.sin(2 * np.pi * input_df['MONTH'] / 12)
+    input_df['Month_cos'] = np.cos(2 * np.pi * input_df['MONTH'] / 12)
+
+    # One-hot encode district
+    district_cols = [f"DISTRICT_{d}" for d in district_encoder.categories_[0]]
+    district_encoded = pd.DataFrame(
+        district_encoder.transform(input_df[['DISTRICT']]),
+        columns=district_cols,
+        index=input_df.index
+    )
+
+    return pd.concat([input_df[BASE_FEATURES + list(lag_columns)], district_encoded], axis=1)
+
+
+def model_lag_columns(scaler):
+    """The LAG_FEATURES the scaler (so the models) was fitted with, in training order."""
+    fitted = set(getattr(scaler, 'feature_names_in_', ()))
+    return [name for name in LAG_FEATURES if name in fitted]
+
+
+def build_model_input(input_df, scaler, district_encoder):
+    """Scaled feature matrix for input_df, with lag features from the store if the models use them."""
+    lag_columns = model_lag_columns(scaler)
+    if lag_columns and not set(lag_columns) <= set(input_df.columns):
+        input_df = attach_lag_features(input_df)
+    return scaler.transform(build_feature_frame(input_df, district_encoder, lag_columns))
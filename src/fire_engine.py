@@ -0,0 +1,110 @@
+"""
+Fire-occurrence probability engines.
+
+ForestFireEngine serves the trained fire_model (the notebook's random
+forest, or a boosting backend from src/train.py), which needs the full
+scaled one-hot feature layout.
+CompactFireEngine serves the distilled student built by src/distill.py: a
+shallow gradient-boosted ensemble over the raw climate inputs, cyclical
+month and coordinates (which stand in for the district one-hot columns).
+Both return P(fire) per row of a frame with the raw input columns;
+probability_with_spread adds the per-tree spread of a forest
+(src/uncertainty.py).
+"""
+
+import numpy as np
+
+from src.backends import BACKEND_LABELS, backend_of
+from src.climate_archive import CLIMATE_VARIABLES
+from src.features import build_model_input
+from src.uncertainty import TreeStack, point_only, supports_tree_spread
+
+
+STUDENT_FEATURES = CLIMATE_VARIABLES + ['Month_sin', 'Month_cos', 'LAT', 'LON']
+
+FOREST_MODEL_NAME = 'fire_model'
+COMPACT_MODEL_NAME = 'fire_model_compact'
+
+DEFAULT_FIRE_ENGINE = "forest"
+
+
+def student_feature_matrix(frame):
+    month = frame['MONTH'].to_numpy(dtype=float)
+    return np.column_stack([
+        frame[CLIMATE_VARIABLES].to_numpy(dtype=float),
+        np.sin(2 * np.pi * month / 12),
+        np.cos(2 * np.pi * month / 12),
+        frame['LAT'].to_numpy(dtype=float),
+        frame['LON'].to_numpy(dtype=float),
+    ])
+
+
+class CompactFireModel:
+    """A regressor fitted to the teacher's P(fire), exposed like a classifier."""
+
+    def __init__(self, regressor, teacher_info=None):
+        self.regressor = regressor
+        self.teacher_info = teacher_info or {}
+
+    def predict_proba(self, frame):
+        p = np.clip(self.regressor.predict(student_feature_matrix(frame)), 0.0, 1.0)
+        return np.column_stack([1 - p, p])
+
+
+class ForestFireEngine:
+    """The trained fire_model classifier."""
+
+    name = "forest"
+    label = "Trained model"
+
+    def __init__(self, fire_model, scaler, district_encoder, tree_stack=None):
+        self.fire_model = fire_model
+        self.scaler = scaler
+        self.district_encoder = district_encoder
+        # Built on first use unless the caller keeps one per loaded model
+        self.tree_stack = tree_stack
+
+    def probability(self, frame, X_scaled=None):
+        if X_scaled is None:
+            X_scaled = build_model_input(frame, self.scaler, self.district_encoder)
+        return self.fire_model.predict_proba(X_scaled)[:, 1]
+
+    def probability_with_spread(self, frame, X_scaled=None):
+        """value/std/lower/upper per row from one traversal of all trees (point only for boosting)."""
+        if X_scaled is None:
+            X_scaled = build_model_input(frame, self.scaler, self.district_encoder)
+        if not supports_tree_spread(self.fire_model):
+            return point_only(self.fire_model.predict_proba(X_scaled)[:, 1])
+        if self.tree_stack is None:
+            self.tree_stack = TreeStack(self.fire_model)
+        return self.tree_stack.summarize(X_scaled)
+
+    def describe(self):
+        return f"{self.label} ({BACKEND_LABELS[backend_of(self.fire_model)]})"
+
+
+class CompactFireEngine:
+    """The distilled student; works on the raw inputs, no scaler or encoder."""
+
+    name = "compact"
+    label = "Compact (distilled)"
+
+    def __init__(self, compact_model):
+        self.compact_model = compact_model
+
+    def probability(self, frame, X_scaled=None):
+        # X_scaled is accepted for interface parity with ForestFireEngine and ignored
+        return self.compact_model.predict_proba(frame)[:, 1]
+
+    def probability_with_spread(self, frame, X_scaled=None):
+        # A single boosted ensemble; there are no independent trees to compare
+        return point_only(self.probability(frame))
+
+    def describe(self):
+        return self.label
+
+
+FIRE_ENGINE_LABELS = {
+    ForestFireEngine.name: ForestFireEngine.label,
+    CompactFireEngine.name: CompactFireEngine.label,
+}
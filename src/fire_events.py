@@ -0,0 +1,207 @@
+"""
+Fire events: MODIS detections clustered in space and time.
+
+Fire_Count counts detections (roughly 1 km pixels) per district-month, so a
+single large fire burning for a week counts dozens of times and is split
+across the districts it crosses. cluster_detections links any two
+detections within EVENT_KM and EVENT_GAP_DAYS of each other and takes the
+connected components as events (single linkage, so a spreading fire stays
+one event however far it travels).
+
+Candidate pairs come from a grid hash: every detection falls in an
+(x, y, t) cell of EVENT_KM x EVENT_KM x EVENT_GAP_DAYS, so any linked pair
+is in the same or an adjacent cell. The cell keys are sorted once and each
+of the 14 cells of the half neighbourhood is looked up with searchsorted,
+so the cost grows with the number of detections times the local density,
+not with its square. Components come from scipy's connected_components on
+the sparse pair graph.
+
+Each event belongs to the district holding most of its detections and to
+the month of its first detection. district_month_events aggregates them
+per (YEAR, MONTH, DISTRICT) to sit next to Fire_Count in the combined
+table; `python -m src.fire_events` writes both tables to EVENTS_DIR.
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from src.gazetteer import normalize_district
+from src.spatial import KM_PER_DEGREE_LAT, KM_PER_DEGREE_LON_EQUATOR, project_km
+
+
+MODIS_RAW_GLOB = os.path.join("data", "raw", "modis", "modis_*_Nepal.csv")
+EVENTS_DIR = "data/events"
+
+# MODIS pixels are 1 km at nadir and up to ~2 km along scan at the swath edge
+EVENT_KM = 2.0
+# Terra and Aqua pass twice a day each; two days bridges a cloudy overpass
+EVENT_GAP_DAYS = 2.0
+
+KEY_COLUMNS = ['YEAR', 'MONTH', 'DISTRICT']
+EVENT_COLUMNS = ['Fire_Events', 'Event_FRP', 'Event_Max_Days', 'Event_Max_Extent_KM']
+
+# (dx, dy, dt) cell offsets covering every pair once: forward in time, and
+# the upper half of the 3 x 3 spatial block within the same time cell
+HALF_NEIGHBOURHOOD = ([(dx, dy, 1) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+                      + [(0, 0, 0), (1, 0, 0), (-1, 1, 0), (0, 1, 0), (1, 1, 0)])
+
+
+def district_file(path):
+    """The *_with_district twin of a raw detection file."""
+    return path.replace("_Nepal.csv", "_Nepal_with_district.csv")
+
+
+def load_detections(paths=None):
+    """Raw detections with LAT, LON, TIME, FRP, Confidence and DISTRICT (NaN where the join has none)."""
+    paths = sorted(glob.glob(MODIS_RAW_GLOB)) if paths is None else paths
+    frames = []
+    for path in paths:
+        raw = pd.read_csv(path, dtype={'acq_time': str})
+        hhmm = raw['acq_time'].str.zfill(4)
+        frame = pd.DataFrame({
+            'LAT': raw['latitude'],
+            'LON': raw['longitude'],
+            'TIME': (pd.to_datetime(raw['acq_date']) + pd.to_timedelta(hhmm.str[:2].astype(int), unit='h')
+                     + pd.to_timedelta(hhmm.str[2:].astype(int), unit='m')),
+            'FRP': raw['frp'],
+            'Confidence': raw['confidence'],
+            'DISTRICT': np.nan,
+        })
+        # The district join is row-aligned with the raw file; only trust it when it lines up
+        twin = district_file(path)
+        if os.path.exists(twin):
+            joined = pd.read_csv(twin, usecols=['acq_date', 'District'])
+            if len(joined) == len(raw) and joined['acq_date'].equals(raw['acq_date']):
+                frame['DISTRICT'] = joined['District'].map(normalize_district, na_action='ignore')
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True).sort_values('TIME', kind='stable').reset_index(drop=True)
+
+
+def candidate_pairs(x, y, t, km=EVENT_KM, gap_days=EVENT_GAP_DAYS):
+    """(i, j) index pairs within km and gap_days of each other, each pair once."""
+    ix = np.floor((x - x.min()) / km).astype(np.int64) + 1
+    iy = np.floor((y - y.min()) / km).astype(np.int64) + 1
+    it = np.floor((t - t.min()) / gap_days).astype(np.int64)
+    # One padding cell on each side, so a neighbour key never wraps into another row
+    nx, ny = int(ix.max()) + 2, int(iy.max()) + 2
+    key = (it * ny + iy) * nx + ix
+    order = np.argsort(key, kind='stable')
+    sorted_keys = key[order]
+
+    pairs_i, pairs_j = [], []
+    for dx, dy, dt in HALF_NEIGHBOURHOOD:
+        target = key + (dt * ny + dy) * nx + dx
+        lo = np.searchsorted(sorted_keys, target, side='left')
+        counts = np.searchsorted(sorted_keys, target, side='right') - lo
+        i = np.repeat(np.arange(len(key)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        j = order[np.repeat(lo, counts) + within]
+        keep = i < j if (dx, dy, dt) == (0, 0, 0) else np.ones(len(i), dtype=bool)
+        keep &= (np.hypot(x[i] - x[j], y[i] - y[j]) <= km) & (np.abs(t[i] - t[j]) <= gap_days)
+        pairs_i.append(i[keep])
+        pairs_j.append(j[keep])
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def cluster_detections(detections, km=EVENT_KM, gap_days=EVENT_GAP_DAYS):
+    """An event label per detection, numbered in order of each event's first detection."""
+    n = len(detections)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    xy = project_km(detections['LAT'], detections['LON'], float(detections['LAT'].mean()))
+    days = (detections['TIME'] - detections['TIME'].min()).dt.total_seconds().to_numpy() / 86400
+    i, j = candidate_pairs(xy[:, 0], xy[:, 1], days, km, gap_days)
+    graph = coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    first_seen = pd.Series(days).groupby(labels).min()
+    renumber = np.empty(len(first_seen), dtype=np.int64)
+    renumber[first_seen.sort_values(kind='stable').index] = np.arange(len(first_seen))
+    return renumber[labels]
+
+
+def event_table(detections, labels):
+    """One row per event: timing, duration, extent, FRP and home district."""
+    frame = detections.assign(EVENT_ID=labels)
+    grouped = frame.groupby('EVENT_ID')
+    events = grouped.agg(START=('TIME', 'min'), END=('TIME', 'max'), DETECTIONS=('TIME', 'size'),
+                         TOTAL_FRP=('FRP', 'sum'), MAX_FRP=('FRP', 'max'),
+                         MEAN_CONFIDENCE=('Confidence', 'mean'), LAT=('LAT', 'mean'), LON=('LON', 'mean'),
+                         LAT_MIN=('LAT', 'min'), LAT_MAX=('LAT', 'max'),
+                         LON_MIN=('LON', 'min'), LON_MAX=('LON', 'max'),
+                         DISTRICTS=('DISTRICT', 'nunique'))
+    events['DURATION_DAYS'] = (events['END'].dt.normalize() - events['START'].dt.normalize()).dt.days + 1
+    # Bounding-box diagonal of the detection centres
+    height = (events['LAT_MAX'] - events['LAT_MIN']) * KM_PER_DEGREE_LAT
+    width = ((events['LON_MAX'] - events['LON_MIN']) * KM_PER_DEGREE_LON_EQUATOR
+             * np.cos(np.radians(events['LAT'])))
+    events['EXTENT_KM'] = np.hypot(height, width)
+
+    per_district = frame.dropna(subset=['DISTRICT']).groupby(['EVENT_ID', 'DISTRICT']).size()
+    home = per_district.sort_values(ascending=False, kind='stable').reset_index().drop_duplicates('EVENT_ID')
+    events['DISTRICT'] = home.set_index('EVENT_ID')['DISTRICT']
+    events['YEAR'] = events['START'].dt.year
+    events['MONTH'] = events['START'].dt.month
+    columns = ['YEAR', 'MONTH', 'DISTRICT', 'START', 'END', 'DURATION_DAYS', 'DETECTIONS', 'DISTRICTS',
+               'EXTENT_KM', 'TOTAL_FRP', 'MAX_FRP', 'MEAN_CONFIDENCE', 'LAT', 'LON']
+    return events[columns].reset_index()
+
+
+def district_month_events(events):
+    """Per (YEAR, MONTH, DISTRICT): events started, their total FRP, longest duration and largest extent."""
+    located = events.dropna(subset=['DISTRICT'])
+    monthly = located.groupby(KEY_COLUMNS).agg(Fire_Events=('EVENT_ID', 'size'), Event_FRP=('TOTAL_FRP', 'sum'),
+                                               Event_Max_Days=('DURATION_DAYS', 'max'),
+                                               Event_Max_Extent_KM=('EXTENT_KM', 'max'))
+    return monthly.reset_index()
+
+
+def attach_event_aggregates(df, monthly):
+    """df with the EVENT_COLUMNS joined on YEAR, MONTH and DISTRICT, 0 where no event started."""
+    merged = df.drop(columns=EVENT_COLUMNS, errors='ignore').merge(monthly, on=KEY_COLUMNS, how='left')
+    merged[EVENT_COLUMNS] = merged[EVENT_COLUMNS].fillna(0)
+    return merged
+
+
+def build_events(paths=None, km=EVENT_KM, gap_days=EVENT_GAP_DAYS):
+    """(events, district-month aggregates) for the raw detection files."""
+    detections = load_detections(paths)
+    events = event_table(detections, cluster_detections(detections, km, gap_days))
+    return events, district_month_events(events)
+
+
+def event_paths(events_dir=EVENTS_DIR):
+    return os.path.join(events_dir, "fire_events.csv"), os.path.join(events_dir, "district_month_events.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cluster MODIS detections into fire events.")
+    parser.add_argument("--events-dir", default=EVENTS_DIR)
+    parser.add_argument("--km", type=float, default=EVENT_KM, help="Largest distance between linked detections")
+    parser.add_argument("--gap-days", type=float, default=EVENT_GAP_DAYS,
+                        help="Largest time between linked detections")
+    args = parser.parse_args()
+
+    events, monthly = build_events(km=args.km, gap_days=args.gap_days)
+    os.makedirs(args.events_dir, exist_ok=True)
+    events_path, monthly_path = event_paths(args.events_dir)
+    events.to_csv(events_path, index=False)
+    monthly.to_csv(monthly_path, index=False)
+
+    detections = int(events['DETECTIONS'].sum())
+    print(f"{detections} detections -> {len(events)} events ({detections / len(events):.1f} detections per event)")
+    print(f"Multi-day events: {(events['DURATION_DAYS'] > 1).sum()}, "
+          f"crossing a district boundary: {(events['DISTRICTS'] > 1).sum()}")
+    print("Largest events by total FRP:")
+    print(events.nlargest(5, 'TOTAL_FRP')[['START', 'DISTRICT', 'DURATION_DAYS', 'DETECTIONS', 'EXTENT_KM',
+                                           'TOTAL_FRP']].to_string(index=False))
+    print(f"Written to {events_path} and {monthly_path}")
+
+
+if __name__ == "__main__":
+    main()
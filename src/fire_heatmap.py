@@ -0,0 +1,314 @@
+"""
+Fire detection heatmap served as hexagonal bins.
+
+src/nepal_fire_heatmap.html used to embed one point per detection, so its
+size grew with every fire season. Here the raw MODIS detections are
+aggregated server-side into hexagons at several widths (LEVELS, km flat to
+flat), each with its detection count, total and peak FRP and last date. A
+map at a given zoom only receives the bins of the matching level inside
+its view, so the payload follows the number of hexagons on screen, not the
+number of detections.
+
+Hexagons are cut in km (spatial.project_km about the fixed PROJECTION_LAT0,
+so a bin never moves when data is added). Counts, sums and maxima merge
+exactly, so update_bins reads only what is new: rows appended to a raw
+file since the last run (checked against a hash of the part already read)
+and new files. Anything else, e.g. an edited file, rebuilds the bins from
+scratch. The bins live in HEATMAP_DIR; `python -m src.fire_heatmap`
+updates them, rewrites the standalone HTML at DEFAULT_ZOOM and prints the
+payload report.
+"""
+
+import argparse
+import glob
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.fire_events import MODIS_RAW_GLOB
+from src.spatial import project_km, unproject_km
+
+
+HEATMAP_DIR = os.path.join("data", "heatmap")
+HTML_PATH = os.path.join("src", "nepal_fire_heatmap.html")
+
+# Hexagon width in km by the lowest zoom level that uses it, about 10-20
+# screen pixels per hexagon at that zoom
+LEVELS = {0: 40, 7: 20, 8: 10, 9: 5, 10: 2, 11: 1}
+PROJECTION_LAT0 = 28.4
+
+MAP_CENTER = (28.3, 84.1)
+DEFAULT_ZOOM = 7
+
+WEIGHTS = {'COUNT': "Detections", 'FRP': "Fire radiative power"}
+DEFINITIONS = {'levels': LEVELS, 'lat0': PROJECTION_LAT0}
+BIN_KEYS = ['KM', 'Q', 'R']
+RAW_COLUMNS = ['latitude', 'longitude', 'frp', 'acq_date']
+
+SQRT3 = np.sqrt(3)
+
+
+def hex_index(lat, lon, km):
+    """Axial (q, r) of the pointy-top hexagon of width km holding each point."""
+    xy = project_km(lat, lon, PROJECTION_LAT0)
+    size = km / SQRT3
+    q = (SQRT3 / 3 * xy[:, 0] - xy[:, 1] / 3) / size
+    r = (2 / 3 * xy[:, 1]) / size
+    # Cube rounding: round all three cube coordinates, then fix the one that moved most
+    s = -q - r
+    rq, rr, rs = np.rint(q), np.rint(r), np.rint(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centres(q, r, km):
+    """(lat, lon) of hexagon centres."""
+    size = km / SQRT3
+    x = size * SQRT3 * (np.asarray(q) + np.asarray(r) / 2)
+    y = size * 1.5 * np.asarray(r)
+    return unproject_km(x, y, PROJECTION_LAT0)
+
+
+def aggregate(detections):
+    """Bins at every level for a frame of LAT, LON, FRP and DATE."""
+    tables = []
+    for km in LEVELS.values():
+        q, r = hex_index(detections['LAT'], detections['LON'], km)
+        grouped = detections.assign(KM=km, Q=q, R=r).groupby(BIN_KEYS)
+        tables.append(grouped.agg(COUNT=('FRP', 'size'), FRP=('FRP', 'sum'), FRP_MAX=('FRP', 'max'),
+                                  LAST=('DATE', 'max')).reset_index())
+    return pd.concat(tables, ignore_index=True)
+
+
+def merge_bins(old, new):
+    """Two bin tables as one; counts and FRP add, peaks and last dates take the larger."""
+    merged = pd.concat([old, new], ignore_index=True).groupby(BIN_KEYS)
+    return merged.agg(COUNT=('COUNT', 'sum'), FRP=('FRP', 'sum'), FRP_MAX=('FRP_MAX', 'max'),
+                      LAST=('LAST', 'max')).reset_index()
+
+
+def with_centres(bins):
+    lat, lon = np.empty(len(bins)), np.empty(len(bins))
+    for km in bins['KM'].unique():
+        rows = (bins['KM'] == km).to_numpy()
+        lat[rows], lon[rows] = hex_centres(bins.loc[rows, 'Q'], bins.loc[rows, 'R'], km)
+    return bins.assign(LAT=lat, LON=lon)
+
+
+def _prefix_hash(path, n_bytes):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        remaining = n_bytes
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1 << 20))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def read_new_rows(path, state=None):
+    """(detections, state) for the complete rows of path past state['bytes'] (all rows without a state)."""
+    offset = 0 if state is None else state['bytes']
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        tail = f.read()
+    # A row still being written is left for the next run
+    tail = tail[:tail.rfind(b'\n') + 1]
+    end = max(offset, len(header)) + len(tail)
+    raw = pd.read_csv(io.BytesIO(header + tail), usecols=RAW_COLUMNS)
+    detections = pd.DataFrame({'LAT': raw['latitude'], 'LON': raw['longitude'], 'FRP': raw['frp'],
+                               'DATE': pd.to_datetime(raw['acq_date'])})
+    rows = (0 if state is None else state['rows']) + len(detections)
+    return detections, {'bytes': end, 'sha1': _prefix_hash(path, end), 'rows': rows}
+
+
+def _read_manifest(heatmap_dir):
+    path = os.path.join(heatmap_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_bins(heatmap_dir=HEATMAP_DIR):
+    """The stored bins with their centres' LAT and LON."""
+    return with_centres(pd.read_parquet(os.path.join(heatmap_dir, "bins.parquet")))
+
+
+def update_bins(paths=None, heatmap_dir=HEATMAP_DIR, rebuild=False):
+    """Bring the bins up to date with paths; returns (manifest, mode) with mode 'rebuild', 'append' or 'none'."""
+    start = time.perf_counter()
+    paths = sorted(glob.glob(MODIS_RAW_GLOB)) if paths is None else sorted(paths)
+    if not paths:
+        raise FileNotFoundError(f"No detection files match {MODIS_RAW_GLOB}")
+    manifest = _read_manifest(heatmap_dir)
+    # JSON turns the level keys into strings
+    definitions = json.loads(json.dumps(DEFINITIONS))
+    reason = None
+    if rebuild:
+        reason = "requested"
+    elif manifest is None:
+        reason = "new bins"
+    elif manifest['definitions'] != definitions:
+        reason = "bin definitions changed"
+    elif set(manifest['sources']) - set(paths):
+        reason = "source removed"
+    else:
+        for path, state in manifest['sources'].items():
+            if os.path.getsize(path) < state['bytes'] or _prefix_hash(path, state['bytes']) != state['sha1']:
+                reason = f"{os.path.basename(path)} changed"
+                break
+
+    previous = {} if reason is not None else manifest['sources']
+    sources, frames = {}, []
+    for path in paths:
+        state = previous.get(path)
+        if state is not None and os.path.getsize(path) == state['bytes']:
+            sources[path] = state
+            continue
+        detections, sources[path] = read_new_rows(path, state)
+        frames.append(detections)
+
+    if reason is None and not any(len(frame) for frame in frames):
+        return manifest, "none"
+    new = aggregate(pd.concat(frames, ignore_index=True)) if frames else None
+    if reason is None:
+        bins, mode = merge_bins(pd.read_parquet(os.path.join(heatmap_dir, "bins.parquet")), new), "append"
+    else:
+        bins, mode = new, "rebuild"
+
+    os.makedirs(heatmap_dir, exist_ok=True)
+    bins_path = os.path.join(heatmap_dir, "bins.parquet")
+    tmp_path = f"{bins_path}.{os.getpid()}.tmp"
+    bins.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, bins_path)
+    manifest = {
+        'definitions': DEFINITIONS,
+        'sources': sources,
+        'detections': sum(state['rows'] for state in sources.values()),
+        'bins': {str(km): int((bins['KM'] == km).sum()) for km in LEVELS.values()},
+        'rebuilt': reason if mode == "rebuild" else (manifest or {}).get('rebuilt'),
+        'updated_utc': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'seconds': time.perf_counter() - start,
+    }
+    # Written last: a reader sees either the old bins and manifest or the new ones
+    tmp_path = os.path.join(heatmap_dir, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(heatmap_dir, "manifest.json"))
+    return manifest, mode
+
+
+def level_for_zoom(zoom):
+    """Hexagon width (km) used at a map zoom level."""
+    return [km for min_zoom, km in LEVELS.items() if zoom >= min_zoom][-1]
+
+
+def visible_bins(bins, zoom, bounds=None, margin=0.25):
+    """The bins of zoom's level inside bounds ((south, west), (north, east)), padded by margin of the view."""
+    view = bins[bins['KM'] == level_for_zoom(zoom)]
+    if bounds is None:
+        return view
+    (south, west), (north, east) = bounds
+    pad_lat, pad_lon = (north - south) * margin, (east - west) * margin
+    inside = (view['LAT'].between(south - pad_lat, north + pad_lat)
+              & view['LON'].between(west - pad_lon, east + pad_lon))
+    return view[inside]
+
+
+def view_bounds(center, zoom, width_px=1000, height_px=600):
+    """((south, west), (north, east)) of a web-mercator view of that many pixels around center."""
+    lat, lon = center
+    degrees_per_px = 360 / (256 * 2 ** zoom)
+    half_lon = width_px / 2 * degrees_per_px
+    half_lat = height_px / 2 * degrees_per_px * np.cos(np.radians(lat))
+    return (lat - half_lat, lon - half_lon), (lat + half_lat, lon + half_lon)
+
+
+def heat_points(bins, weight='COUNT', scale=None):
+    """[lat, lon, intensity] per bin, intensity the square root of weight over scale (default the largest)."""
+    values = bins[weight].to_numpy(dtype=float)
+    scale = scale or (values.max() if len(values) else 1)
+    intensity = np.sqrt(values / scale)
+    return np.round(np.column_stack([bins['LAT'], bins['LON'], intensity]), 4).tolist()
+
+
+def payload_bytes(points):
+    return len(json.dumps(points, separators=(',', ':')))
+
+
+def heatmap_layer(points, name="Fire detections"):
+    from folium.plugins import HeatMap
+
+    return HeatMap(points, name=name, min_opacity=0.3, radius=18, blur=12)
+
+
+def write_html(bins, path=HTML_PATH, zoom=DEFAULT_ZOOM, weight='COUNT'):
+    """The standalone map at zoom's level, for use outside the app."""
+    import folium
+
+    level = bins[bins['KM'] == level_for_zoom(zoom)]
+    fire_map = folium.Map(location=MAP_CENTER, zoom_start=zoom, tiles="OpenStreetMap")
+    heatmap_layer(heat_points(level, weight)).add_to(fire_map)
+    fire_map.save(path)
+    return os.path.getsize(path)
+
+
+def payload_report(bins, detections):
+    """Per level: bins and payload for all of Nepal and for the busiest 1000 x 600 px view, against raw points."""
+    point_bytes = payload_bytes(np.round(np.column_stack([detections['LAT'], detections['LON'],
+                                                          np.ones(len(detections))]), 4).tolist())
+    rows = []
+    for min_zoom, km in LEVELS.items():
+        level = bins[bins['KM'] == km]
+        busiest = level.loc[level['COUNT'].idxmax()]
+        view = visible_bins(bins, min_zoom, view_bounds((busiest['LAT'], busiest['LON']), min_zoom), margin=0)
+        rows.append({'Zoom': min_zoom, 'Hexagon km': km, 'Bins': len(level),
+                     'All KB': payload_bytes(heat_points(level)) / 1024,
+                     'View bins': len(view), 'View KB': payload_bytes(heat_points(view)) / 1024})
+    report = pd.DataFrame(rows)
+    report['Points'] = len(detections)
+    report['Points KB'] = point_bytes / 1024
+    report['Reduction'] = report['Points KB'] / report['View KB']
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--heatmap-dir", default=HEATMAP_DIR)
+    parser.add_argument("--html", default=HTML_PATH, help="standalone map to rewrite ('' to skip)")
+    parser.add_argument("--rebuild", action="store_true", help="re-read every detection instead of the new ones")
+    args = parser.parse_args(argv)
+
+    manifest, mode = update_bins(heatmap_dir=args.heatmap_dir, rebuild=args.rebuild)
+    if mode == "none":
+        print(f"bins are up to date ({manifest['detections']} detections)")
+    else:
+        detail = f"rebuilt ({manifest['rebuilt']})" if mode == "rebuild" else "appended new detections"
+        print(f"{detail}: {manifest['detections']} detections, {manifest['seconds']:.2f}s")
+
+    bins = read_bins(args.heatmap_dir)
+    detections = pd.concat([read_new_rows(path)[0] for path in manifest['sources']], ignore_index=True)
+    print(payload_report(bins, detections).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+    if args.html:
+        size = write_html(bins, args.html)
+        print(f"{args.html}: {size / 1024:.1f} KB at zoom {DEFAULT_ZOOM} ({level_for_zoom(DEFAULT_ZOOM)} km hexagons)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,317 @@
+"""
+Rolling 1-6 month fire outlook for every district.
+
+The trained models answer "given this month's climate, what is the risk
+this month". The outlook instead forecasts from the latest month in
+combined_fire_climate.csv (the origin) how likely a fire is, and what the
+FireRisk score will be, 1 to HORIZONS months ahead, from what is already
+known at the origin:
+
+- lagged inputs: the five climate inputs and the fire count of the origin
+  month and the LAGS - 1 months before it, and the fire months of the past
+  year,
+- seasonal inputs: the target calendar month (cyclical), the same month
+  last year, and the district's fire frequency and mean FireRisk in that
+  calendar month over all years up to last year's (so never after the
+  origin).
+
+One model per target is fitted on every (district, origin, horizon) row of
+the history, with the horizon as an input (direct multi-horizon
+forecasting), so the whole district x horizon outlook is one batch
+prediction. The last HOLDOUT_MONTHS of targets are first held out to report
+skill per horizon against the seasonal baselines.
+
+The outlook is saved as data/forecasts/forecast_<origin YYYY-MM>.csv with a
+.json manifest holding the data fingerprint. A rerun on the same data does
+nothing; new monthly data (or a revised file) gives a new forecast.
+
+    python -m src.forecast [--data PATH] [--backend forest|xgboost|lightgbm] [--force]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import brier_score_loss, mean_absolute_error, roc_auc_score
+
+from src.backends import BACKENDS, DEFAULT_PARAMS, make_model
+from src.climate_archive import CLIMATE_VARIABLES
+from src.risk_engine import risk_categories
+from src.shared_cache import file_fingerprint
+from src.train import COMBINED_DATA_PATH, load_training_frame
+
+
+FORECAST_DIR = os.path.join("data", "forecasts")
+
+HORIZONS = 6
+# Origin month plus the months before it
+LAGS = 3
+HOLDOUT_MONTHS = 12
+
+# Many weakly informative lag features and noisy monthly targets: the forest needs
+# larger leaves and fewer features per split than the nowcasting models
+FORECAST_PARAMS = {
+    **DEFAULT_PARAMS,
+    'forest': {'n_estimators': 100, 'min_samples_leaf': 40, 'max_features': 0.2},
+}
+
+TARGETS = {
+    'fire_model': 'Fire_Occurred',
+    'risk_model': 'FireRisk',
+}
+
+
+def month_index(df):
+    """Months since January of year 0, so consecutive months differ by one."""
+    return df['YEAR'].to_numpy() * 12 + df['MONTH'].to_numpy() - 1
+
+
+def index_to_year_month(index):
+    index = np.asarray(index)
+    return index // 12, index % 12 + 1
+
+
+def build_panel(df):
+    """(district, month) rows with the running seasonal statistics the features need."""
+    panel = df.copy()
+    panel['T'] = month_index(panel)
+    panel = panel.sort_values(['DISTRICT', 'T']).reset_index(drop=True)
+    by_district = panel.groupby('DISTRICT')
+    panel['Fire_Log'] = np.log1p(panel['Fire_Count'])
+    panel['Fire_Months_12'] = by_district['Fire_Occurred'].transform(lambda s: s.rolling(12, min_periods=12).sum())
+    # Fire frequency and mean FireRisk per (district, calendar month), over the years up to and including this row
+    by_season = panel.groupby(['DISTRICT', 'MONTH'])
+    seen = by_season.cumcount() + 1
+    panel['Seasonal_Fire_Rate'] = by_season['Fire_Occurred'].cumsum() / seen
+    panel['Seasonal_Risk'] = by_season['FireRisk'].cumsum() / seen
+    return panel
+
+
+def forecast_features(panel, origins, horizons=range(1, HORIZONS + 1)):
+    """Feature rows for every (origin row, horizon), with the target month's actuals where known.
+
+    origins is a boolean mask over panel rows. Returns (meta, X, y): meta has
+    DISTRICT, ORIGIN, HORIZON and TARGET month indexes; y the targets (NaN
+    past the end of the data).
+    """
+    indexed = panel.set_index(['DISTRICT', 'T'])
+    base = panel[origins]
+    districts, origin_t = base['DISTRICT'].to_numpy(), base['T'].to_numpy()
+
+    def at(columns, t):
+        # Values of columns in each district at month t, NaN where the panel has no such row
+        return indexed[columns].reindex(pd.MultiIndex.from_arrays([districts, t])).to_numpy(dtype=float)
+
+    # Features that only depend on the origin are computed once and repeated per horizon
+    lagged = {}
+    for lag in range(LAGS):
+        values = at(CLIMATE_VARIABLES + ['Fire_Log'], origin_t - lag)
+        for i, col in enumerate(CLIMATE_VARIABLES + ['Fire_Log']):
+            lagged[f"{col}_lag{lag}"] = values[:, i]
+    lagged['Fire_Months_12'] = at(['Fire_Months_12'], origin_t)[:, 0]
+
+    metas, frames, targets = [], [], []
+    for h in horizons:
+        target_t = origin_t + h
+        _, target_month = index_to_year_month(target_t)
+        frame = pd.DataFrame(lagged)
+        frame['Horizon'] = h
+        frame['LAT'] = base['LAT'].to_numpy()
+        frame['LON'] = base['LON'].to_numpy()
+        frame['Target_sin'] = np.sin(2 * np.pi * target_month / 12)
+        frame['Target_cos'] = np.cos(2 * np.pi * target_month / 12)
+        # Last year's target month is at or before the origin for every horizon up to 12
+        last_year_cols = CLIMATE_VARIABLES + ['Fire_Occurred', 'FireRisk', 'Seasonal_Fire_Rate', 'Seasonal_Risk']
+        last_year = at(last_year_cols, target_t - 12)
+        for i, col in enumerate(last_year_cols):
+            frame[col if col.startswith('Seasonal') else f"{col}_last_year"] = last_year[:, i]
+        frames.append(frame)
+        targets.append(pd.DataFrame(at(list(TARGETS.values()), target_t), columns=list(TARGETS.values())))
+        metas.append(pd.DataFrame({'DISTRICT': districts, 'ORIGIN': origin_t, 'HORIZON': h, 'TARGET': target_t}))
+    return (pd.concat(metas, ignore_index=True), pd.concat(frames, ignore_index=True),
+            pd.concat(targets, ignore_index=True))
+
+
+def training_rows(panel):
+    """Every origin with complete features and a known target."""
+    meta, X, y = forecast_features(panel, np.ones(len(panel), dtype=bool))
+    complete = X.notna().all(axis=1).to_numpy() & y.notna().all(axis=1).to_numpy()
+    return meta[complete].reset_index(drop=True), X[complete].reset_index(drop=True), y[complete].reset_index(drop=True)
+
+
+def fit_models(X, y, backend='forest', n_jobs=1):
+    models = {}
+    for kind, target in TARGETS.items():
+        values = y[target].to_numpy()
+        models[kind] = make_model(kind, backend, FORECAST_PARAMS[backend], n_jobs).fit(
+            X, values.astype(int) if kind == 'fire_model' else values)
+    return models
+
+
+def predict(models, X):
+    """(P(fire), FireRisk) for every row, in one batch per model."""
+    return models['fire_model'].predict_proba(X)[:, 1], models['risk_model'].predict(X)
+
+
+def skill_by_horizon(meta, X, y, fire, risk):
+    """Held-out skill per horizon, next to the seasonal baselines in X."""
+    report = {}
+    fire_actual, risk_actual = y['Fire_Occurred'].to_numpy().astype(int), y['FireRisk'].to_numpy()
+    for h in sorted(meta['HORIZON'].unique()):
+        rows = (meta['HORIZON'] == h).to_numpy()
+        actual = fire_actual[rows]
+        seasonal = X['Seasonal_Fire_Rate'].to_numpy()[rows]
+        both_classes = 0 < actual.sum() < len(actual)
+        # String keys, as they read back from the manifest
+        report[str(h)] = {
+            'rows': int(rows.sum()),
+            'fire_auc': float(roc_auc_score(actual, fire[rows])) if both_classes else None,
+            'fire_auc_seasonal': float(roc_auc_score(actual, seasonal)) if both_classes else None,
+            'fire_brier': float(brier_score_loss(actual, fire[rows])),
+            'fire_brier_seasonal': float(brier_score_loss(actual, seasonal)),
+            'risk_mae': float(mean_absolute_error(risk_actual[rows], risk[rows])),
+            'risk_mae_last_year': float(mean_absolute_error(risk_actual[rows], X['FireRisk_last_year'].to_numpy()[rows])),
+        }
+    return report
+
+
+def forecast_table(panel, models):
+    """The outlook from the panel's last month, every district x horizon scored as one batch."""
+    origin = panel['T'].max()
+    meta, X, _ = forecast_features(panel, (panel['T'] == origin).to_numpy())
+    fire, risk = predict(models, X)
+    target_year, target_month = index_to_year_month(meta['TARGET'])
+    return pd.DataFrame({
+        'DISTRICT': meta['DISTRICT'],
+        'HORIZON': meta['HORIZON'],
+        'YEAR': target_year,
+        'MONTH': target_month,
+        'FIRE_PROBABILITY': fire,
+        'FIRE_RISK': risk,
+        'RISK_CATEGORY': risk_categories(risk),
+    }).sort_values(['DISTRICT', 'HORIZON']).reset_index(drop=True)
+
+
+def forecast_paths(origin, forecast_dir=FORECAST_DIR):
+    """(table, manifest) paths of the forecast made from origin (year, month)."""
+    stem = os.path.join(forecast_dir, f"forecast_{origin[0]}-{origin[1]:02d}")
+    return f"{stem}.csv", f"{stem}.json"
+
+
+def saved_forecast(data_path=COMBINED_DATA_PATH, forecast_dir=FORECAST_DIR, backend='forest'):
+    """(table path, manifest) of the saved forecast for this exact data file, or None if it is stale."""
+    fingerprint = file_fingerprint(data_path)
+    for manifest_path in sorted(glob.glob(os.path.join(forecast_dir, "forecast_*.json")), reverse=True):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        table_path = manifest_path[:-len(".json")] + ".csv"
+        if manifest['data_fingerprint'] == fingerprint and manifest['backend'] == backend \
+                and os.path.exists(table_path):
+            return table_path, manifest
+    return None
+
+
+def forecast(data_path=COMBINED_DATA_PATH, forecast_dir=FORECAST_DIR, backend='forest', n_jobs=1, force=False):
+    """Return (table path, manifest, computed); computed is False when the saved forecast is current."""
+    saved = None if force else saved_forecast(data_path, forecast_dir, backend)
+    if saved is not None:
+        return *saved, False
+
+    fingerprint = file_fingerprint(data_path)
+    df = load_training_frame(data_path)
+    last = df[['YEAR', 'MONTH']].sort_values(['YEAR', 'MONTH']).iloc[-1]
+    origin = (int(last['YEAR']), int(last['MONTH']))
+    table_path, manifest_path = forecast_paths(origin, forecast_dir)
+
+    timings = {}
+    start = time.perf_counter()
+    panel = build_panel(df)
+    meta, X, y = training_rows(panel)
+    timings['features'] = time.perf_counter() - start
+
+    # Skill on the last HOLDOUT_MONTHS of targets, from models that never saw them
+    start = time.perf_counter()
+    held_out = (meta['TARGET'] > panel['T'].max() - HOLDOUT_MONTHS).to_numpy()
+    models = fit_models(X[~held_out], y[~held_out], backend, n_jobs)
+    fire, risk = predict(models, X[held_out])
+    skill = skill_by_horizon(meta[held_out], X[held_out], y[held_out], fire, risk)
+    timings['holdout'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    models = fit_models(X, y, backend, n_jobs)
+    timings['fit'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = forecast_table(panel, models)
+    timings['forecast'] = time.perf_counter() - start
+
+    manifest = {
+        'origin': list(origin),
+        'created_utc': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data_path': data_path,
+        'data_fingerprint': fingerprint,
+        'backend': backend,
+        'horizons': HORIZONS,
+        'districts': int(table['DISTRICT'].nunique()),
+        'training_rows': len(X),
+        'features': list(X.columns),
+        'skill': skill,
+        'timings': timings,
+    }
+    os.makedirs(forecast_dir, exist_ok=True)
+    tmp_path = f"{table_path}.{os.getpid()}.tmp"
+    table.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, table_path)
+    # Written last: its presence marks a complete forecast
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return table_path, manifest, True
+
+
+def format_forecast(manifest):
+    origin = f"{manifest['origin'][0]}-{manifest['origin'][1]:02d}"
+    lines = [f"outlook from {origin}: {manifest['districts']} districts x {manifest['horizons']} months "
+             f"({manifest['backend']}, {manifest['training_rows']} training rows)",
+             f"held-out skill, last {HOLDOUT_MONTHS} months of targets (seasonal baseline in brackets):",
+             f"  {'horizon':<9}{'fire AUC':>18}{'fire Brier':>20}{'risk MAE':>20}"]
+
+    def pair(value, baseline):
+        if value is None:
+            return "n/a"
+        return f"{value:.3f} ({baseline:.3f})"
+
+    for h, entry in manifest['skill'].items():
+        lines.append(f"  {h:<9}{pair(entry['fire_auc'], entry['fire_auc_seasonal']):>18}"
+                     f"{pair(entry['fire_brier'], entry['fire_brier_seasonal']):>20}"
+                     f"{pair(entry['risk_mae'], entry['risk_mae_last_year']):>20}")
+    lines.append("timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in manifest['timings'].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--data", default=COMBINED_DATA_PATH)
+    parser.add_argument("--forecast-dir", default=FORECAST_DIR)
+    parser.add_argument("--backend", choices=BACKENDS, default='forest')
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--force", action="store_true", help="recompute even if the saved forecast is current")
+    args = parser.parse_args(argv)
+
+    table_path, manifest, computed = forecast(args.data, args.forecast_dir, args.backend, args.n_jobs, args.force)
+    if not computed:
+        print(f"forecast is current for this data ({manifest['created_utc']}); use --force to recompute")
+    print(format_forecast(manifest))
+    print(f"table: {table_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+District gazetteer: normalized district names, aliases, centroids and
+provinces, built once and queried with plain dict lookups.
+
+The climate archive, the processed tables and the MODIS/shapefile join do not
+spell districts the same way (RUKUM_E/RUKUM_W vs rukum, DHANUSHA vs dhanusa,
+KABHREPALANCHOK vs kabhre, ...). Every lookup goes through normalize_district()
+so any of those spellings resolves to the canonical name used in
+combined_fire_climate.csv.
+
+The shapefile join names 75 districts (Nepal's 77 with the east/west halves
+of Rukum and Nawalparasi merged, as in the processed tables). Only the 62
+in the climate archive have a centroid, so only they get a location map and
+a prediction; the other 13 have a province but no coordinates.
+"""
+
+import glob
+import os
+
+import pandas as pd
+
+
+# Spellings seen in the raw data -> canonical name in the processed tables
+DISTRICT_ALIASES = {
+    "rukum_e": "rukum",
+    "rukum_w": "rukum",
+    "rukum_east": "rukum",
+    "rukum_west": "rukum",
+    "nawalparasi_e": "nawalparasi",
+    "nawalparasi_w": "nawalparasi",
+    "nawalparasi_east": "nawalparasi",
+    "nawalparasi_west": "nawalparasi",
+    "bajhang": "bajang",
+    "chitwan": "chitawan",
+    "dhanusha": "dhanusa",
+    "dolakha": "dolkha",
+    "kabhrepalanchok": "kabhre",
+    "kavrepalanchok": "kabhre",
+    "makawanpur": "makwanpur",
+    "panchthar": "panchther",
+    "rautahat": "routahat",
+    "tanahu": "tanahun",
+}
+
+MODIS_WITH_DISTRICT_GLOB = os.path.join("data", "raw", "modis", "modis_*_Nepal_with_district.csv")
+
+
+def normalize_district(name):
+    """Lowercase, trim and resolve aliases so any spelling maps to one key."""
+    key = str(name).strip().lower().replace(" ", "_").replace("-", "_")
+    return DISTRICT_ALIASES.get(key, key)
+
+
+class DistrictGazetteer:
+    """Canonical district records keyed by normalized name."""
+
+    def __init__(self, records):
+        # records: {name: {"name", "lat", "lon", "province"}}
+        self.records = records
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return normalize_district(name) in self.records
+
+    def names(self):
+        return sorted(self.records)
+
+    def unlocated_names(self):
+        # Districts known only from the MODIS join, with no climate data
+        return sorted(n for n, r in self.records.items() if r["lat"] is None)
+
+    def located_names(self):
+        # Districts with a known centroid (the ones the models were trained on)
+        return sorted(n for n, r in self.records.items() if r["lat"] is not None)
+
+    def lookup(self, name):
+        return self.records.get(normalize_district(name))
+
+    def centroid(self, name):
+        record = self.lookup(name)
+        if record is None or record["lat"] is None:
+            return None
+        return record["lat"], record["lon"]
+
+    def province(self, name):
+        record = self.lookup(name)
+        return None if record is None else record["province"]
+
+
+def build_gazetteer(combined_df, modis_paths=None):
+    """
+    Build the gazetteer in one vectorized pass.
+
+    Centroids come from the LAT/LON columns of the combined climate/fire table;
+    provinces come from the MODIS detections joined to the district shapefile.
+    """
+    districts = combined_df[['DISTRICT', 'LAT', 'LON']].dropna().copy()
+    districts['DISTRICT'] = districts['DISTRICT'].map(normalize_district)
+    centroids = districts.groupby('DISTRICT')[['LAT', 'LON']].first()
+
+    if modis_paths is None:
+        modis_paths = sorted(glob.glob(MODIS_WITH_DISTRICT_GLOB))
+    provinces = {}
+    if modis_paths:
+        admin = pd.concat(
+            [pd.read_csv(p, usecols=['State', 'District']) for p in modis_paths],
+            ignore_index=True
+        ).dropna().drop_duplicates()
+        admin['District'] = admin['District'].map(normalize_district)
+        # Merged districts (rukum, nawalparasi) straddle two provinces
+        provinces = admin.groupby('District')['State'].agg(lambda s: " / ".join(sorted(set(s)))).to_dict()
+
+    records = {}
+    for name in sorted(set(centroids.index) | set(provinces)):
+        located = name in centroids.index
+        records[name] = {
+            "name": name,
+            "lat": float(centroids.at[name, 'LAT']) if located else None,
+            "lon": float(centroids.at[name, 'LON']) if located else None,
+            "province": provinces.get(name),
+        }
+    return DistrictGazetteer(records)
+
+
+def render_district_map(name, lat, lon, zoom_start=8):
+    """Render the pin map for one district to a standalone HTML document."""
+    import folium
+
+    # Create a folium map centered at the district's coordinates
+    m = folium.Map(location=[lat, lon], zoom_start=zoom_start)
+
+    # Add a marker with custom icon (pin emoji)
+    folium.Marker(
+        location=[lat, lon],
+        popup=name.title(),
+        icon=folium.DivIcon(
+            icon_size=(150, 36),
+            icon_anchor=(12, 36),
+            html='<div style="font-size: 24px;">📍</div>',
+        )
+    ).add_to(m)
+
+    return folium.Figure().add_child(m).render()
+
+
+def render_all_district_maps(gazetteer):
+    """Pre-render the location map for every district with a centroid."""
+    return {
+        name: render_district_map(name, *gazetteer.centroid(name))
+        for name in gazetteer.located_names()
+    }
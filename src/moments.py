@@ -0,0 +1,213 @@
+"""
+Mergeable running moments (count, means, co-moments) for correlation queries.
+
+Moments are accumulated per (YEAR, DISTRICT) partition when the processed
+data is written. Any year/district subset can then be answered by merging
+the selected partitions: cost O(partitions * k^2), no pass over raw rows.
+
+Merging uses the pairwise update of Chan et al., so partitions can be built
+in parallel and combined in any order without losing precision.
+
+Rebuild the stored moments after regenerating combined_fire_climate.csv:
+    python -m src.moments
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.shared_cache import file_fingerprint
+
+
+FIRE_CLIMATE_VARS = ['Prep', 'AvgTemp', 'MaxTemp', 'Humidity', 'WindSpeed',
+                     'Brightness', 'Confidence', 'FRP', 'Fire_Count']
+PARTITION_COLUMNS = ['YEAR', 'DISTRICT']
+
+COMBINED_DATA_PATH = os.path.join("data", "processed", "combined_fire_climate.csv")
+MOMENTS_PATH = os.path.join("data", "processed", "fire_climate_moments.npz")
+
+# Below this many rows a serial pass (about 20 ms for the 4.5k combined rows)
+# beats starting a process pool
+PARALLEL_MIN_ROWS = 500_000
+
+
+class MomentAccumulator:
+    """Running count, mean vector and co-moment matrix over k columns."""
+
+    def __init__(self, k):
+        self.n = 0
+        self.mean = np.zeros(k)
+        self.comoment = np.zeros((k, k))
+
+    @classmethod
+    def from_arrays(cls, n, mean, comoment):
+        acc = cls(len(mean))
+        acc.n, acc.mean, acc.comoment = int(n), np.asarray(mean, float), np.asarray(comoment, float)
+        return acc
+
+    def update(self, batch):
+        """Fold a 2D array of rows (batch_size x k) into the moments."""
+        batch = np.asarray(batch, dtype=float)
+        if len(batch) == 0:
+            return self
+        mean = batch.mean(axis=0)
+        centered = batch - mean
+        return self.merge(MomentAccumulator.from_arrays(len(batch), mean, centered.T @ centered))
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n, self.mean, self.comoment = other.n, other.mean.copy(), other.comoment.copy()
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        self.mean = self.mean + delta * (other.n / n)
+        self.n = n
+        return self
+
+    def covariance(self, ddof=1):
+        return self.comoment / max(self.n - ddof, 1)
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.comoment / np.outer(std, std)
+
+
+def _partition_moments(args):
+    # Worker: moments for a block of partitions, all arrays so pickling stays cheap
+    codes, values, n_partitions = args
+    k = values.shape[1]
+    n = np.bincount(codes, minlength=n_partitions).astype(float)
+    sums = np.zeros((n_partitions, k))
+    np.add.at(sums, codes, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(n[:, None] > 0, sums / n[:, None], 0.0)
+    centered = values - means[codes]
+    comoments = np.zeros((n_partitions, k, k))
+    np.add.at(comoments, codes, centered[:, :, None] * centered[:, None, :])
+    return n, means, comoments
+
+
+class PartitionedMoments:
+    """Per-partition moments plus vectorized merging over any subset."""
+
+    def __init__(self, keys, n, means, comoments, columns, source_fingerprint=None):
+        self.keys = keys                      # DataFrame of partition labels
+        self.n = n                            # (P,)
+        self.means = means                    # (P, k)
+        self.comoments = comoments            # (P, k, k)
+        self.columns = list(columns)
+        self.source_fingerprint = source_fingerprint
+
+    @classmethod
+    def from_frame(cls, df, columns=FIRE_CLIMATE_VARS, by=PARTITION_COLUMNS, n_jobs=None,
+                   source_fingerprint=None):
+        data = df[by + list(columns)].dropna()
+        keys_index = pd.MultiIndex.from_frame(data[by])
+        codes, uniques = pd.factorize(keys_index, sort=True)
+        keys = uniques.to_frame(index=False)
+        keys.columns = by
+        values = data[list(columns)].to_numpy(dtype=float)
+        n_partitions = len(keys)
+
+        # Split rows into contiguous blocks of partitions and reduce them in parallel
+        if n_jobs is None:
+            n_jobs = (os.cpu_count() or 1) if len(data) >= PARALLEL_MIN_ROWS else 1
+        order = np.argsort(codes, kind='stable')
+        codes, values = codes[order], values[order]
+        blocks = np.array_split(np.arange(n_partitions), min(n_jobs, n_partitions) or 1)
+        tasks = []
+        for block in blocks:
+            if len(block) == 0:
+                continue
+            lo, hi = np.searchsorted(codes, [block[0], block[-1] + 1])
+            tasks.append((codes[lo:hi] - block[0], values[lo:hi], len(block)))
+
+        if n_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+                results = list(pool.map(_partition_moments, tasks))
+        else:
+            results = [_partition_moments(task) for task in tasks]
+
+        n = np.concatenate([r[0] for r in results])
+        means = np.concatenate([r[1] for r in results])
+        comoments = np.concatenate([r[2] for r in results])
+        return cls(keys, n, means, comoments, columns, source_fingerprint)
+
+    def select(self, years=None, districts=None):
+        """Boolean mask of partitions inside the requested years/districts."""
+        mask = np.ones(len(self.keys), dtype=bool)
+        if years is not None:
+            mask &= self.keys['YEAR'].isin(list(years)).to_numpy()
+        if districts is not None:
+            mask &= self.keys['DISTRICT'].isin(list(districts)).to_numpy()
+        return mask
+
+    def merged(self, years=None, districts=None):
+        mask = self.select(years, districts)
+        n, means, comoments = self.n[mask], self.means[mask], self.comoments[mask]
+        total = n.sum()
+        if total == 0:
+            return MomentAccumulator(len(self.columns))
+        mean = (n[:, None] * means).sum(axis=0) / total
+        delta = means - mean
+        comoment = comoments.sum(axis=0) + np.einsum('p,pi,pj->ij', n, delta, delta)
+        return MomentAccumulator.from_arrays(total, mean, comoment)
+
+    def correlation(self, years=None, districts=None):
+        corr = self.merged(years, districts).correlation()
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def save(self, path=MOMENTS_PATH):
+        # Unique per process so concurrent rebuilds never write the same file; savez wants the .npz suffix
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            years=self.keys['YEAR'].to_numpy(),
+            districts=self.keys['DISTRICT'].to_numpy(dtype=str),
+            n=self.n, means=self.means, comoments=self.comoments,
+            columns=np.array(self.columns),
+            source_fingerprint=np.array(self.source_fingerprint or ""),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MOMENTS_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            keys = pd.DataFrame({'YEAR': data['years'], 'DISTRICT': data['districts']})
+            return cls(keys, data['n'], data['means'], data['comoments'],
+                       [str(c) for c in data['columns']], str(data['source_fingerprint']) or None)
+
+
+def build_moments(combined_path=COMBINED_DATA_PATH, moments_path=MOMENTS_PATH, n_jobs=None):
+    """Accumulate and store partition moments for the combined fire/climate table."""
+    df = pd.read_csv(combined_path)
+    moments = PartitionedMoments.from_frame(df, n_jobs=n_jobs,
+                                            source_fingerprint=file_fingerprint(combined_path))
+    moments.save(moments_path)
+    return moments
+
+
+def load_moments(combined_path=COMBINED_DATA_PATH, moments_path=MOMENTS_PATH):
+    """Load stored moments, rebuilding them if the combined table has changed."""
+    if os.path.exists(moments_path):
+        moments = PartitionedMoments.load(moments_path)
+        if moments.source_fingerprint == file_fingerprint(combined_path):
+            return moments
+    return build_moments(combined_path, moments_path)
+
+
+def main():
+    built = build_moments()
+    print(f"Stored moments for {len(built.keys)} partitions of {int(built.n.sum())} rows in {MOMENTS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+"""
+Incremental refresh of a trained artifact set as new months arrive.
+
+A full retrain (src/train.py) refits everything on the whole history. A
+refresh instead takes the rows after the version's trained_through month and:
+
+- scores them with the current models first (a prequential check of how
+  well the models forecast the new months),
+- transforms only those rows with the existing scaler and encoder,
+- adds trees to both forests (warm_start), fitted on the new rows plus the
+  fixed-size replay sample of history kept with the artifacts (trees that
+  only saw one month predict the other eleven badly), and drops the oldest
+  trees beyond --max-trees so old history ages out,
+- merges them into the replay sample (reservoir sampling), the
+  district-month climate baseline and the fire statistics.
+
+With --new-data pointing at a file holding just the latest months, the
+cost therefore grows with the new data, not the total history.
+
+The scaler and encoder stay fixed, because refitting them would invalidate
+every existing tree. A refresh falls back to a full retrain (which refits
+them) when the new rows contain an unseen district, when a climate input
+drifts from its district-month baseline by more than --drift-threshold
+standard deviations on average over the months since the last full retrain
+(a single unusual month is weather, not drift, so at least
+DRIFT_MIN_MONTHS are needed before it counts), or when more than --max-incremental-months
+have been added since the last full retrain.
+
+    python -m src.refresh models/versions/<version> [--data PATH] [--new-data PATH] [--trees 10] [--promote]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, roc_auc_score
+
+from src.climate_archive import CLIMATE_VARIABLES
+from src.feature_store import STORE_DIR, attach_lag_features, update_store
+from src.features import build_model_input, model_lag_columns
+from src.shared_cache import file_fingerprint
+from src.train import (COMBINED_DATA_PATH, VERSIONS_DIR, climate_baseline, format_report, latest_month,
+                       load_training_frame, district_month_fire_stats, make_version_dir, promote, train)
+
+
+DEFAULT_TREES_PER_REFRESH = 10
+DEFAULT_MAX_INCREMENTAL_MONTHS = 12
+# Mean z-score of a climate input against its district-month baseline
+DEFAULT_DRIFT_THRESHOLD = 1.0
+DRIFT_MIN_MONTHS = 3
+
+
+def months_after(df, year_month):
+    """Rows strictly after (year, month)."""
+    year, month = year_month
+    periods = df['YEAR'].to_numpy() * 12 + df['MONTH'].to_numpy()
+    return df[periods > year * 12 + month].reset_index(drop=True)
+
+
+def merge_baseline(baseline, new_rows):
+    """Combine per-group count/mean/M2 with the new rows' (Chan et al. parallel update)."""
+    keys = ['DISTRICT', 'MONTH']
+    merged = baseline.merge(climate_baseline(new_rows), on=keys, how='outer', suffixes=('_a', '_b')).fillna(0)
+    na, nb = merged['n_a'].to_numpy(), merged['n_b'].to_numpy()
+    n = na + nb
+    result = merged[keys].copy()
+    result['n'] = n.astype(int)
+    for var in CLIMATE_VARIABLES:
+        mean_a, mean_b = merged[f'{var}_mean_a'].to_numpy(), merged[f'{var}_mean_b'].to_numpy()
+        delta = mean_b - mean_a
+        result[f'{var}_mean'] = mean_a + delta * nb / n
+        result[f'{var}_m2'] = merged[f'{var}_m2_a'] + merged[f'{var}_m2_b'] + delta ** 2 * na * nb / n
+    return result
+
+
+def merge_fire_stats(stats, new_rows):
+    keys = ['DISTRICT', 'MONTH']
+    merged = stats.merge(district_month_fire_stats(new_rows), on=keys, how='outer', suffixes=('_a', '_b')).fillna(0)
+    result = merged[keys].copy()
+    result['total_records'] = (merged['total_records_a'] + merged['total_records_b']).astype(int)
+    result['fire_records'] = (merged['fire_records_a'] + merged['fire_records_b']).astype(int)
+    result['max_count'] = np.maximum(merged['max_count_a'], merged['max_count_b'])
+    result['fire_probability'] = result['fire_records'] / result['total_records']
+    return result
+
+
+def drift_report(baseline, new_rows):
+    """Per climate input: mean z-score of the new rows against their district-month baseline."""
+    joined = new_rows.merge(baseline, on=['DISTRICT', 'MONTH'], how='left')
+    known = joined['n'].fillna(0).to_numpy() > 1
+    report = {'rows': len(new_rows), 'rows_without_baseline': int((~known).sum()), 'mean_z': {}}
+    for var in CLIMATE_VARIABLES:
+        std = np.sqrt(joined[f'{var}_m2'] / (joined['n'] - 1))
+        z = ((joined[var] - joined[f'{var}_mean']) / std.where(std > 0))[known]
+        report['mean_z'][var] = float(z.mean()) if z.notna().any() else 0.0
+    return report
+
+
+def cumulative_drift(refreshes, drift):
+    """Row-weighted mean z-scores over the earlier refreshes and this one."""
+    reports = [r['drift'] for r in refreshes] + [drift]
+    rows = sum(r['rows'] for r in reports)
+    return {var: sum(r['mean_z'][var] * r['rows'] for r in reports) / rows for var in CLIMATE_VARIABLES}
+
+
+def update_replay(replay, X_new, y_risk, y_fire, rows_seen, seed):
+    """Reservoir-sample the new rows into the replay arrays, keeping it uniform over all rows seen."""
+    replay = {key: values.copy() for key, values in replay.items()}
+    rng = np.random.default_rng(seed)
+    size = len(replay['X'])
+    # Row t of the history replaces a random slot with probability size / (t + 1)
+    slots = rng.integers(0, rows_seen + np.arange(1, len(X_new) + 1))
+    for i in np.flatnonzero(slots < size):
+        slot = slots[i]
+        replay['X'][slot], replay['y_risk'][slot], replay['y_fire'][slot] = X_new[i], y_risk[i], y_fire[i]
+    return replay
+
+
+def add_trees(model, X, y, n_new, max_trees, seed):
+    """Fit n_new more trees on (X, y) only; drop the oldest beyond max_trees. Returns trees dropped."""
+    # warm_start draws the new trees' seeds after len(estimators_) skipped ones, which stays the same once
+    # the window is full, so a fixed random_state would repeat the same bootstraps on every refresh
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new, random_state=seed)
+    model.fit(X, y)
+    dropped = max(0, len(model.estimators_) - max_trees)
+    if dropped:
+        model.estimators_ = model.estimators_[dropped:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_))
+    return dropped
+
+
+def prequential_metrics(risk_model, fire_model, X, y_risk, y_fire):
+    """How the current models score the new months before seeing them."""
+    metrics = {'risk_mae': float(mean_absolute_error(y_risk, risk_model.predict(X)))}
+    if len(np.unique(y_fire)) == 2:
+        metrics['fire_auc'] = float(roc_auc_score(y_fire, fire_model.predict_proba(X)[:, 1]))
+    return metrics
+
+
+def full_retrain_reason(manifest, encoder, new, drift, max_incremental_months, drift_threshold):
+    unseen = sorted(set(new['DISTRICT']) - set(encoder.categories_[0]))
+    if unseen:
+        return f"new districts: {', '.join(unseen)}"
+    months = sum(r['months'] for r in manifest['refreshes']) + new[['YEAR', 'MONTH']].drop_duplicates().shape[0]
+    if months > max_incremental_months:
+        return f"{months} months since the last full retrain (limit {max_incremental_months})"
+    if months < DRIFT_MIN_MONTHS:
+        return None
+    mean_z = cumulative_drift(manifest['refreshes'], drift)
+    drifted = {var: z for var, z in mean_z.items() if abs(z) > drift_threshold}
+    if drifted:
+        return "drift in " + ", ".join(f"{var} (mean z {z:+.2f})" for var, z in drifted.items())
+    return None
+
+
+def refresh(base_dir, data_path=COMBINED_DATA_PATH, new_data_path=None, versions_dir=VERSIONS_DIR,
+            trees=DEFAULT_TREES_PER_REFRESH, max_trees=None,
+            max_incremental_months=DEFAULT_MAX_INCREMENTAL_MONTHS, drift_threshold=DEFAULT_DRIFT_THRESHOLD):
+    """Return (version_dir, manifest, mode) where mode is "incremental", "full" or "none".
+
+    New rows are read from new_data_path when given, otherwise from data_path
+    (the full history, which a full retrain always uses).
+    """
+    with open(os.path.join(base_dir, "manifest.json")) as f:
+        manifest = json.load(f)
+    if manifest.get('backend', 'forest') != 'forest' or 'trained_through' not in manifest:
+        raise ValueError("Incremental refresh needs a forest artifact set written by src.train; "
+                         "run a full retrain with python -m src.train instead")
+
+    timings = {}
+    start = time.perf_counter()
+    source_path = new_data_path or data_path
+    source = load_training_frame(source_path)
+    new = months_after(source, manifest['trained_through'])
+    timings['load_new_rows'] = time.perf_counter() - start
+    if new.empty:
+        return base_dir, manifest, "none"
+
+    encoder = joblib.load(os.path.join(base_dir, "district_encoder.pkl"))
+    baseline = pd.read_csv(os.path.join(base_dir, "climate_baseline.csv"))
+    drift = drift_report(baseline, new)
+    reason = full_retrain_reason(manifest, encoder, new, drift, max_incremental_months, drift_threshold)
+    if reason:
+        # Default parameters; a hyperparameter search stays an explicit python -m src.train
+        version_dir, full_manifest = train(data_path, versions_dir, search=False,
+                                           lag_features=bool(manifest.get('lag_features')))
+        full_manifest['retrain_reason'] = reason
+        with open(os.path.join(version_dir, "manifest.json"), "w") as f:
+            json.dump(full_manifest, f, indent=2)
+        return version_dir, full_manifest, "full"
+
+    start = time.perf_counter()
+    scaler = joblib.load(os.path.join(base_dir, "scaler.pkl"))
+    if model_lag_columns(scaler):
+        # The store the base version was trained from; the whole history is checked against it,
+        # a --new-data file of just the latest months is appended
+        store_dir = manifest.get('lag_store') or STORE_DIR
+        update_store(source, store_dir)
+        new = attach_lag_features(new, store_dir)
+    X_new = build_model_input(new, scaler, encoder)
+    y_risk = new['FireRisk'].to_numpy()
+    y_fire = new['Fire_Occurred'].to_numpy()
+    timings['transform_new_rows'] = time.perf_counter() - start
+
+    risk_model = joblib.load(os.path.join(base_dir, "risk_model.pkl"))
+    fire_model = joblib.load(os.path.join(base_dir, "fire_model.pkl"))
+    before = prequential_metrics(risk_model, fire_model, X_new, y_risk, y_fire)
+
+    # Without a window the forests would only ever grow
+    max_trees = max_trees or 2 * manifest['params']['risk_model'].get('n_estimators', 100)
+    start = time.perf_counter()
+    with np.load(os.path.join(base_dir, "replay.npz")) as f:
+        replay = dict(f)
+    X_fit = np.vstack([replay['X'], X_new])
+    # A different seed per refresh of the version chain
+    seed = len(manifest['refreshes']) + 1
+    dropped = {
+        'risk_model': add_trees(risk_model, X_fit, np.concatenate([replay['y_risk'], y_risk]), trees, max_trees,
+                                seed),
+        'fire_model': add_trees(fire_model, X_fit, np.concatenate([replay['y_fire'], y_fire]), trees, max_trees,
+                                seed),
+    }
+    replay = update_replay(replay, X_new, y_risk, y_fire, manifest['rows'], seed)
+    timings['add_trees'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fingerprint = file_fingerprint(source_path)
+    version_dir = make_version_dir(versions_dir, fingerprint)
+    version = os.path.basename(version_dir)
+    joblib.dump(risk_model, os.path.join(version_dir, "risk_model.pkl"))
+    joblib.dump(fire_model, os.path.join(version_dir, "fire_model.pkl"))
+    for name in ["scaler.pkl", "district_encoder.pkl"]:
+        shutil.copyfile(os.path.join(base_dir, name), os.path.join(version_dir, name))
+    np.savez(os.path.join(version_dir, "replay.npz"), **replay)
+    merge_baseline(baseline, new).to_csv(os.path.join(version_dir, "climate_baseline.csv"), index=False)
+    stats = pd.read_csv(os.path.join(base_dir, "district_month_stats.csv"))
+    merge_fire_stats(stats, new).to_csv(os.path.join(version_dir, "district_month_stats.csv"), index=False)
+    timings['write_artifacts'] = time.perf_counter() - start
+
+    refreshed = dict(manifest)
+    refreshed.update({
+        'version': version,
+        'created_utc': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'parent_version': manifest['version'],
+        'data_path': source_path,
+        'data_fingerprint': fingerprint,
+        'rows': manifest['rows'] + len(new),
+        'trained_through': latest_month(new),
+        'trees': {'risk_model': len(risk_model.estimators_), 'fire_model': len(fire_model.estimators_)},
+        'refreshes': manifest['refreshes'] + [{
+            'version': version,
+            'rows': len(new),
+            'months': int(new[['YEAR', 'MONTH']].drop_duplicates().shape[0]),
+            'trees_added': trees,
+            'trees_dropped': dropped,
+            'prequential': before,
+            'drift': drift,
+            'timings': timings,
+        }],
+        'timings': timings,
+    })
+    with open(os.path.join(version_dir, "manifest.json"), "w") as f:
+        json.dump(refreshed, f, indent=2)
+    return version_dir, refreshed, "incremental"
+
+
+def format_refresh(manifest):
+    entry = manifest['refreshes'][-1]
+    lines = [f"version {manifest['version']}: +{entry['rows']} rows over {entry['months']} month(s), "
+             f"trained through {manifest['trained_through'][0]}-{manifest['trained_through'][1]:02d}"]
+    lines.append("before update: " + ", ".join(f"{k} {v:.4f}" for k, v in entry['prequential'].items()))
+    lines.append("drift (mean z): " + ", ".join(f"{k} {v:+.2f}" for k, v in entry['drift']['mean_z'].items()))
+    lines.append(f"trees: {manifest['trees']} (dropped {entry['trees_dropped']})")
+    lines.append("timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in entry['timings'].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("base", help="artifact set to refresh, e.g. models/versions/<version>")
+    parser.add_argument("--data", default=COMBINED_DATA_PATH, help="full history, used for a full retrain")
+    parser.add_argument("--new-data", default=None,
+                        help="file with the months after the base version (default: read them from --data)")
+    parser.add_argument("--versions-dir", default=VERSIONS_DIR)
+    parser.add_argument("--trees", type=int, default=DEFAULT_TREES_PER_REFRESH, help="trees added per model")
+    parser.add_argument("--max-trees", type=int, default=None,
+                        help="keep at most this many trees per forest (default: twice the full retrain's)")
+    parser.add_argument("--max-incremental-months", type=int, default=DEFAULT_MAX_INCREMENTAL_MONTHS)
+    parser.add_argument("--drift-threshold", type=float, default=DEFAULT_DRIFT_THRESHOLD)
+    parser.add_argument("--promote", action="store_true", help="copy the refreshed artifacts into models/")
+    args = parser.parse_args(argv)
+
+    version_dir, manifest, mode = refresh(args.base, args.data, args.new_data, args.versions_dir, args.trees,
+                                          args.max_trees, args.max_incremental_months, args.drift_threshold)
+    if mode == "none":
+        print(f"no rows after {manifest['trained_through'][0]}-{manifest['trained_through'][1]:02d}; nothing to do")
+        return 0
+    if mode == "full":
+        print(f"full retrain: {manifest['retrain_reason']}")
+        print(format_report(manifest))
+    else:
+        print(format_refresh(manifest))
+    print(f"artifacts: {version_dir}")
+    if args.promote:
+        promote(version_dir)
+        print("promoted to models/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Fire risk score engines.
+
+The risk_model in src/models.ipynb is a RandomForestRegressor trained on a
+target that is itself a fixed linear formula of four inputs:
+
+    FireRisk = 0.4*MaxTemp + 0.3*(100 - Humidity) + 0.2*WindSpeed - 0.1*Prep
+
+ClosedFormRiskEngine evaluates that formula directly on whole arrays, so it
+needs no features, no scaler and no tree traversal. ForestRiskEngine keeps
+the trained model (the forest, or a boosting backend from src/train.py)
+available as an alternative. Both take a frame with the
+raw input columns (plus, optionally, the already scaled features) and return
+one score per row; score_with_spread adds the per-tree spread of a forest
+(src/uncertainty.py).
+
+    python -m src.risk_engine   prints the agreement between the two engines
+"""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.backends import BACKEND_LABELS, backend_of
+from src.features import build_model_input
+from src.uncertainty import TreeStack, point_only, supports_tree_spread
+
+
+RISK_WEIGHTS = {'MaxTemp': 0.4, 'Humidity': -0.3, 'WindSpeed': 0.2, 'Prep': -0.1}
+RISK_INTERCEPT = 0.3 * 100
+
+# Upper bounds of Low / Moderate / High; anything above is Extreme
+RISK_CATEGORY_BOUNDS = [15, 25, 35]
+RISK_CATEGORIES = ["Low", "Moderate", "High", "Extreme"]
+
+DEFAULT_RISK_ENGINE = "formula"
+
+
+def fire_risk_score(prep, max_temp, humidity, wind_speed):
+    """The training target, for scalars or arrays of any matching shape."""
+    return (RISK_INTERCEPT
+            + RISK_WEIGHTS['MaxTemp'] * np.asarray(max_temp, dtype=float)
+            + RISK_WEIGHTS['Humidity'] * np.asarray(humidity, dtype=float)
+            + RISK_WEIGHTS['WindSpeed'] * np.asarray(wind_speed, dtype=float)
+            + RISK_WEIGHTS['Prep'] * np.asarray(prep, dtype=float))
+
+
+def risk_categories(scores):
+    """Vectorized get_risk_category: an array of category names."""
+    return np.asarray(RISK_CATEGORIES)[np.digitize(scores, RISK_CATEGORY_BOUNDS)]
+
+
+class ClosedFormRiskEngine:
+    """The FireRisk formula itself."""
+
+    name = "formula"
+    label = "Closed-form formula"
+
+    def score(self, frame, X_scaled=None):
+        # X_scaled is accepted for interface parity with ForestRiskEngine and ignored
+        return fire_risk_score(frame['Prep'], frame['MaxTemp'], frame['Humidity'], frame['WindSpeed'])
+
+    def score_with_spread(self, frame, X_scaled=None):
+        # Exact for the given inputs; there is nothing to disagree
+        return point_only(self.score(frame))
+
+    def describe(self):
+        return self.label
+
+
+class ForestRiskEngine:
+    """The trained risk_model, fed the full scaled feature layout."""
+
+    name = "forest"
+    label = "Trained model"
+
+    def __init__(self, risk_model, scaler, district_encoder, tree_stack=None):
+        self.risk_model = risk_model
+        self.scaler = scaler
+        self.district_encoder = district_encoder
+        # Built on first use unless the caller keeps one per loaded model
+        self.tree_stack = tree_stack
+
+    def score(self, frame, X_scaled=None):
+        # Callers that already scaled the features for the fire model can pass them in
+        if X_scaled is None:
+            X_scaled = build_model_input(frame, self.scaler, self.district_encoder)
+        return self.risk_model.predict(X_scaled)
+
+    def score_with_spread(self, frame, X_scaled=None):
+        """value/std/lower/upper per row from one traversal of all trees (point only for boosting)."""
+        if X_scaled is None:
+            X_scaled = build_model_input(frame, self.scaler, self.district_encoder)
+        if not supports_tree_spread(self.risk_model):
+            return point_only(self.risk_model.predict(X_scaled))
+        if self.tree_stack is None:
+            self.tree_stack = TreeStack(self.risk_model)
+        return self.tree_stack.summarize(X_scaled)
+
+    def describe(self):
+        return f"{self.label} ({BACKEND_LABELS[backend_of(self.risk_model)]})"
+
+
+RISK_ENGINE_LABELS = {
+    ClosedFormRiskEngine.name: ClosedFormRiskEngine.label,
+    ForestRiskEngine.name: ForestRiskEngine.label,
+}
+
+
+def agreement_report(reference, candidate):
+    """How closely candidate scores track the reference (the formula)."""
+    reference = np.asarray(reference, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    error = candidate - reference
+    total = np.sum((reference - reference.mean()) ** 2)
+    return {
+        'rows': len(reference),
+        'mae': float(np.mean(np.abs(error))),
+        'rmse': float(np.sqrt(np.mean(error ** 2))),
+        'max_abs_error': float(np.max(np.abs(error))),
+        'r2': float(1 - np.sum(error ** 2) / total) if total > 0 else np.nan,
+        'category_agreement': float(np.mean(risk_categories(reference) == risk_categories(candidate))),
+    }
+
+
+def format_report(report):
+    return "\n".join([
+        f"rows compared:       {report['rows']}",
+        f"mean abs error:      {report['mae']:.4f}",
+        f"rmse:                {report['rmse']:.4f}",
+        f"max abs error:       {report['max_abs_error']:.4f}",
+        f"r2 vs formula:       {report['r2']:.6f}",
+        f"category agreement:  {report['category_agreement']:.2%}",
+    ])
+
+
+def main():
+    data = pd.read_csv(os.path.join("data", "processed", "combined_fire_climate.csv"))
+    data['DISTRICT'] = data['DISTRICT'].str.lower().str.strip()
+    model_dir = "models"
+    forest = ForestRiskEngine(*(joblib.load(os.path.join(model_dir, f"{name}.pkl"))
+                                for name in ['risk_model', 'scaler', 'district_encoder']))
+
+    formula_scores = ClosedFormRiskEngine().score(data)
+    forest_scores = forest.score(data)
+    print(f"{forest.describe()} vs closed-form FireRisk on the combined dataset")
+    print(format_report(agreement_report(formula_scores, forest_scores)))
+
+
+if __name__ == "__main__":
+    main()
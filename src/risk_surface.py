@@ -0,0 +1,121 @@
+"""
+Continuous risk surface interpolated from the district values.
+
+A regular lon/lat grid over Nepal's extent (GRID_BOUNDS, GRID_RESOLUTION
+degrees) gets an inverse-distance weighted value from its IDW_NEIGHBOURS
+nearest district centroids. Every cell is answered by one KD-tree query
+(src/spatial.py's DistrictIndex, distances in km), so the whole grid is a
+handful of array operations, not a loop over cells.
+
+Cells outside Nepal are masked. With the district polygons on disk
+(SHAPEFILE_PATH) the mask is polygon containment; the shipped shapefile
+lacks its .shp geometry, so otherwise a cell counts as inside when it is
+within MASK_KM of a centroid, which follows the outline to about a district.
+
+The grid is stored as uint8 codes over a fixed value range (NODATA outside
+the mask), about 56 KB per surface, and rendered as a PNG overlay whose
+colours do not depend on the month shown.
+"""
+
+import base64
+import io
+import os
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.image import imsave
+
+
+# (lon_min, lat_min, lon_max, lat_max), a margin around the district centroids
+GRID_BOUNDS = (80.0, 26.3, 88.3, 30.5)
+GRID_RESOLUTION = 0.025
+
+IDW_NEIGHBOURS = 8
+IDW_POWER = 2
+MASK_KM = 45
+
+SHAPEFILE_PATH = "data/raw/Shapefiles/District.shp"
+
+NODATA = 255
+LEVELS = 255
+
+
+def grid_axes(bounds=GRID_BOUNDS, resolution=GRID_RESOLUTION):
+    """Cell-centre longitudes and latitudes (south to north) covering bounds."""
+    lon_min, lat_min, lon_max, lat_max = bounds
+    lon = np.arange(lon_min + resolution / 2, lon_max, resolution)
+    lat = np.arange(lat_min + resolution / 2, lat_max, resolution)
+    return lon, lat
+
+
+def idw_grid(index, values, lon, lat, k=IDW_NEIGHBOURS, power=IDW_POWER):
+    """values (one per index district) at every cell, (lat x lon), and each cell's km to its nearest centroid."""
+    values = np.asarray(values, dtype=float)
+    lon_grid, lat_grid = np.meshgrid(lon, lat)
+    k = min(k, len(values))
+    km, idx = index.tree.query(index.project(lat_grid.ravel(), lon_grid.ravel()), k=k)
+    km, idx = km.reshape(len(km), -1), idx.reshape(len(idx), -1)
+    weights = 1 / np.maximum(km, 1e-6) ** power
+    grid = (weights * values[idx]).sum(axis=1) / weights.sum(axis=1)
+    return grid.reshape(lat_grid.shape), km[:, 0].reshape(lat_grid.shape)
+
+
+def polygon_mask(lon, lat, path=SHAPEFILE_PATH):
+    """Cells inside the district polygons, or None when the shapefile geometry is not available."""
+    if not os.path.exists(path):
+        return None
+    import geopandas as gpd
+    import shapely
+
+    outline = gpd.read_file(path).to_crs(epsg=4326).union_all()
+    lon_grid, lat_grid = np.meshgrid(lon, lat)
+    return shapely.contains_xy(outline, lon_grid, lat_grid)
+
+
+def interpolate_surface(index, values, value_range, bounds=GRID_BOUNDS, resolution=GRID_RESOLUTION):
+    """The masked, uint8-encoded surface with its grid bounds, ready to cache."""
+    lon, lat = grid_axes(bounds, resolution)
+    grid, nearest_km = idw_grid(index, values, lon, lat)
+    mask = polygon_mask(lon, lat)
+    if mask is None:
+        mask = nearest_km <= MASK_KM
+    return {
+        'codes': encode(grid, mask, value_range),
+        'value_range': tuple(value_range),
+        'bounds': tuple(round(float(v), 6) for v in (lon[0] - resolution / 2, lat[0] - resolution / 2,
+                                                      lon[-1] + resolution / 2, lat[-1] + resolution / 2)),
+        'mask': 'polygons' if os.path.exists(SHAPEFILE_PATH) else f'{MASK_KM} km of a centroid',
+    }
+
+
+def encode(grid, mask, value_range):
+    low, high = value_range
+    codes = np.rint(np.clip((grid - low) / (high - low), 0, 1) * (LEVELS - 1)).astype(np.uint8)
+    codes[~mask] = NODATA
+    return codes
+
+
+def decode(surface):
+    """Values back from the codes, NaN outside the mask."""
+    low, high = surface['value_range']
+    codes = surface['codes']
+    grid = low + codes.astype(float) / (LEVELS - 1) * (high - low)
+    grid[codes == NODATA] = np.nan
+    return grid
+
+
+def surface_png(surface, colorscale="YlOrRd", opacity=0.6):
+    """The surface as a base64 PNG data URI, north up, transparent outside the mask."""
+    lut = (colormaps[colorscale](np.linspace(0, 1, LEVELS)) * 255).astype(np.uint8)
+    lut[:, 3] = int(opacity * 255)
+    lut = np.vstack([lut, np.zeros((1, 4), dtype=np.uint8)])
+    rgba = lut[surface['codes'][::-1]]
+    buffer = io.BytesIO()
+    imsave(buffer, rgba, format='png')
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def image_corners(surface):
+    """Mapbox image-layer coordinates: top-left, top-right, bottom-right, bottom-left."""
+    lon_min, lat_min, lon_max, lat_max = surface['bounds']
+    return [[lon_min, lat_max], [lon_max, lat_max], [lon_max, lat_min], [lon_min, lat_min]]
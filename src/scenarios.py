@@ -0,0 +1,119 @@
+"""
+Monte Carlo climate scenarios around the district-month climatology.
+
+For every district, a scenario draws `samples` sets of the five climate
+inputs from a normal distribution centred on the district-month mean with
+its standard deviation (times `spread`). The draws are correlated the way
+monthly anomalies are in the archive, because hot months are also dry ones.
+Optional shifts model a warmer, wetter or more humid month:
+
+- temp_shift (°C), added to AvgTemp and MaxTemp,
+- prep_change (%), scaling Prep,
+- humidity_shift (points), added to Humidity.
+
+All districts' samples go through the scaler and both engines as one
+batch (in chunks of BATCH_ROWS to bound memory), giving a distribution of
+the risk score and fire probability per district instead of a single
+what-if answer.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.climate_archive import CLIMATE_VARIABLES
+from src.features import INPUT_COLUMNS, build_model_input
+from src.risk_engine import RISK_CATEGORY_BOUNDS
+
+
+DEFAULT_SPEC = {'samples': 1000, 'spread': 1.0, 'temp_shift': 0.0, 'prep_change': 0.0,
+                'humidity_shift': 0.0, 'seed': 0}
+
+BATCH_ROWS = 50_000
+
+SUMMARY_PERCENTILES = (5, 50, 95)
+
+
+def scenario_key(spec):
+    """Hashable, order-independent form of a spec, for cache keys."""
+    return tuple(sorted({**DEFAULT_SPEC, **spec}.items()))
+
+
+def anomaly_correlation(archive):
+    """Correlation of the inputs' monthly z-anomalies, pooled over districts and months."""
+    grouped = archive.groupby(['DISTRICT', 'MONTH'])[CLIMATE_VARIABLES]
+    z = (archive[CLIMATE_VARIABLES] - grouped.transform('mean')) / grouped.transform('std')
+    return z.dropna().corr().to_numpy()
+
+
+def sample_scenarios(climatology, month, spec, correlation):
+    """(districts, frame) with spec['samples'] consecutive rows per district, ready for the engines."""
+    spec = {**DEFAULT_SPEC, **spec}
+    samples = int(spec['samples'])
+    table = climatology.table[climatology.table['MONTH'] == month].sort_values('DISTRICT')
+    districts = table['DISTRICT'].tolist()
+    means = table[[f"{var}_mean" for var in CLIMATE_VARIABLES]].to_numpy()
+    stds = np.nan_to_num(table[[f"{var}_std" for var in CLIMATE_VARIABLES]].to_numpy())
+
+    rng = np.random.default_rng(spec['seed'])
+    z = rng.standard_normal((len(districts), samples, len(CLIMATE_VARIABLES))) @ np.linalg.cholesky(correlation).T
+    values = means[:, None, :] + spec['spread'] * stds[:, None, :] * z
+
+    frame = pd.DataFrame(values.reshape(-1, len(CLIMATE_VARIABLES)), columns=CLIMATE_VARIABLES)
+    frame[['AvgTemp', 'MaxTemp']] += spec['temp_shift']
+    frame['Prep'] *= 1 + spec['prep_change'] / 100
+    frame['Humidity'] += spec['humidity_shift']
+    # Keep the inputs physically valid
+    frame[['Prep', 'WindSpeed']] = frame[['Prep', 'WindSpeed']].clip(lower=0)
+    frame['Humidity'] = frame['Humidity'].clip(0, 100)
+    frame['MaxTemp'] = np.maximum(frame['MaxTemp'], frame['AvgTemp'])
+
+    frame['DISTRICT'] = np.repeat(districts, samples)
+    frame['MONTH'] = month
+    return districts, frame
+
+
+def score_scenarios(frame, risk_engine, fire_engine, scaler, district_encoder):
+    """Risk scores and P(fire) for every row, the features built and scaled once per chunk."""
+    # The formula and the compact model work on the raw inputs
+    needs_features = any(hasattr(engine, 'scaler') for engine in [risk_engine, fire_engine])
+    risk, fire = [], []
+    for start in range(0, len(frame), BATCH_ROWS):
+        chunk = frame.iloc[start:start + BATCH_ROWS]
+        X_scaled = build_model_input(chunk, scaler, district_encoder) if needs_features else None
+        risk.append(np.asarray(risk_engine.score(chunk, X_scaled), dtype=float))
+        fire.append(fire_engine.probability(chunk, X_scaled))
+    return np.concatenate(risk), np.concatenate(fire)
+
+
+def summarize_scenarios(districts, risk, fire):
+    """One row per district: percentiles of both outputs and the chance of High or Extreme risk."""
+    summary = pd.DataFrame({'District': [d.title() for d in districts], 'Risk Mean': risk.mean(axis=1)})
+    for p, values in zip(SUMMARY_PERCENTILES, np.percentile(risk, SUMMARY_PERCENTILES, axis=1)):
+        summary[f"Risk P{p}"] = values
+    # RISK_CATEGORY_BOUNDS[1] is where High starts
+    summary['P(High or Extreme) %'] = (risk >= RISK_CATEGORY_BOUNDS[1]).mean(axis=1) * 100
+    summary['Fire Probability Mean %'] = fire.mean(axis=1) * 100
+    for p, values in zip(SUMMARY_PERCENTILES, np.percentile(fire, SUMMARY_PERCENTILES, axis=1)):
+        summary[f"Fire Probability P{p} %"] = values * 100
+    return summary
+
+
+def simulate(climatology, locations, month, spec, correlation, risk_engine, fire_engine, scaler, district_encoder):
+    """Sample, score and summarize every district with coordinates; per-district samples are kept."""
+    districts, frame = sample_scenarios(climatology, month, spec, correlation)
+    keep = [d for d in districts if d in locations]
+    samples = int({**DEFAULT_SPEC, **spec}['samples'])
+    # Each district's samples are one consecutive block, so coordinates repeat per block
+    frame = frame[frame['DISTRICT'].isin(keep)].reset_index(drop=True)
+    frame['LAT'] = np.repeat([locations[d][0] for d in keep], samples)
+    frame['LON'] = np.repeat([locations[d][1] for d in keep], samples)
+
+    risk, fire = score_scenarios(frame[INPUT_COLUMNS], risk_engine, fire_engine, scaler, district_encoder)
+    risk = risk.reshape(len(keep), samples)
+    fire = fire.reshape(len(keep), samples)
+    return {
+        'districts': keep,
+        'risk': risk.astype(np.float32),
+        'fire': fire.astype(np.float32),
+        'summary': summarize_scenarios(keep, risk, fire),
+    }
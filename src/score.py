@@ -0,0 +1,73 @@
+"""
+Batch scoring of a CSV of inputs with the app's engines.
+
+Each row needs the columns in src/features.py INPUT_COLUMNS. The output adds
+the risk score and category and P(fire), and for forest engines their
+spread across trees (std and the TREE_INTERVAL percentiles,
+src/uncertainty.py), all from one traversal per model.
+
+    python -m src.score inputs.csv [--output scores.csv] [--risk-engine forest] [--fire-engine forest]
+"""
+
+import argparse
+import os
+import sys
+
+import joblib
+import pandas as pd
+
+from src.features import INPUT_COLUMNS
+from src.fire_engine import (COMPACT_MODEL_NAME, DEFAULT_FIRE_ENGINE, FIRE_ENGINE_LABELS, FOREST_MODEL_NAME,
+                             CompactFireEngine, ForestFireEngine)
+from src.risk_engine import (DEFAULT_RISK_ENGINE, RISK_ENGINE_LABELS, ClosedFormRiskEngine, ForestRiskEngine,
+                             risk_categories)
+from src.train import MODEL_DIR
+
+
+def load_engines(risk_engine, fire_engine, model_dir=MODEL_DIR):
+    def load(name):
+        return joblib.load(os.path.join(model_dir, f"{name}.pkl"), mmap_mode='r')
+
+    preprocessors = [load('scaler'), load('district_encoder')]
+    if risk_engine == ForestRiskEngine.name:
+        risk = ForestRiskEngine(load('risk_model'), *preprocessors)
+    else:
+        risk = ClosedFormRiskEngine()
+    if fire_engine == CompactFireEngine.name:
+        fire = CompactFireEngine(load(COMPACT_MODEL_NAME))
+    else:
+        fire = ForestFireEngine(load(FOREST_MODEL_NAME), *preprocessors)
+    return risk, fire
+
+
+def score_frame(frame, risk, fire):
+    """The inputs plus one column per summary statistic of each engine."""
+    frame = frame.copy()
+    frame['DISTRICT'] = frame['DISTRICT'].str.lower().str.strip()
+    out = frame[INPUT_COLUMNS].copy()
+    summaries = {'risk': risk.score_with_spread(frame), 'fire_probability': fire.probability_with_spread(frame)}
+    for prefix, summary in summaries.items():
+        for stat, values in summary.items():
+            if values is not None:
+                out[prefix if stat == 'value' else f"{prefix}_{stat}"] = values
+    out['risk_category'] = risk_categories(out['risk'])
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("inputs", help="CSV with the input columns")
+    parser.add_argument("--output", default=None, help="write here instead of stdout")
+    parser.add_argument("--risk-engine", choices=list(RISK_ENGINE_LABELS), default=DEFAULT_RISK_ENGINE)
+    parser.add_argument("--fire-engine", choices=list(FIRE_ENGINE_LABELS), default=DEFAULT_FIRE_ENGINE)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    risk, fire = load_engines(args.risk_engine, args.fire_engine, args.model_dir)
+    scores = score_frame(pd.read_csv(args.inputs), risk, fire)
+    scores.to_csv(args.output or sys.stdout, index=False, float_format="%.4f")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Sensitivity surfaces: the engines evaluated over a 2D grid of two inputs.
+
+All other inputs stay at the prediction page's values. Every grid point
+becomes one row of a single batch through the scaler and both engines.
+Resolutions follow REFINEMENT_LEVELS, where each level is 2n - 1 points
+per axis, so it contains every point of the previous one. refine_surface
+therefore only scores the points that are new at each level, and the page
+can show a coarse surface at once and sharpen it.
+
+Axis ranges are the district-month climatology mean ± AXIS_STDS standard
+deviations, clipped to physical bounds, so the surface covers the climates
+the district actually sees.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.features import INPUT_COLUMNS, build_model_input
+
+
+REFINEMENT_LEVELS = [11, 21, 41, 81]
+
+AXIS_STDS = 3
+
+PHYSICAL_BOUNDS = {
+    'Prep': (0, None),
+    'AvgTemp': (None, None),
+    'MaxTemp': (None, None),
+    'Humidity': (0, 100),
+    'WindSpeed': (0, None),
+}
+
+# Used when the district has no climatology, or the spread is zero
+FALLBACK_RANGES = {
+    'Prep': (0, 400),
+    'AvgTemp': (-5, 35),
+    'MaxTemp': (0, 42),
+    'Humidity': (0, 100),
+    'WindSpeed': (0, 10),
+}
+
+
+def axis_range(climatology, district, month, var):
+    record = climatology.lookup(district, month)
+    if record is None or not record[var]['std'] > 0:
+        return FALLBACK_RANGES[var]
+    low = record[var]['mean'] - AXIS_STDS * record[var]['std']
+    high = record[var]['mean'] + AXIS_STDS * record[var]['std']
+    lower_bound, upper_bound = PHYSICAL_BOUNDS[var]
+    if lower_bound is not None:
+        low = max(low, lower_bound)
+    if upper_bound is not None:
+        high = min(high, upper_bound)
+    return float(low), float(high)
+
+
+def grid_frame(base, x_var, y_var, x_values, y_values):
+    """One input row per grid point, y-major, every other column taken from base."""
+    xx, yy = np.meshgrid(x_values, y_values)
+    frame = pd.DataFrame({col: np.repeat(base[col], xx.size) for col in INPUT_COLUMNS
+                          if col not in (x_var, y_var)})
+    frame[x_var] = xx.ravel()
+    frame[y_var] = yy.ravel()
+    return frame[INPUT_COLUMNS]
+
+
+def score_points(frame, risk_engine, fire_engine, scaler, district_encoder):
+    """Risk score and P(fire) for each row, in one batch."""
+    needs_features = any(hasattr(engine, 'scaler') for engine in [risk_engine, fire_engine])
+    X_scaled = build_model_input(frame, scaler, district_encoder) if needs_features else None
+    return (np.asarray(risk_engine.score(frame, X_scaled), dtype=float),
+            np.asarray(fire_engine.probability(frame, X_scaled), dtype=float))
+
+
+def refine_surface(previous, base, x_var, y_var, x_range, y_range, resolution,
+                   risk_engine, fire_engine, scaler, district_encoder):
+    """The surface at resolution points per axis, reusing previous (at (resolution + 1) / 2) if given."""
+    x_values = np.linspace(*x_range, resolution)
+    y_values = np.linspace(*y_range, resolution)
+    frame = grid_frame(base, x_var, y_var, x_values, y_values)
+
+    risk = np.full((resolution, resolution), np.nan)
+    fire = np.full((resolution, resolution), np.nan)
+    known = np.zeros((resolution, resolution), dtype=bool)
+    if previous is not None:
+        # The previous level sits on the even rows and columns of this one
+        risk[::2, ::2], fire[::2, ::2] = previous['risk'], previous['fire']
+        known[::2, ::2] = True
+
+    new = ~known.ravel()
+    new_risk, new_fire = score_points(frame[new], risk_engine, fire_engine, scaler, district_encoder)
+    risk.ravel()[new] = new_risk
+    fire.ravel()[new] = new_fire
+    return {'x': x_values, 'y': y_values, 'risk': risk, 'fire': fire, 'points_scored': int(new.sum())}
@@ -0,0 +1,310 @@
+"""
+On-disk cache shared by every Streamlit worker process.
+
+Entries live in a single SQLite file (WAL mode, so many readers and one
+writer can use it at the same time) and are keyed by a content fingerprint
+of the source files they were derived from. When one worker has computed an
+aggregate, pivot table, figure JSON or risk table, the other workers read the
+pickled result instead of recomputing it.
+
+Hits only read the database. Their access times and the hit/miss counters
+are kept in memory and written in one transaction at most every
+ACCESS_FLUSH_SECONDS (and before an eviction or a stats() call), so workers
+reading cached entries do not queue on SQLite's write lock.
+"""
+
+import atexit
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to per-process locking only
+    fcntl = None
+
+
+DEFAULT_CACHE_DIR = os.environ.get("FIRE_APP_CACHE_DIR", os.path.join(".cache", "shared"))
+DEFAULT_MAX_BYTES = int(os.environ.get("FIRE_APP_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# LRU order only needs to be roughly right, so access times may lag this long
+ACCESS_FLUSH_SECONDS = 5.0
+# Per-process key locks where fcntl is missing; keys share a lock by hash
+LOCK_STRIPES = 64
+
+# Hashing a file is cheap for our CSVs but there is no reason to repeat it on
+# every rerun, so remember digests by (path, size, mtime)
+_file_digests = {}
+_file_digests_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """Return a SHA-1 digest of the file contents (memoized per size/mtime)."""
+    stat = os.stat(path)
+    stamp = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    with _file_digests_lock:
+        digest = _file_digests.get(stamp)
+    if digest is not None:
+        return digest
+
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _file_digests_lock:
+        _file_digests[stamp] = digest
+    return digest
+
+
+def make_key(name, sources=(), params=None):
+    """Build a cache key from a name, source file fingerprints and parameters."""
+    sha = hashlib.sha1(str(name).encode("utf-8"))
+    for path in sources:
+        sha.update(file_fingerprint(path).encode("ascii"))
+    if params is not None:
+        sha.update(repr(params).encode("utf-8"))
+    return f"{name}:{sha.hexdigest()}"
+
+
+class SharedCache:
+    """Process-shared key/value cache with size-based LRU eviction."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(cache_dir, "cache.sqlite3")
+        self.lock_dir = os.path.join(cache_dir, "locks")
+        os.makedirs(self.lock_dir, exist_ok=True)
+
+        # sqlite3 connections must not be shared across threads; the key locks
+        # each thread holds are tracked here too (see _key_lock)
+        self._local = threading.local()
+        # Reentrant, since a compute may read another cached entry whose key
+        # falls on the same stripe
+        self._thread_locks = [threading.RLock() for _ in range(LOCK_STRIPES)]
+
+        self._pending_access = {}
+        self._pending_counts = {}
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                " name TEXT PRIMARY KEY,"
+                " value INTEGER NOT NULL)"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _bump(self, conn, name, amount=1):
+        conn.execute(
+            "INSERT INTO counters(name, value) VALUES(?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def _record(self, counter, key=None):
+        # Batched in memory; see flush()
+        with self._pending_lock:
+            self._pending_counts[counter] = self._pending_counts.get(counter, 0) + 1
+            if key is not None:
+                self._pending_access[key] = time.time()
+            due = time.monotonic() - self._last_flush >= ACCESS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the batched access times and hit/miss counts in one transaction."""
+        with self._pending_lock:
+            access, counts = self._pending_access, self._pending_counts
+            self._pending_access, self._pending_counts = {}, {}
+            self._last_flush = time.monotonic()
+        if not access and not counts:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have flushed a later access already
+            conn.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in access.items()],
+            )
+            for name, amount in counts.items():
+                self._bump(conn, name, amount)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._record("misses")
+            return default
+        self._record("hits", key)
+        return pickle.loads(row[0])
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        conn = self._connect()
+        # A single statement is atomic, readers never see a half-written entry
+        conn.execute(
+            "INSERT OR REPLACE INTO entries(key, value, size, created, last_access) "
+            "VALUES(?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(blob), len(blob), now, now),
+        )
+        self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Evict by up-to-date access times
+        self.flush()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            evicted = 0
+            for key, size in conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+            self._bump(conn, "evictions", evicted)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    @contextmanager
+    def _key_lock(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        held = getattr(self._local, "held_keys", None)
+        if held is None:
+            held = self._local.held_keys = set()
+        if digest in held:
+            # This thread already holds the key further up its stack. flock would
+            # wait on its own lock forever, so re-entry passes through on both paths
+            yield
+            return
+
+        held.add(digest)
+        try:
+            with self._acquire(digest):
+                yield
+        finally:
+            held.discard(digest)
+
+    @contextmanager
+    def _acquire(self, digest):
+        if fcntl is None:
+            with self._thread_locks[int(digest[:8], 16) % LOCK_STRIPES]:
+                yield
+            return
+
+        # flock belongs to the open file, so each open() also excludes the other
+        # threads of this process; only workers computing the same key wait
+        with open(os.path.join(self.lock_dir, digest + ".lock"), "a+") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_or_compute(self, name, compute, sources=(), params=None):
+        """
+        Return the cached value for (name, sources, params), computing it once.
+
+        Only one worker runs `compute` for a given key; the others block on the
+        key lock and then read the stored result.
+        """
+        key = make_key(name, sources, params)
+        missing = object()
+
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+
+        with self._key_lock(key):
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                # Another worker finished computing it while we waited
+                self._record("hits", key)
+                return pickle.loads(row[0])
+
+            value = compute()
+            self.set(key, value)
+            return value
+
+    def stats(self):
+        self.flush()
+        conn = self._connect()
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending_access, self._pending_counts = {}, {}
+        conn = self._connect()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM counters")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide SharedCache instance, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SharedCache()
+            atexit.register(_default_cache.flush)
+        return _default_cache
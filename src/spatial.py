@@ -0,0 +1,95 @@
+"""
+Spatial index over the district centroids.
+
+DistrictIndex keeps a KD-tree (scipy cKDTree) of the centroids projected to
+kilometres: an equirectangular projection about Nepal's mean latitude,
+which is within 1% of the great-circle distance at the country's extent.
+It answers k-nearest and within-radius queries for the app, and builds the
+neighbour weights of src/feature_store.py: each district's NEIGHBOURS
+nearest other districts, weighted by inverse distance to the IDW_POWER and
+normalised per row, as one sparse (district x district) matrix, so a
+neighbour average of any (district x month) grid is one matrix product.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+
+
+NEIGHBOURS = 5
+IDW_POWER = 1
+
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LON_EQUATOR = 111.32
+
+
+def project_km(lat, lon, lat0):
+    """(x, y) in km, equirectangular about latitude lat0."""
+    lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+    x = lon * KM_PER_DEGREE_LON_EQUATOR * np.cos(np.radians(lat0))
+    return np.column_stack([x, lat * KM_PER_DEGREE_LAT])
+
+
+def unproject_km(x, y, lat0):
+    """(lat, lon) of project_km coordinates."""
+    lon = np.asarray(x, dtype=float) / (KM_PER_DEGREE_LON_EQUATOR * np.cos(np.radians(lat0)))
+    return np.asarray(y, dtype=float) / KM_PER_DEGREE_LAT, lon
+
+
+def district_centroids(df):
+    """One (DISTRICT, LAT, LON) row per district of df, sorted by name."""
+    return (df[['DISTRICT', 'LAT', 'LON']].dropna().groupby('DISTRICT', as_index=False).first()
+            .sort_values('DISTRICT').reset_index(drop=True))
+
+
+class DistrictIndex:
+    """KD-tree over district centroids, with distances in km."""
+
+    def __init__(self, names, lat, lon):
+        self.names = np.asarray(names)
+        self.lat = np.asarray(lat, dtype=float)
+        self.lon = np.asarray(lon, dtype=float)
+        self.lat0 = float(self.lat.mean())
+        self.tree = cKDTree(self.project(self.lat, self.lon))
+
+    @classmethod
+    def from_frame(cls, centroids):
+        return cls(centroids['DISTRICT'], centroids['LAT'], centroids['LON'])
+
+    @classmethod
+    def from_gazetteer(cls, gazetteer):
+        names = gazetteer.located_names()
+        lat, lon = zip(*(gazetteer.centroid(name) for name in names))
+        return cls(names, lat, lon)
+
+    def project(self, lat, lon):
+        return project_km(lat, lon, self.lat0)
+
+    def nearest(self, lat, lon, k=NEIGHBOURS, exclude=None):
+        """The k districts closest to a point, as a frame of DISTRICT and KM; exclude drops one name."""
+        k = min(k + (exclude is not None), len(self.names))
+        km, idx = self.tree.query(self.project([lat], [lon])[0], k=k)
+        result = pd.DataFrame({'DISTRICT': self.names[np.atleast_1d(idx)], 'KM': np.atleast_1d(km)})
+        if exclude is not None:
+            result = result[result['DISTRICT'] != exclude]
+        return result.head(k - (exclude is not None)).reset_index(drop=True)
+
+    def within(self, lat, lon, radius_km):
+        """Every district whose centroid is within radius_km of a point, nearest first."""
+        point = self.project([lat], [lon])[0]
+        idx = np.asarray(self.tree.query_ball_point(point, radius_km), dtype=int)
+        km = np.linalg.norm(self.tree.data[idx] - point, axis=1)
+        order = np.argsort(km)
+        return pd.DataFrame({'DISTRICT': self.names[idx[order]], 'KM': km[order]})
+
+    def neighbour_weights(self, k=NEIGHBOURS, power=IDW_POWER):
+        """Row-normalised inverse-distance weights over each district's k nearest others, (n x n) sparse."""
+        n = len(self.names)
+        k = min(k, n - 1)
+        # The nearest point of each centroid is itself
+        km, idx = self.tree.query(self.tree.data, k=k + 1)
+        km, idx = km[:, 1:], idx[:, 1:]
+        weights = 1 / np.maximum(km, 1e-6) ** power
+        weights /= weights.sum(axis=1, keepdims=True)
+        return csr_matrix((weights.ravel(), (np.repeat(np.arange(n), k), idx.ravel())), shape=(n, n))
@@ -0,0 +1,41 @@
+"""
+Scaled synthetic versions of the combined fire/climate table.
+
+Each copy of the real table is shifted forward by the table's span of years
+and has its climate inputs jittered by their district-month spread, so the
+result keeps the real districts, seasonality and fire labels while having
+scale times as many months. Used to check how training and evaluation
+costs grow with history; the fire labels are copied, so accuracy on the
+synthetic years is optimistic and says nothing about model quality.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.climate_archive import CLIMATE_VARIABLES
+
+
+def jitter_climate(frame, scale, rng):
+    """Nudge each climate input by scale district-month standard deviations."""
+    spread = frame.groupby(['DISTRICT', 'MONTH'])[CLIMATE_VARIABLES].transform('std').fillna(0)
+    noise = rng.standard_normal((len(frame), len(CLIMATE_VARIABLES)))
+    jittered = frame.copy()
+    jittered[CLIMATE_VARIABLES] = frame[CLIMATE_VARIABLES].to_numpy() + noise * scale * spread.to_numpy()
+    # Keep the inputs physically valid
+    jittered[['Prep', 'WindSpeed']] = jittered[['Prep', 'WindSpeed']].clip(lower=0)
+    jittered['Humidity'] = jittered['Humidity'].clip(0, 100)
+    return jittered
+
+
+def scaled_frame(df, scale, jitter=0.5, seed=0):
+    """The real table followed by scale - 1 jittered copies in later years."""
+    if scale <= 1:
+        return df.copy()
+    rng = np.random.default_rng(seed)
+    span = int(df['YEAR'].max() - df['YEAR'].min() + 1)
+    copies = [df]
+    for k in range(1, scale):
+        copy = jitter_climate(df, jitter, rng)
+        copy['YEAR'] = copy['YEAR'] + k * span
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
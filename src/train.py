@@ -0,0 +1,398 @@
+"""
+Training pipeline for risk_model and fire_model (src/models.ipynb as a
+command-line tool).
+
+- The one-hot + standard-scaled feature matrix is built once per version of
+  the combined table and cached as a .npy file; every worker memory-maps it
+  instead of receiving a pickled copy.
+- Hyperparameter candidates for both models are fitted in a process pool.
+- --backend picks the model family (see src/backends.py): the notebook's
+  random forests, or XGBoost / LightGBM histogram boosting.
+- The final risk_model and fire_model are fitted concurrently, splitting the
+  available cores between them.
+- district/month fire statistics are one groupby instead of nested loops.
+- --lag-features adds the preceding-month features of src/feature_store.py
+  (precipitation deficits, recent heat and humidity, last month's fires),
+  updating the store first; the first months, which lack a full window,
+  are left out of training.
+- A district-month climate baseline, a fixed-size replay sample of the
+  scaled training rows and the last month trained on are kept with the
+  artifacts, so src/refresh.py can update the models incrementally.
+- Each run writes a versioned artifact set under models/versions/ with a
+  manifest.json holding parameters, metrics and stage timings; --promote
+  copies it into models/, where the app loads it from.
+
+    python -m src.train [--backend forest|xgboost|lightgbm] [--lag-features] [--no-search] [--n-jobs N] [--promote]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import product
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.metrics import accuracy_score, mean_squared_error, r2_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from src.backends import BACKENDS, DEFAULT_PARAMS, SEARCH_GRIDS, make_model
+from src.climate_archive import CLIMATE_VARIABLES
+from src.feature_store import DEFINITIONS, LAG_FEATURES, STORE_DIR, attach_lag_features, update_store
+from src.features import BASE_FEATURES, build_feature_frame
+from src.risk_engine import fire_risk_score
+from src.shared_cache import file_fingerprint
+
+
+COMBINED_DATA_PATH = os.path.join("data", "processed", "combined_fire_climate.csv")
+MODEL_DIR = "models"
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+FEATURE_CACHE_DIR = os.path.join(".cache", "training")
+
+# Cached target array for each model
+MODEL_TARGETS = {
+    'risk_model': 'y_risk',
+    'fire_model': 'y_fire',
+}
+
+
+def load_training_frame(path=COMBINED_DATA_PATH):
+    df = pd.read_csv(path)
+    df['DISTRICT'] = df['DISTRICT'].str.lower().str.strip()
+    df['FireRisk'] = fire_risk_score(df['Prep'], df['MaxTemp'], df['Humidity'], df['WindSpeed'])
+    df['Fire_Occurred'] = (df['Fire_Count'] > 0).astype(int)
+    return df
+
+
+def holdout_split(df):
+    # Same permutation as the notebook's train_test_split over its feature matrix
+    return train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+
+
+def district_month_fire_stats(df):
+    """Historical fire frequency per (district, month), as the notebook's nested loops built it."""
+    grouped = df.groupby(['DISTRICT', 'MONTH'])
+    stats = pd.DataFrame({
+        'total_records': grouped.size(),
+        'fire_records': grouped['Fire_Occurred'].sum(),
+        'max_count': grouped['Fire_Count'].max(),
+    })
+    stats['fire_probability'] = stats['fire_records'] / stats['total_records']
+    return stats.reset_index()
+
+
+def climate_baseline(df):
+    """Count, mean and sum of squared deviations of each climate input per (district, month)."""
+    grouped = df.groupby(['DISTRICT', 'MONTH'])[CLIMATE_VARIABLES]
+    baseline = grouped.mean().add_suffix('_mean')
+    baseline.insert(0, 'n', grouped.size())
+    squares = grouped.var(ddof=0).fillna(0).mul(baseline['n'], axis=0).add_suffix('_m2')
+    return pd.concat([baseline, squares], axis=1).reset_index()
+
+
+# Rows kept in replay.npz, whatever the size of the history
+REPLAY_ROWS = 2000
+
+
+def replay_sample(X, y_risk, y_fire, rows=REPLAY_ROWS, seed=0):
+    """A uniform sample of the training rows, saved for src/refresh.py's new trees."""
+    idx = np.sort(np.random.default_rng(seed).permutation(len(X))[:rows])
+    return {'X': np.asarray(X[idx]), 'y_risk': np.asarray(y_risk[idx]), 'y_fire': np.asarray(y_fire[idx])}
+
+
+def latest_month(df):
+    last = df[['YEAR', 'MONTH']].sort_values(['YEAR', 'MONTH']).iloc[-1]
+    return [int(last['YEAR']), int(last['MONTH'])]
+
+
+def make_version_dir(versions_dir, fingerprint):
+    """
+    Create and return a new directory named after the UTC time and the data fingerprint.
+
+    The name has one-second resolution, so a run that finds it taken (another run on the same
+    data in the same second) appends -1, -2, ... instead of writing into the other run's artifacts.
+    """
+    os.makedirs(versions_dir, exist_ok=True)
+    base = os.path.join(versions_dir, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{fingerprint[:8]}")
+    version_dir, suffix = base, 0
+    while True:
+        try:
+            os.mkdir(version_dir)
+            return version_dir
+        except FileExistsError:
+            suffix += 1
+            version_dir = f"{base}-{suffix}"
+
+
+class FeatureMatrix:
+    """Paths of the cached scaled features and targets, plus the fitted preprocessors."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.X_path = os.path.join(directory, "X.npy")
+        self.target_paths = {name: os.path.join(directory, f"{name}.npy") for name in ['y_risk', 'y_fire']}
+        self.scaler_path = os.path.join(directory, "scaler.pkl")
+        self.encoder_path = os.path.join(directory, "district_encoder.pkl")
+
+    def exists(self):
+        paths = [self.X_path, self.scaler_path, self.encoder_path, *self.target_paths.values()]
+        return all(os.path.exists(p) for p in paths)
+
+    def load_X(self):
+        return np.load(self.X_path, mmap_mode='r')
+
+    def load_target(self, name):
+        return np.load(self.target_paths[name], mmap_mode='r')
+
+
+def _save_array(path, array):
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def build_feature_matrix(df, fingerprint, cache_dir=FEATURE_CACHE_DIR, lag_columns=()):
+    """Fit the encoder/scaler and cache X, or reuse the cache for this data version and feature set."""
+    name = fingerprint[:16]
+    if lag_columns:
+        # The lag column list and their definitions are part of the key, so a grown feature set refits
+        key = json.dumps({'columns': list(lag_columns), 'definitions': DEFINITIONS}, sort_keys=True)
+        name += "-lag-" + hashlib.sha1(key.encode()).hexdigest()[:12]
+    matrix = FeatureMatrix(os.path.join(cache_dir, name))
+    if matrix.exists():
+        return matrix, True
+
+    os.makedirs(matrix.directory, exist_ok=True)
+    district_encoder = OneHotEncoder(sparse_output=False)
+    district_encoder.fit(df[['DISTRICT']])
+    X = build_feature_frame(df, district_encoder, lag_columns)
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    joblib.dump(district_encoder, matrix.encoder_path)
+    joblib.dump(scaler, matrix.scaler_path)
+    _save_array(matrix.target_paths['y_risk'], df['FireRisk'].to_numpy(dtype=float))
+    _save_array(matrix.target_paths['y_fire'], df['Fire_Occurred'].to_numpy(dtype=np.int64))
+    # Written last: its presence marks a complete cache entry
+    _save_array(matrix.X_path, X_scaled)
+    return matrix, False
+
+
+def _score(kind, model, X, y):
+    if kind == 'risk_model':
+        return r2_score(y, model.predict(X))
+    return roc_auc_score(y, model.predict_proba(X)[:, 1])
+
+
+def _evaluate_candidate(task):
+    # Runs in a worker process; the arrays are memory-mapped, not pickled
+    directory, kind, backend, params, train_idx, val_idx = task
+    matrix = FeatureMatrix(directory)
+    X, y = matrix.load_X(), matrix.load_target(MODEL_TARGETS[kind])
+    start = time.perf_counter()
+    model = make_model(kind, backend, params, n_jobs=1).fit(X[train_idx], y[train_idx])
+    return kind, params, float(_score(kind, model, X[val_idx], y[val_idx])), time.perf_counter() - start
+
+
+def _fit_final(task):
+    directory, kind, backend, params, train_idx, test_idx, n_jobs, out_path = task
+    matrix = FeatureMatrix(directory)
+    X, y = matrix.load_X(), matrix.load_target(MODEL_TARGETS[kind])
+    start = time.perf_counter()
+    model = make_model(kind, backend, params, n_jobs).fit(X[train_idx], y[train_idx])
+    seconds = time.perf_counter() - start
+    joblib.dump(model, out_path)
+
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
+    if kind == 'risk_model':
+        metrics = {
+            'train_mse': float(mean_squared_error(y_train, model.predict(X_train))),
+            'test_mse': float(mean_squared_error(y_test, model.predict(X_test))),
+            'test_r2': float(r2_score(y_test, model.predict(X_test))),
+        }
+    else:
+        metrics = {
+            'train_accuracy': float(accuracy_score(y_train, model.predict(X_train))),
+            'test_accuracy': float(accuracy_score(y_test, model.predict(X_test))),
+            'test_auc': float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])),
+        }
+    return kind, metrics, seconds
+
+
+def run_pool(func, tasks, n_jobs):
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks))) as pool:
+            return list(pool.map(func, tasks))
+    return [func(task) for task in tasks]
+
+
+def search_hyperparameters(matrix, train_idx, n_jobs, backend='forest'):
+    """Best parameters per model on an inner validation split of the training rows."""
+    inner_train, inner_val = train_test_split(train_idx, test_size=0.25, random_state=0)
+    grid = SEARCH_GRIDS[backend]
+    candidates = [dict(zip(grid, values)) for values in product(*grid.values())]
+    tasks = [(matrix.directory, kind, backend, params, inner_train, inner_val)
+             for kind in MODEL_TARGETS for params in candidates]
+    results = run_pool(_evaluate_candidate, tasks, n_jobs)
+
+    best = {}
+    for kind, params, score, seconds in results:
+        if kind not in best or score > best[kind]['score']:
+            best[kind] = {'params': params, 'score': score}
+    return best, results
+
+
+def train(data_path=COMBINED_DATA_PATH, versions_dir=VERSIONS_DIR, search=True, n_jobs=None, backend='forest',
+          lag_features=False):
+    """Run the pipeline and return the version directory and its manifest."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    timings = {}
+
+    start = time.perf_counter()
+    df = load_training_frame(data_path)
+    fingerprint = file_fingerprint(data_path)
+    timings['load_data'] = time.perf_counter() - start
+
+    lag_columns = list(LAG_FEATURES) if lag_features else []
+    if lag_columns:
+        start = time.perf_counter()
+        # Other data files (synthetic or truncated histories) get their own store next to their feature matrix
+        store_dir = STORE_DIR if data_path == COMBINED_DATA_PATH else os.path.join(FEATURE_CACHE_DIR, fingerprint[:16],
+                                                                                   "lag_store")
+        update_store(df, store_dir)
+        df = attach_lag_features(df, store_dir, fill=False).dropna(subset=lag_columns).reset_index(drop=True)
+        timings['lag_features'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matrix, cache_hit = build_feature_matrix(df, fingerprint, lag_columns=lag_columns)
+    timings['feature_matrix'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = district_month_fire_stats(df)
+    baseline = climate_baseline(df)
+    timings['district_month_stats'] = time.perf_counter() - start
+
+    train_idx, test_idx = holdout_split(df)
+
+    search_results = []
+    if search:
+        start = time.perf_counter()
+        best, search_results = search_hyperparameters(matrix, train_idx, n_jobs, backend)
+        timings['hyperparameter_search'] = time.perf_counter() - start
+        chosen = {kind: best[kind]['params'] for kind in MODEL_TARGETS}
+    else:
+        chosen = {kind: dict(DEFAULT_PARAMS[backend]) for kind in MODEL_TARGETS}
+
+    version_dir = make_version_dir(versions_dir, fingerprint)
+    version = os.path.basename(version_dir)
+
+    # Both forests at once, each with its share of the cores
+    start = time.perf_counter()
+    parallel = n_jobs > 1
+    per_model_jobs = max(1, n_jobs // len(MODEL_TARGETS)) if parallel else 1
+    tasks = [(matrix.directory, kind, backend, chosen[kind], train_idx, test_idx, per_model_jobs,
+              os.path.join(version_dir, f"{kind}.pkl")) for kind in MODEL_TARGETS]
+    final = run_pool(_fit_final, tasks, n_jobs)
+    timings['final_fit'] = time.perf_counter() - start
+
+    shutil.copyfile(matrix.scaler_path, os.path.join(version_dir, "scaler.pkl"))
+    shutil.copyfile(matrix.encoder_path, os.path.join(version_dir, "district_encoder.pkl"))
+    stats.to_csv(os.path.join(version_dir, "district_month_stats.csv"), index=False)
+    baseline.to_csv(os.path.join(version_dir, "climate_baseline.csv"), index=False)
+    np.savez(os.path.join(version_dir, "replay.npz"),
+             **replay_sample(matrix.load_X(), matrix.load_target('y_risk'), matrix.load_target('y_fire')))
+
+    manifest = {
+        'version': version,
+        'created_utc': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'data_path': data_path,
+        'data_fingerprint': fingerprint,
+        'sklearn_version': sklearn.__version__,
+        'backend': backend,
+        'rows': len(df),
+        'trained_through': latest_month(df),
+        # Incremental refreshes (src/refresh.py) build on this full retrain
+        'base_version': version,
+        'refreshes': [],
+        'features': BASE_FEATURES + lag_columns + [f"DISTRICT_{d}" for d in joblib.load(matrix.encoder_path).categories_[0]],
+        'lag_features': lag_columns,
+        # Refreshes append to the same store
+        'lag_store': store_dir if lag_columns else None,
+        'feature_cache_hit': cache_hit,
+        'n_jobs': n_jobs,
+        'params': chosen,
+        'metrics': {kind: metrics for kind, metrics, _ in final},
+        'fit_seconds': {kind: seconds for kind, _, seconds in final},
+        'search': [{'model': kind, 'params': params, 'score': score, 'seconds': seconds}
+                   for kind, params, score, seconds in search_results],
+        'timings': timings,
+    }
+    with open(os.path.join(version_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return version_dir, manifest
+
+
+ARTIFACT_FILES = ["risk_model.pkl", "fire_model.pkl", "scaler.pkl", "district_encoder.pkl"]
+
+
+def promote(version_dir, model_dir=MODEL_DIR):
+    """Copy a version's artifacts to where the app loads them from."""
+    for name in ARTIFACT_FILES:
+        tmp_path = os.path.join(model_dir, f".{name}.tmp")
+        shutil.copyfile(os.path.join(version_dir, name), tmp_path)
+        os.replace(tmp_path, os.path.join(model_dir, name))
+
+
+def format_report(manifest):
+    lines = [f"version {manifest['version']} ({manifest['backend']}, {manifest['rows']} rows, n_jobs={manifest['n_jobs']}, "
+             f"feature cache {'hit' if manifest['feature_cache_hit'] else 'miss'})"]
+    if manifest['search']:
+        lines.append("hyperparameter search (inner validation: R² for risk, AUC for fire):")
+        for entry in manifest['search']:
+            lines.append(f"  {entry['model']:<11} {json.dumps(entry['params']):<62} "
+                         f"{entry['score']:.4f}  {entry['seconds']:.1f}s")
+    for kind in MODEL_TARGETS:
+        metrics = ", ".join(f"{k} {v:.4f}" for k, v in manifest['metrics'][kind].items())
+        lines.append(f"{kind}: {json.dumps(manifest['params'][kind])} -> {metrics} "
+                     f"(fit {manifest['fit_seconds'][kind]:.1f}s)")
+    lines.append("stage timings:")
+    for stage, seconds in manifest['timings'].items():
+        lines.append(f"  {stage:<24}{seconds:>8.2f}s")
+    lines.append(f"  {'total':<24}{sum(manifest['timings'].values()):>8.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--data", default=COMBINED_DATA_PATH)
+    parser.add_argument("--versions-dir", default=VERSIONS_DIR)
+    parser.add_argument("--backend", choices=BACKENDS, default='forest')
+    parser.add_argument("--lag-features", action="store_true",
+                        help="add the preceding-month features of src/feature_store.py")
+    parser.add_argument("--no-search", action="store_true",
+                        help="train with the backend's default parameters (the notebook's for forest)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--promote", action="store_true", help="copy the new artifacts into models/")
+    args = parser.parse_args(argv)
+
+    version_dir, manifest = train(args.data, args.versions_dir, search=not args.no_search, n_jobs=args.n_jobs,
+                                  backend=args.backend, lag_features=args.lag_features)
+    print(format_report(manifest))
+    print(f"artifacts: {version_dir}")
+    if args.promote:
+        promote(version_dir)
+        print(f"promoted to {MODEL_DIR}/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
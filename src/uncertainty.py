@@ -0,0 +1,127 @@
+"""
+Per-tree predictions of a random forest in one vectorized traversal.
+
+sklearn's forest predict walks each tree separately and only returns their
+average. TreeStack concatenates the nodes of every tree into flat arrays and
+advances all (row, tree) pairs still at a split one level per step, so a
+single pass yields each tree's output; their mean is the forest's
+prediction and their spread its uncertainty:
+
+- value: the mean over trees (equal to predict / predict_proba[:, 1]),
+- std: the standard deviation across trees,
+- lower / upper: the TREE_INTERVAL percentiles across trees for a
+  regressor. Fully grown classification trees vote 0 or 1, which makes
+  those percentiles 0 and 1 for almost every row, so for a classifier they
+  are the normal-approximation interval of the mean vote at the same level.
+
+The spread is disagreement between trees, not a calibrated interval for the
+observed outcome. Boosting backends are sums of dependent trees rather than
+an average of independent ones, so they have no TreeStack.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+
+TREE_INTERVAL = (5, 95)
+
+# From this many rows up, sklearn's compiled apply() (leaf index of every
+# tree, in one call) beats the numpy traversal despite its fixed overhead
+APPLY_MIN_ROWS = 256
+
+
+def supports_tree_spread(model):
+    return isinstance(model, (RandomForestRegressor, RandomForestClassifier))
+
+
+class TreeStack:
+    """The nodes of every tree of a fitted forest, concatenated."""
+
+    def __init__(self, forest):
+        self.forest = forest
+        self.classifier = isinstance(forest, RandomForestClassifier)
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.roots = offsets[:-1]
+
+        left, right, feature, threshold, value = [], [], [], [], []
+        for tree, offset in zip(trees, self.roots):
+            left.append(tree.children_left + offset)
+            right.append(tree.children_right + offset)
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+            if self.classifier:
+                counts = tree.value[:, 0, :]
+                value.append(counts[:, 1] / counts.sum(axis=1))
+            else:
+                value.append(tree.value[:, 0, 0])
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.feature = np.concatenate(feature)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.is_leaf = self.feature < 0
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def _descend(self, X, path=None):
+        """Leaf node of every (row, tree) pair, row-major; appends (pair, node) steps to path if given."""
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        row_start = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        # Only (row, tree) pairs still at a split move down a level
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while len(active):
+            current = nodes[active]
+            go_left = flat_X[row_start[active] + self.feature[current]] <= self.threshold[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            if path is not None:
+                path.append((active, current))
+            active = active[~self.is_leaf[current]]
+        return nodes
+
+    def outputs(self, X):
+        """(n_rows, n_trees) array of each tree's prediction (P(class 1) for a classifier)."""
+        # Trees split on float32 features; comparing in float64 would send boundary rows the other way
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) >= APPLY_MIN_ROWS:
+            return self.value[self.forest.apply(X) + self.roots]
+        return self.value[self._descend(X)].reshape(len(X), self.n_trees)
+
+    def path_indicator(self, X):
+        """Sparse (n_rows, n_nodes) matrix with a 1 where a row's path in some tree passes a node."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if len(X) >= APPLY_MIN_ROWS:
+            return self.forest.decision_path(X)[0].tocsr()
+        path = []
+        self._descend(X, path)
+        pairs = np.concatenate([pair for pair, _ in path]) if path else np.empty(0, dtype=int)
+        nodes = np.concatenate([node for _, node in path]) if path else np.empty(0, dtype=int)
+        # Roots are left out; nothing is attributed to them
+        return csr_matrix((np.ones(len(nodes)), (pairs // self.n_trees, nodes)), shape=(len(X), len(self.value)))
+
+    def summarize(self, X):
+        return summarize_outputs(self.outputs(X), votes=self.classifier)
+
+
+def summarize_outputs(outputs, votes=False):
+    value, std = outputs.mean(axis=1), outputs.std(axis=1)
+    if votes:
+        z = NormalDist().inv_cdf(TREE_INTERVAL[1] / 100)
+        half_width = z * std / np.sqrt(outputs.shape[1])
+        lower, upper = np.clip(value - half_width, 0, 1), np.clip(value + half_width, 0, 1)
+    else:
+        lower, upper = np.percentile(outputs, TREE_INTERVAL, axis=1)
+    return {'value': value, 'std': std, 'lower': lower, 'upper': upper}
+
+
+def point_only(value):
+    """The summary shape for engines without a per-tree spread."""
+    return {'value': np.asarray(value, dtype=float), 'std': None, 'lower': None, 'upper': None}
@@ -0,0 +1,234 @@
+"""
+Current weather for the prediction inputs.
+
+A WeatherProvider knows how to ask one backend for one location. The
+WeatherService fans requests for every district out concurrently over one
+pooled aiohttp session, so looking up all districts costs about one
+round-trip. The session and its connections live as long as the service;
+close() it at shutdown. Results are cached per district with a TTL. A
+district the provider cannot answer in time falls back to its climatology,
+and so does any field the provider does not report.
+
+Select the provider with FIRE_APP_WEATHER_PROVIDER:
+    open-meteo            Open-Meteo forecast API (default)
+    http://host:port      any server speaking the simple JSON protocol below
+    none                  always use the climatology
+
+The simple JSON protocol is what src/weather_stub_server.py serves:
+    GET {base_url}/current?district=<name>&lat=<lat>&lon=<lon>
+    -> {"AvgTemp": .., "MaxTemp": .., "Humidity": .., "WindSpeed": .., "Prep": ..}
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import aiohttp
+
+from src.climate_archive import CLIMATE_VARIABLES
+
+
+DEFAULT_TTL_SECONDS = 15 * 60
+# Failed lookups are remembered briefly so an outage does not cost a timeout per rerun
+DEFAULT_FAILURE_TTL_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 3.0
+DEFAULT_MAX_CONNECTIONS = 20
+
+
+class WeatherProvider:
+    """Fetches current conditions for one location."""
+
+    name = "base"
+
+    async def fetch(self, session, district, lat, lon):
+        """Return a dict with any subset of CLIMATE_VARIABLES."""
+        raise NotImplementedError
+
+
+class ClimatologyProvider(WeatherProvider):
+    """Never calls out; every value comes from the climatology fallback."""
+
+    name = "climatology"
+
+    async def fetch(self, session, district, lat, lon):
+        return {}
+
+
+class JsonHttpProvider(WeatherProvider):
+    """Provider for servers that already answer in the app's variable names."""
+
+    name = "http"
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    async def fetch(self, session, district, lat, lon):
+        params = {"district": district, "lat": lat, "lon": lon}
+        async with session.get(f"{self.base_url}/current", params=params) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        return {var: float(payload[var]) for var in CLIMATE_VARIABLES if payload.get(var) is not None}
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo current conditions (no API key required)."""
+
+    name = "open-meteo"
+    url = "https://api.open-meteo.com/v1/forecast"
+
+    async def fetch(self, session, district, lat, lon):
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m",
+            "daily": "temperature_2m_max",
+            "wind_speed_unit": "ms",
+            "forecast_days": 1,
+            "timezone": "auto",
+        }
+        async with session.get(self.url, params=params) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        current = payload["current"]
+        # Monthly precipitation has no "current" equivalent, so Prep comes from the climatology
+        return {
+            "AvgTemp": float(current["temperature_2m"]),
+            "MaxTemp": float(payload["daily"]["temperature_2m_max"][0]),
+            "Humidity": float(current["relative_humidity_2m"]),
+            "WindSpeed": float(current["wind_speed_10m"]),
+        }
+
+
+def provider_from_env():
+    setting = os.environ.get("FIRE_APP_WEATHER_PROVIDER", "open-meteo").strip()
+    if setting.lower() == "none":
+        return ClimatologyProvider()
+    if setting.startswith(("http://", "https://")):
+        return JsonHttpProvider(setting)
+    return OpenMeteoProvider()
+
+
+class WeatherService:
+    """Concurrent, TTL-cached weather lookups with climatology fallback."""
+
+    def __init__(self, provider, climatology, ttl=DEFAULT_TTL_SECONDS,
+                 failure_ttl=DEFAULT_FAILURE_TTL_SECONDS, timeout=DEFAULT_TIMEOUT_SECONDS,
+                 max_connections=DEFAULT_MAX_CONNECTIONS):
+        self.provider = provider
+        self.climatology = climatology
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._cache = {}  # district -> (expires_at, values or None when the lookup failed)
+        self._lock = threading.Lock()
+        # One event loop thread owns the session, so its connection pool outlives each call
+        self._loop = None
+        self._thread = None
+        self._session = None
+
+    def _cached(self, district, now):
+        with self._lock:
+            entry = self._cache.get(district)
+        if entry is not None and entry[0] > now:
+            return entry
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _run(self, coro):
+        """Run coro on the service's loop thread, starting it on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, daemon=True,
+                                                name="weather-service")
+                self._thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_session(self):
+        # Created on the loop thread, the only place it is used, so no lock is needed
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self._session
+
+    async def _fetch_all(self, locations):
+        session = await self._get_session()
+
+        async def one(district, lat, lon):
+            try:
+                return district, await self.provider.fetch(session, district, lat, lon)
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError, TypeError):
+                return district, None
+
+        return dict(await asyncio.gather(*(one(d, lat, lon) for d, (lat, lon) in locations.items())))
+
+    async def _close_session(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def close(self):
+        """Close the session and stop the loop thread; safe to call more than once."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_session(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_current(self, locations, month):
+        """
+        Current conditions for {district: (lat, lon)}.
+
+        Returns {district: {"values": {var: value}, "source": "provider" | "cache" | "climatology"}}.
+        """
+        now = time.monotonic()
+        results = {}
+        missing = {}
+        for district, location in locations.items():
+            cached = self._cached(district, now)
+            if cached is None:
+                missing[district] = location
+            elif cached[1] is None:
+                results[district] = {"values": self._fallback(district, month), "source": "climatology"}
+            else:
+                results[district] = {"values": {**self._fallback(district, month), **cached[1]},
+                                     "source": "cache"}
+
+        fetched = {}
+        if missing and not isinstance(self.provider, ClimatologyProvider):
+            fetched = self._run(self._fetch_all(missing))
+
+        now = time.monotonic()
+        for district in missing:
+            values = fetched.get(district)
+            fallback = self._fallback(district, month)
+            if values:
+                # Only the provider's own fields are cached; the fallback depends on the month
+                entry = (now + self.ttl, values)
+                results[district] = {"values": {**fallback, **values}, "source": "provider"}
+            else:
+                entry = (now + self.failure_ttl, None)
+                results[district] = {"values": fallback, "source": "climatology"}
+            if not isinstance(self.provider, ClimatologyProvider):
+                with self._lock:
+                    self._cache[district] = entry
+        return results
+
+    def _fallback(self, district, month):
+        return self.climatology.defaults(district, month) or {}
@@ -0,0 +1,117 @@
+"""
+Local stand-in for a weather backend, speaking the JsonHttpProvider protocol.
+
+Answers GET /current?district=..&lat=..&lon=.. with canned conditions derived
+from the coordinates, after an optional delay. Districts listed in
+fail_districts get a 503 so the climatology fallback can be exercised.
+
+    python -m src.weather_stub_server --port 8765 --delay 0.05
+    FIRE_APP_WEATHER_PROVIDER=http://127.0.0.1:8765 streamlit run app.py
+"""
+
+import argparse
+import asyncio
+import threading
+
+from aiohttp import web
+
+STATS = web.AppKey("stats", dict)
+
+def canned_conditions(lat, lon):
+    """Deterministic, plausible values so repeated runs compare equal."""
+    avg_temp = round(32.0 - 0.9 * (lat - 26.0) * 3 - 0.2 * (lon - 80.0), 2)
+    return {
+        "AvgTemp": avg_temp,
+        "MaxTemp": round(avg_temp + 6.5, 2),
+        "Humidity": round(40.0 + (lon - 80.0) * 4, 1),
+        "WindSpeed": round(1.5 + (lat - 26.0) * 0.4, 2),
+    }
+
+
+def make_app(delay=0.0, fail_districts=()):
+    fail_districts = set(fail_districts)
+    app = web.Application()
+    # A mutable holder: aiohttp freezes the app's own mapping once it starts
+    app[STATS] = {"requests": 0, "clients": set()}
+
+    async def current(request):
+        app[STATS]["requests"] += 1
+        # The client's (host, port) tells apart the connections the requests arrived on
+        app[STATS]["clients"].add(request.transport.get_extra_info("peername"))
+        if delay:
+            await asyncio.sleep(delay)
+        district = request.query.get("district", "")
+        if district in fail_districts:
+            raise web.HTTPServiceUnavailable()
+        try:
+            lat = float(request.query["lat"])
+            lon = float(request.query["lon"])
+        except (KeyError, ValueError):
+            raise web.HTTPBadRequest()
+        return web.json_response(canned_conditions(lat, lon))
+
+    app.router.add_get("/current", current)
+    return app
+
+
+class StubServer:
+    """Runs the stub on its own event loop thread; use as a context manager."""
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_districts=()):
+        self.host = host
+        self.port = port
+        self.app = make_app(delay, fail_districts)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._runner = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def request_count(self):
+        return self.app[STATS]["requests"]
+
+    @property
+    def connection_count(self):
+        return len(self.app[STATS]["clients"])
+
+    async def _start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Pick up the real port when 0 asked the OS for a free one
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    parser.add_argument("--fail", nargs="*", default=(), help="districts that get a 503")
+    args = parser.parse_args()
+    web.run_app(make_app(args.delay, args.fail), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Units of the parsed climate archive and the climatology built from it.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import pytest
+
+from src.climate_archive import PRECTOT_RATE_FROM_YEAR, read_climate_archive
+from src.climatology import build_climatology
+
+
+@pytest.fixture(scope="module")
+def archive():
+    return read_climate_archive()
+
+
+def test_yearly_precipitation_has_one_unit(archive):
+    # A daily rate read as a monthly total is ~30x too small; real years differ by well under 3x
+    yearly = archive.groupby(['DISTRICT', 'YEAR'])['Prep'].mean().unstack()
+    ratio = yearly / yearly.shift(axis=1)
+    assert ratio.min().min() > 1 / 3
+    assert ratio.max().max() < 3
+
+
+def test_climatology_of_the_rate_years_matches_earlier_years(archive):
+    last_year = int(archive['YEAR'].max())
+    rate_years = build_climatology(archive, (PRECTOT_RATE_FROM_YEAR, last_year))
+    earlier = build_climatology(archive, (int(archive['YEAR'].min()), PRECTOT_RATE_FROM_YEAR - 1))
+
+    means = rate_years.table.set_index(['DISTRICT', 'MONTH'])['Prep_mean']
+    reference = earlier.table.set_index(['DISTRICT', 'MONTH'])['Prep_mean']
+    # Two years of weather stay within 4x of the earlier wet-month means;
+    # a daily rate would come out ~30x below them
+    wet = reference > 50
+    ratio = means[wet] / reference[wet]
+    assert ratio.between(1 / 10, 10).all()
@@ -0,0 +1,71 @@
+"""
+Incremental updates of the lag feature store (src/feature_store.py).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.climate_archive import CLIMATE_ARCHIVE_PATH
+from src.feature_store import KEY_COLUMNS, LAG_FEATURES, load_source, read_store, update_store
+
+
+@pytest.fixture(scope="module")
+def source():
+    return load_source()
+
+
+def months(df):
+    return df['YEAR'] * 12 + df['MONTH'] - 1
+
+
+def sorted_store(store_dir):
+    return read_store(store_dir).sort_values(KEY_COLUMNS).reset_index(drop=True)
+
+
+def test_appending_only_new_months_matches_a_rebuild(source, tmp_path):
+    t = months(source)
+    cut = t.max() - 3
+    update_store(source[t <= cut], tmp_path / "incremental")
+
+    manifest, mode = update_store(source[t > cut], tmp_path / "incremental")
+    assert mode == "append"
+    assert manifest['rows'] == len(source)
+
+    update_store(source, tmp_path / "rebuilt")
+    incremental, rebuilt = sorted_store(tmp_path / "incremental"), sorted_store(tmp_path / "rebuilt")
+    assert len(incremental) == len(source)
+    pd.testing.assert_frame_equal(incremental[KEY_COLUMNS], rebuilt[KEY_COLUMNS])
+    np.testing.assert_allclose(incremental[list(LAG_FEATURES)], rebuilt[list(LAG_FEATURES)])
+
+    # The recorded source hash covers the stored months, so the whole table is up to date
+    assert update_store(source, tmp_path / "incremental")[1] == "none"
+
+
+def test_corrected_stored_month_rebuilds(source, tmp_path):
+    update_store(source, tmp_path)
+    corrected = source.copy()
+    corrected.loc[corrected.index[0], 'Prep'] += 10
+
+    manifest, mode = update_store(corrected, tmp_path)
+    assert mode == "rebuild"
+    assert manifest['rebuilt'] == "stored months changed"
+
+
+def test_changed_climate_archive_rebuilds(source, tmp_path):
+    archive_path = tmp_path / "archive.csv"
+    shutil.copyfile(CLIMATE_ARCHIVE_PATH, archive_path)
+    update_store(source, tmp_path / "store", archive_path=str(archive_path))
+    assert update_store(source, tmp_path / "store", archive_path=str(archive_path))[1] == "none"
+
+    # Any change to the archive can move the normals the deficits and anomalies are measured from
+    with open(archive_path, "a") as f:
+        f.write("\n")
+    manifest, mode = update_store(source, tmp_path / "store", archive_path=str(archive_path))
+    assert mode == "rebuild"
+    assert manifest['rebuilt'] == "climate normals changed"
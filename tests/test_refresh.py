@@ -0,0 +1,50 @@
+"""
+Incremental refresh of a lag-feature artifact set (src/refresh.py).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import glob
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from src.feature_store import KEY_COLUMNS, LAG_FEATURES, load_source, read_store, update_store
+from src.refresh import refresh
+from src.shared_cache import file_fingerprint
+from src.train import COMBINED_DATA_PATH, FEATURE_CACHE_DIR, train
+
+NEW_MONTHS = 2
+
+
+def test_refresh_appends_new_months_to_the_lag_store(tmp_path):
+    combined = pd.read_csv(COMBINED_DATA_PATH)
+    t = combined['YEAR'] * 12 + combined['MONTH'] - 1
+    cut = t.max() - NEW_MONTHS
+    history_path, new_path = str(tmp_path / "history.csv"), str(tmp_path / "new.csv")
+    combined[t <= cut].to_csv(history_path, index=False)
+    combined[t > cut].to_csv(new_path, index=False)
+    fingerprint = file_fingerprint(history_path)[:16]
+
+    try:
+        base_dir, base = train(history_path, str(tmp_path / "versions"), search=False, n_jobs=1, lag_features=True)
+        stored_rows = len(read_store(base['lag_store']))
+
+        _, refreshed, mode = refresh(base_dir, data_path=COMBINED_DATA_PATH, new_data_path=new_path,
+                                     versions_dir=str(tmp_path / "versions"))
+        assert mode == "incremental"
+        assert refreshed['lag_store'] == base['lag_store']
+
+        # The history stays, and the new months get the lags a full build gives them
+        store = read_store(base['lag_store']).sort_values(KEY_COLUMNS).reset_index(drop=True)
+        assert len(store) == stored_rows + int((t > cut).sum())
+        update_store(load_source(), str(tmp_path / "full_store"))
+        full = read_store(str(tmp_path / "full_store")).sort_values(KEY_COLUMNS).reset_index(drop=True)
+        np.testing.assert_allclose(store[list(LAG_FEATURES)], full[list(LAG_FEATURES)])
+    finally:
+        # Feature matrix and store of the truncated history
+        for path in glob.glob(os.path.join(FEATURE_CACHE_DIR, fingerprint + "*")):
+            shutil.rmtree(path)
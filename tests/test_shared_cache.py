@@ -0,0 +1,79 @@
+"""
+Key locking of the process-shared cache (src/shared_cache.py).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import threading
+
+import pytest
+
+from src import shared_cache
+from src.shared_cache import SharedCache
+
+
+@pytest.fixture(params=["flock", "thread locks"])
+def cache(request, tmp_path, monkeypatch):
+    if request.param == "thread locks":
+        monkeypatch.setattr(shared_cache, "fcntl", None)
+    elif shared_cache.fcntl is None:
+        pytest.skip("fcntl is not available")
+    return SharedCache(str(tmp_path))
+
+
+def run_with_timeout(func, timeout=10):
+    # A deadlocked compute would hang the test run, so it runs on a thread we can give up on
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", func()), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "get_or_compute deadlocked"
+    return result["value"]
+
+
+def test_compute_may_read_another_cached_entry(cache):
+    def outer():
+        return cache.get_or_compute("inner", lambda: 2) + 1
+
+    assert run_with_timeout(lambda: cache.get_or_compute("outer", outer)) == 3
+    assert cache.get_or_compute("inner", lambda: 0) == 2
+
+
+def test_same_key_reentered_on_one_thread_does_not_deadlock(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        if len(calls) == 1:
+            # Re-entry runs compute again instead of waiting on the lock this thread holds
+            return cache.get_or_compute("key", compute) + 1
+        return 1
+
+    assert run_with_timeout(lambda: cache.get_or_compute("key", compute)) == 2
+    assert cache.get_or_compute("key", lambda: 0) == 2
+
+
+def test_other_threads_wait_for_the_key(cache):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(10)
+        return "value"
+
+    first = threading.Thread(target=cache.get_or_compute, args=("key", slow))
+    first.start()
+    started.wait(10)
+    second = threading.Thread(target=lambda: calls.append(cache.get_or_compute("key", slow)))
+    second.start()
+    second.join(0.2)
+    # The second thread is blocked on the key, not computing it
+    assert second.is_alive() and calls == [1]
+
+    release.set()
+    first.join(10)
+    second.join(10)
+    assert calls == [1, "value"]
@@ -0,0 +1,21 @@
+"""
+Versioned artifact directories of src/train.py.
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.train import make_version_dir
+
+
+def test_runs_in_the_same_second_get_their_own_directories(tmp_path):
+    # Names have one-second resolution, so these all start from the same name
+    with ThreadPoolExecutor(8) as pool:
+        dirs = list(pool.map(lambda _: make_version_dir(str(tmp_path), "0123456789abcdef"), range(8)))
+
+    assert len(set(dirs)) == len(dirs)
+    assert all(os.path.isdir(d) for d in dirs)
+    assert all(os.path.basename(d).split("-")[1] == "01234567" for d in dirs)
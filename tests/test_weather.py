@@ -0,0 +1,130 @@
+"""
+WeatherService against the local stand-in server (src/weather_stub_server.py).
+
+Run from the repository root:
+    python -m pytest tests
+"""
+
+import time
+
+import pytest
+
+from src.weather import JsonHttpProvider, WeatherService
+from src.weather_stub_server import StubServer, canned_conditions
+
+
+LOCATIONS = {f"district_{i}": (26.5 + i * 0.05, 80.2 + i * 0.12) for i in range(60)}
+MONTH = 4
+FALLBACK = {'Prep': 12.0, 'AvgTemp': 20.0, 'MaxTemp': 26.0, 'Humidity': 55.0, 'WindSpeed': 2.0}
+
+
+class FixedClimatology:
+    """The same defaults for every district and month."""
+
+    def defaults(self, district, month):
+        return dict(FALLBACK)
+
+
+def make_service(server, **kwargs):
+    kwargs.setdefault('max_connections', len(LOCATIONS))
+    return WeatherService(JsonHttpProvider(server.url), FixedClimatology(), **kwargs)
+
+
+def test_fetches_every_district_concurrently():
+    delay = 0.3
+    with StubServer(delay=delay) as server:
+        with make_service(server) as service:
+            start = time.perf_counter()
+            results = service.get_current(LOCATIONS, MONTH)
+            elapsed = time.perf_counter() - start
+
+    assert server.request_count == len(LOCATIONS)
+    # One request after another would take len(LOCATIONS) * delay = 18 s
+    assert elapsed < 2 * delay
+    assert {r['source'] for r in results.values()} == {'provider'}
+    lat, lon = LOCATIONS['district_7']
+    for var, value in canned_conditions(lat, lon).items():
+        assert results['district_7']['values'][var] == pytest.approx(value)
+    # Prep is not served, so it comes from the climatology
+    assert results['district_7']['values']['Prep'] == FALLBACK['Prep']
+
+
+def test_cache_hit_within_ttl_makes_no_request():
+    with StubServer() as server:
+        with make_service(server, ttl=60) as service:
+            first = service.get_current(LOCATIONS, MONTH)
+            second = service.get_current(LOCATIONS, MONTH)
+        assert server.request_count == len(LOCATIONS)
+
+    assert {r['source'] for r in second.values()} == {'cache'}
+    assert all(second[d]['values'] == first[d]['values'] for d in LOCATIONS)
+
+
+def test_expired_entries_are_fetched_again():
+    with StubServer() as server:
+        with make_service(server, ttl=0.05) as service:
+            service.get_current(LOCATIONS, MONTH)
+            time.sleep(0.1)
+            results = service.get_current(LOCATIONS, MONTH)
+        assert server.request_count == 2 * len(LOCATIONS)
+        # The second round reused the pooled connections of the first
+        assert server.connection_count == len(LOCATIONS)
+
+    assert {r['source'] for r in results.values()} == {'provider'}
+
+
+def test_failed_district_falls_back_to_climatology():
+    with StubServer(fail_districts=['district_3']) as server:
+        with make_service(server) as service:
+            results = service.get_current(LOCATIONS, MONTH)
+
+    assert results['district_3'] == {'values': FALLBACK, 'source': 'climatology'}
+    assert all(r['source'] == 'provider' for d, r in results.items() if d != 'district_3')
+
+
+def test_failures_are_remembered_for_the_failure_ttl():
+    locations = {'district_3': LOCATIONS['district_3']}
+    with StubServer(fail_districts=['district_3']) as server:
+        with make_service(server, failure_ttl=0.2) as service:
+            service.get_current(locations, MONTH)
+            again = service.get_current(locations, MONTH)
+            # Within the failure TTL the outage costs no second request
+            assert server.request_count == 1
+            assert again['district_3']['source'] == 'climatology'
+
+            time.sleep(0.25)
+            service.get_current(locations, MONTH)
+            assert server.request_count == 2
+
+
+def test_outage_times_out_fast_and_falls_back():
+    timeout = 0.3
+    # The server answers far later than the client is willing to wait
+    with StubServer(delay=5) as server:
+        with make_service(server, timeout=timeout) as service:
+            start = time.perf_counter()
+            results = service.get_current(LOCATIONS, MONTH)
+            elapsed = time.perf_counter() - start
+
+            assert elapsed < timeout + 1.0
+            assert all(r == {'values': FALLBACK, 'source': 'climatology'} for r in results.values())
+
+            # The failure is cached, so the next rerun does not wait for the timeout again
+            start = time.perf_counter()
+            service.get_current(LOCATIONS, MONTH)
+            assert time.perf_counter() - start < 0.1
+
+
+def test_close_releases_the_session_and_is_idempotent():
+    with StubServer() as server:
+        service = make_service(server)
+        service.get_current(LOCATIONS, MONTH)
+        thread = service._thread
+        service.close()
+        service.close()
+        assert not thread.is_alive()
+
+        # A closed service starts over on the next call
+        service.clear()
+        assert {r['source'] for r in service.get_current(LOCATIONS, MONTH).values()} == {'provider'}
+        service.close()